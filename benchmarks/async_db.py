@@ -0,0 +1,152 @@
+# benchmarks/async_db.py
+"""
+Asinxron database qatlami: parallel so'rovlar event loop ni bloklamaydi
+
+N ta parallel "foydalanuvchi" foydalanuvchini (keshsiz) va savatni o'qiydi, shu vaqtda alohida
+korutina har 10 ms da event loop kechikishini o'lchaydi. Bir xil ma'lumotlar ustida ikki yo'l
+solishtiriladi:
+  sync  - avvalgi qatlam: create_engine + scoped_session, so'rovlar async def ichida
+          sinxron bajariladi (get_user va get_cart_items nusxasi, jami Python da)
+  async - database/db.py: AsyncSession, get_user + get_cart_summary
+Sinxron yo'lda har bir so'rov loop ni to'xtatadi - kechikish so'rov davomiyligiga teng bo'ladi.
+
+--rtt har bir SQL so'rovga qo'shiladigan tarmoq kechikishi (ms): sync yo'lda time.sleep (drayver
+soketni kutgandek), async yo'lda asyncio.sleep. Lokal SQLite faylda (--rtt 0) kutish yo'q, shuning
+uchun sync yo'l so'rov/s bo'yicha tezroq chiqishi mumkin, lekin loop butun vaqt bloklanadi.
+Haqiqiy tarmoq uchun BENCH_DATABASE_URL=postgresql://... --rtt 0 (sync yo'lga psycopg2 kerak).
+
+    python -m benchmarks.async_db [--users 50] [--calls 40] [--rtt 2]
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import setup_database, reset_schema, seed_products, summary, Timer
+
+DATABASE_URL = setup_database("async_db.db")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker, scoped_session  # noqa: E402
+
+from database import db  # noqa: E402
+from database.models import User, Product, Cart  # noqa: E402
+
+TICK = 0.01
+
+
+class LegacyDB:
+    """
+    Avvalgi sinxron qatlam (create_engine + scoped_session) so'rovlarining nusxasi
+    """
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url, echo=False)
+        self.Session = scoped_session(sessionmaker(bind=self.engine))
+
+    async def get_user(self, user_id: int):
+        try:
+            session = self.Session()
+            user = session.query(User).filter(User.user_id == user_id).first()
+            return {'user_id': user.user_id, 'language': user.language} if user else None
+        finally:
+            self.Session.remove()
+
+    async def get_cart_summary(self, user_id: int, lang: str, page: int, limit: int):
+        try:
+            session = self.Session()
+            cart_items = session.query(Cart, Product).join(Product).filter(
+                Cart.user_id == user_id
+            ).all()
+
+            items = [
+                {
+                    'cart_id': cart.id,
+                    'name': product.name_uz if lang == 'uz' else product.name_ru,
+                    'price': product.price,
+                    'quantity': cart.quantity
+                }
+                for cart, product in cart_items
+            ]
+            return {
+                'items': items[page * limit:(page + 1) * limit],
+                'count': len(items),
+                'total': sum(item['price'] * item['quantity'] for item in items)
+            }
+        finally:
+            self.Session.remove()
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+
+
+async def measure_loop_lag(lags, stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run_mode(mode: str, users: int, calls: int, rtt: float) -> float:
+    legacy = LegacyDB(DATABASE_URL) if mode == 'sync' else None
+    latencies, lags = [], []
+
+    async def user_session(user_id: int) -> None:
+        for _ in range(calls):
+            started = time.perf_counter()
+            if legacy:
+                await legacy.get_user(user_id)
+                time.sleep(rtt)
+                await legacy.get_cart_summary(user_id, 'uz', 0, 5)
+                time.sleep(rtt)
+            else:
+                db.user_cache.invalidate(user_id)
+                await db.get_user(user_id)
+                await asyncio.sleep(rtt)
+                await db.get_cart_summary(user_id, 'uz', 0, 5)
+                await asyncio.sleep(rtt)
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(measure_loop_lag(lags, stop))
+    with Timer() as timer:
+        await asyncio.gather(*[user_session(user_id) for user_id in range(1, users + 1)])
+    stop.set()
+    await monitor
+
+    if legacy:
+        legacy.dispose()
+
+    requests = users * calls
+    throughput = requests / timer.elapsed
+    request_ms = summary(latencies)
+    lag_ms = summary(lags)
+    print(f"{mode:>5}: {requests} so'rov {timer.elapsed:5.2f}s da, {throughput:6.0f} so'rov/s | "
+          f"so'rov p50 {request_ms['p50']:6.1f} p99 {request_ms['p99']:7.1f} ms | "
+          f"loop kechikishi p50 {lag_ms['p50']:6.1f} p99 {lag_ms['p99']:7.1f} max {lag_ms['max']:7.1f} ms")
+    return throughput
+
+
+async def main(users: int, calls: int, rtt_ms: float) -> None:
+    await reset_schema(db.engine)
+    product_ids = await seed_products(db.Session, 20)
+    for user_id in range(1, users + 1):
+        await db.create_user(user_id, "user", "User")
+        for product_id in product_ids[:5]:
+            await db.add_to_cart(user_id, product_id)
+
+    print(f"tarmoq kechikishi (rtt): {rtt_ms:g} ms / so'rov")
+    results = {mode: await run_mode(mode, users, calls, rtt_ms / 1000) for mode in ('sync', 'async')}
+    await db.engine.dispose()
+
+    print(f"async / sync: {results['async'] / results['sync']:.2f}x so'rov/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--rtt", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.calls, args.rtt))
@@ -0,0 +1,65 @@
+# benchmarks/checkout.py
+"""
+Checkout (create_order) tezligi va so'rovlar soni savatdagi mahsulotlar soniga qarab
+
+Har bir o'lcham uchun savat to'ldiriladi va create_order_from_cart chaqiriladi;
+faqat checkout vaqti hisoblanadi.
+
+    python -m benchmarks.checkout [--checkouts 200] [--sizes 1 10 50]
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import insert
+
+from benchmarks.common import setup_database, reset_schema, seed_products, count_statements, Timer
+
+setup_database("checkout.db")
+
+from database import db  # noqa: E402
+from database.models import Cart  # noqa: E402
+
+USER_ID = 1001
+
+
+async def fill_cart(product_ids):
+    async with db.Session() as session:
+        await session.execute(insert(Cart), [
+            {'user_id': USER_ID, 'product_id': product_id, 'quantity': 1} for product_id in product_ids
+        ])
+        await session.commit()
+
+
+async def checkout():
+    return await db.create_order_from_cart(USER_ID, "+998901234567", "Toshkent", "cash", 'uz', "User")
+
+
+async def main(checkouts: int, sizes) -> None:
+    await reset_schema(db.engine)
+    await db.create_user(USER_ID, "user", "User")
+    product_ids = await seed_products(db.Session, max(sizes))
+
+    for size in sizes:
+        spent = 0.0
+        for _ in range(checkouts):
+            await fill_cart(product_ids[:size])
+            with Timer() as timer:
+                assert 'id' in await checkout()
+            spent += timer.elapsed
+
+        await fill_cart(product_ids[:size])
+        with count_statements(db.engine) as statements:
+            await checkout()
+
+        print(f"{size:>3} ta mahsulot: {checkouts / spent:7.1f} checkout/s, {len(statements)} so'rov")
+
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkouts", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+    asyncio.run(main(args.checkouts, args.sizes))
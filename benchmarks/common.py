@@ -0,0 +1,99 @@
+# benchmarks/common.py
+"""
+Benchmark lar uchun umumiy yordamchilar
+
+Skriptlar repozitoriya ildizidan ishga tushiriladi, masalan: python -m benchmarks.checkout
+Benchmark jadvallarni qaytadan yaratadi, shuning uchun DATABASE_URL emas, alohida
+BENCH_DATABASE_URL ishlatiladi (berilmasa - vaqtinchalik SQLite fayl).
+setup_database() database paketi import qilinishidan oldin chaqirilishi kerak.
+"""
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+def setup_database(name: str) -> str:
+    """
+    DATABASE_URL ni benchmark bazasiga yo'naltirish
+    """
+    url = os.getenv("BENCH_DATABASE_URL") or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='atir-bench-'), name)}"
+    os.environ["DATABASE_URL"] = url
+    os.environ["DATABASE_READ_URL"] = ""
+    return url
+
+
+async def reset_schema(engine) -> None:
+    """
+    Bo'sh jadvallar
+    """
+    from database.models import Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed_products(session_factory, count: int, stock: int = 10 ** 9) -> List[int]:
+    """
+    count ta faol mahsulot, id lar ro'yxati
+    """
+    from database.models import Product
+
+    async with session_factory() as session:
+        products = [
+            Product(name_uz=f"Atir {i}", name_ru=f"Духи {i}", description_uz="Tavsif",
+                    description_ru="Описание", price=100000, category='men',
+                    image_url="file-id", stock_quantity=stock)
+            for i in range(count)
+        ]
+        session.add_all(products)
+        await session.commit()
+        return [product.id for product in products]
+
+
+@contextmanager
+def count_statements(engine):
+    """
+    Blok ichida bajarilgan SQL so'rovlari (executemany bitta hisoblanadi)
+    """
+    from sqlalchemy import event
+
+    statements: List[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Qiymatlar (soniya) percentili millisekundda
+    """
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * p) - 1)] * 1000
+
+
+def summary(values: List[float]) -> Dict[str, float]:
+    return {'p50': percentile(values, 0.5), 'p99': percentile(values, 0.99), 'max': max(values) * 1000}
+
+
+class Timer:
+    """
+    with Timer() as t: ...; t.elapsed - soniya
+    """
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
@@ -0,0 +1,93 @@
+# benchmarks/mixed_load.py
+"""
+Aralash yuklama: o'quvchilar (savat + katalog sahifasi) va savatga yozuvchilar bir vaqtda
+
+Ikki SQLite sozlamasi solishtiriladi, har biri alohida yangi faylda:
+  default - create_async_engine standarti (rollback journal, NullPool)
+  tuned   - database/engine.py: create_db_engine (WAL pragmalari + connection pool)
+Faqat SQLite uchun (journal rejimi fayl bilan birga saqlanadi). Fayllar --dir papkasida
+yaratiladi - fsync ta'sirini ko'rish uchun diskdagi papka ishlating.
+
+    python -m benchmarks.mixed_load [--readers 10] [--writers 10] [--ops 40] [--dir /tmp]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.common import setup_database, reset_schema, seed_products, summary, Timer
+
+setup_database("mixed_load.db")
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from database import db  # noqa: E402
+from database.engine import create_db_engine, to_async_url  # noqa: E402
+
+
+def use_engine(mode: str, url: str) -> None:
+    db.engine = create_async_engine(to_async_url(url)) if mode == 'default' else create_db_engine(url)
+    db.Session = async_sessionmaker(db.engine, expire_on_commit=False)
+
+
+async def run_mode(mode: str, url: str, readers: int, writers: int, ops: int) -> None:
+    use_engine(mode, url)
+    await reset_schema(db.engine)
+    users = max(readers, writers)
+    for user_id in range(1, users + 1):
+        await db.create_user(user_id, "user", "User")
+    product_ids = await seed_products(db.Session, 200, stock=100)
+    for user_id in range(1, users + 1):
+        await db.add_to_cart(user_id, product_ids[0])
+    cart_ids = {user_id: (await db.get_cart_summary(user_id, 'uz'))['items'][0]['cart_id']
+                for user_id in range(1, users + 1)}
+
+    reads, writes, errors = [], [], []
+
+    async def reader(user_id: int) -> None:
+        for _ in range(ops):
+            started = time.perf_counter()
+            await db.get_cart_summary(user_id, 'uz', 0, 5)
+            db.catalog_cache.bump()
+            await db.get_products_by_category('men', 'uz')
+            reads.append(time.perf_counter() - started)
+
+    async def writer(user_id: int) -> None:
+        for _ in range(ops):
+            started = time.perf_counter()
+            if await db.change_cart_quantity(cart_ids[user_id], user_id, 1, 'uz') is None:
+                errors.append(user_id)
+            writes.append(time.perf_counter() - started)
+
+    with Timer() as timer:
+        await asyncio.gather(*[reader(user_id) for user_id in range(1, readers + 1)],
+                             *[writer(user_id) for user_id in range(1, writers + 1)])
+
+    async with db.engine.connect() as conn:
+        journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+    await db.engine.dispose()
+
+    read_ms, write_ms = summary(reads), summary(writes)
+    print(f"{mode:>7} (journal={journal}): {timer.elapsed:5.2f}s | "
+          f"o'qish p50 {read_ms['p50']:6.1f} p99 {read_ms['p99']:7.1f} ms | "
+          f"yozish p50 {write_ms['p50']:6.1f} p99 {write_ms['p99']:7.1f} ms | xatolik {len(errors)}")
+
+
+async def main(readers: int, writers: int, ops: int, directory: str) -> None:
+    workdir = tempfile.mkdtemp(prefix="atir-bench-", dir=directory)
+    for mode in ('default', 'tuned'):
+        url = f"sqlite:///{os.path.join(workdir, mode + '.db')}"
+        await run_mode(mode, url, readers, writers, ops)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--writers", type=int, default=10)
+    parser.add_argument("--ops", type=int, default=40)
+    parser.add_argument("--dir", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.readers, args.writers, args.ops, args.dir))
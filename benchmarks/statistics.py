@@ -0,0 +1,169 @@
+# benchmarks/statistics.py
+"""
+Statistika ekranlari: so'rovlar soni va davomiyligi
+
+--orders ta buyurtma (kunlar, statuslar va operatorlar bo'yicha tarqalgan) yoziladi,
+daily_sales qayta hisoblanadi, keyin har bir davr uchun ikki yo'l solishtiriladi:
+  eski   - orders jadvalidan har bir hisoblagich uchun alohida COUNT/SUM so'rovi
+           (avvalgi get_statistics / get_operator_statistics nusxasi)
+  yangi  - database/db.py: daily_sales yig'indi jadvalidan o'qish
+Ikkalasi ham joriy sxema (indekslar bilan) ustida ishlaydi. 1M buyurtmani yozish SQLite da
+taxminan bir daqiqa oladi - tez tekshirish uchun --orders 100000.
+
+    python -m benchmarks.statistics [--orders 1000000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, func
+
+from benchmarks.common import setup_database, reset_schema, count_statements, summary, Timer
+
+setup_database("statistics.db")
+
+from database import db  # noqa: E402
+from database.models import Order, Product, User  # noqa: E402
+
+STATUSES = ('new', 'processing', 'delivering', 'completed', 'completed', 'cancelled')
+OPERATORS = 10
+USERS = 1000
+CHUNK = 10000
+
+
+async def seed_orders(count: int) -> None:
+    random.seed(1)
+    now = datetime.utcnow()
+
+    async with db.Session() as session:
+        await session.execute(insert(User), [
+            {'user_id': user_id, 'full_name': f"User {user_id}"} for user_id in range(1, USERS + 1)
+        ])
+
+        for start in range(0, count, CHUNK):
+            rows = []
+            for _ in range(min(CHUNK, count - start)):
+                operator_id = random.randint(0, OPERATORS)
+                rows.append({
+                    'user_id': random.randint(1, USERS),
+                    'phone': "+998901234567",
+                    'address': "Toshkent",
+                    'payment_type': 'cash',
+                    'total': random.randint(1, 20) * 50000,
+                    'status': random.choice(STATUSES),
+                    'operator_id': operator_id or None,
+                    'operator_username': f"op{operator_id}" if operator_id else None,
+                    'created_at': now - timedelta(minutes=random.randint(0, 365 * 24 * 60))
+                })
+            await session.execute(insert(Order), rows)
+        await session.commit()
+
+
+def legacy_period_filters(period: str):
+    """
+    Avvalgi _period_filters nusxasi
+    """
+    if period == 'today':
+        return [func.date(Order.created_at) == datetime.utcnow().date()]
+    elif period == 'week':
+        return [Order.created_at >= datetime.utcnow() - timedelta(days=7)]
+    elif period == 'month':
+        return [Order.created_at >= datetime.utcnow() - timedelta(days=30)]
+    return []
+
+
+async def legacy_get_statistics(period: str) -> dict:
+    """
+    Avvalgi get_statistics: har bir hisoblagich uchun alohida so'rov
+    """
+    async with db.Session() as session:
+        filters = legacy_period_filters(period)
+        completed = filters + [Order.status == 'completed']
+        pending = filters + [Order.status.in_(['new', 'processing'])]
+
+        stats = {
+            'total_users': await session.scalar(select(func.count(User.id))),
+            'total_products': await session.scalar(
+                select(func.count(Product.id)).where(Product.is_active == True)
+            ),
+            'total_orders': await session.scalar(select(func.count(Order.id)).where(*filters)),
+            'completed_orders': await session.scalar(select(func.count(Order.id)).where(*completed)),
+            'pending_orders': await session.scalar(select(func.count(Order.id)).where(*pending)),
+            'total_revenue': await session.scalar(select(func.sum(Order.total)).where(*completed)) or 0
+        }
+
+        top_operators = await session.execute(
+            select(
+                Order.operator_username,
+                func.count(Order.id).label('order_count'),
+                func.sum(Order.total).label('revenue')
+            ).where(
+                Order.operator_id.isnot(None),
+                Order.status == 'completed'
+            ).group_by(Order.operator_username).order_by(func.sum(Order.total).desc()).limit(5)
+        )
+        stats['top_operators'] = [
+            {'username': row[0], 'orders': row[1], 'revenue': row[2] or 0} for row in top_operators
+        ]
+        return stats
+
+
+async def legacy_get_operator_statistics(operator_id: int, period: str) -> dict:
+    """
+    Avvalgi get_operator_statistics: uchta alohida so'rov
+    """
+    async with db.Session() as session:
+        filters = [Order.operator_id == operator_id] + legacy_period_filters(period)
+        completed = filters + [Order.status == 'completed']
+
+        return {
+            'total_orders': await session.scalar(select(func.count(Order.id)).where(*filters)),
+            'completed_orders': await session.scalar(select(func.count(Order.id)).where(*completed)),
+            'total_revenue': await session.scalar(select(func.sum(Order.total)).where(*completed)) or 0
+        }
+
+
+async def measure(call, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        with count_statements(db.engine) as statements, Timer() as timer:
+            await call()
+        timings.append(timer.elapsed)
+    return len(statements), summary(timings)
+
+
+async def compare(name: str, legacy_call, call, repeat: int) -> None:
+    old_count, old_ms = await measure(legacy_call, repeat)
+    new_count, new_ms = await measure(call, repeat)
+    print(f"{name:<38} eski {old_count} so'rov p50 {old_ms['p50']:8.1f} ms | "
+          f"yangi {new_count} so'rov p50 {new_ms['p50']:6.1f} ms | "
+          f"{old_ms['p50'] / max(new_ms['p50'], 0.001):6.0f}x")
+
+
+async def main(orders: int, repeat: int) -> None:
+    await reset_schema(db.engine)
+
+    with Timer() as timer:
+        await seed_orders(orders)
+        rows = await db.rebuild_daily_sales()
+    print(f"{orders} buyurtma, {rows} daily_sales qatori ({timer.elapsed:.1f}s)\n")
+
+    for period in ('today', 'week', 'month', 'all'):
+        await compare(f"get_statistics('{period}')",
+                      lambda: legacy_get_statistics(period),
+                      lambda: db.get_statistics(period), repeat)
+        await compare(f"get_operator_statistics(1, '{period}')",
+                      lambda: legacy_get_operator_statistics(1, period),
+                      lambda: db.get_operator_statistics(1, period), repeat)
+
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.repeat))
@@ -15,7 +15,14 @@ from aiogram.client.default import DefaultBotProperties
 from config import BOT_TOKEN, logger
 import config
 from database import init_db
+from database.metrics import loop_lag_monitor
 from handlers import register_all_handlers
+from middlewares import register_all_middlewares
+from utils.notifier import notifier
+from utils.outbox import outbox_worker
+from utils.stock_monitor import low_stock_monitor
+from utils.cart_debouncer import cart_debouncer
+from utils.fsm_storage import create_fsm_storage
 
 
 async def main():
@@ -27,6 +34,11 @@ async def main():
         logger.error("❌ BOT_TOKEN topilmadi! .env faylini tekshiring.")
         sys.exit(1)
 
+    # Webhook secret siz har kim URL ga soxta update yuborishi mumkin
+    if config.BOT_MODE == "webhook" and not config.WEBHOOK_SECRET:
+        logger.error("❌ WEBHOOK_SECRET topilmadi! Webhook rejimida u majburiy.")
+        sys.exit(1)
+
     # Bot va Dispatcher yaratish
     bot = Bot(
         token=BOT_TOKEN,
@@ -36,25 +48,44 @@ async def main():
     # Bot obyektini global qilish (handlers uchun)
     config.BOT = bot
 
-    dp = Dispatcher()
+    # FSM holatlari umumiy storage da (bir nechta jarayon va qayta ishga tushish uchun)
+    dp = Dispatcher(storage=create_fsm_storage())
 
     # Database ni ishga tushirish
     logger.info("📦 Database yaratilmoqda...")
     await init_db()
 
+    # Middlewarelarni ro'yxatga olish
+    register_all_middlewares(dp)
+
     # Handlerlarni ro'yxatga olish
     logger.info("🔧 Handlerlar ro'yxatga olinmoqda...")
     register_all_handlers(dp)
 
+    # Xabar yuboruvchi worker larni ishga tushirish
+    notifier.start(bot)
+    outbox_worker.start()
+    loop_lag_monitor.start()
+
     # Botni ishga tushirish
     logger.info("🚀 Bot ishga tushdi!")
 
     try:
-        # Polling boshlanishi
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        if config.BOT_MODE == "webhook":
+            # Webhook rejimi (aiohttp server)
+            from utils.webhook import run_webhook
+            await run_webhook(dp, bot)
+        else:
+            # Polling boshlanishi
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     except Exception as e:
         logger.error(f"❌ Xatolik: {e}")
     finally:
+        await cart_debouncer.stop()
+        await outbox_worker.stop()
+        await low_stock_monitor.stop()
+        await notifier.stop()
+        await loop_lag_monitor.stop()
         await bot.session.close()
         logger.info("👋 Bot to'xtatildi")
 
@@ -12,9 +12,39 @@ load_dotenv()
 # Bot tokeni
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
+# Ishga tushirish rejimi: polling yoki webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+
+# Webhook sozlamalari (BOT_MODE=webhook bo'lganda)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # Tashqi manzil, masalan: https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # X-Telegram-Bot-Api-Secret-Token, webhook rejimida majburiy
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "40"))  # Bir vaqtda ishlanadigan update lar
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "30"))  # soniya
+
 # Database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///atir_bot.db")
 
+# Hisobotlar (statistika, buyurtmalar ro'yxati, ombor hisoboti) uchun ixtiyoriy read-only replica
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+READ_REPLICA_RETRY_INTERVAL = float(os.getenv("READ_REPLICA_RETRY_INTERVAL", "30"))  # soniya, replica ishlamasa
+
+# Connection pool (database/engine.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # soniya, bo'sh ulanish kutish
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # soniya, PostgreSQL uchun
+
+# SQLite pragmalari (WAL rejimida)
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms, qulf bo'shashini kutish
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024)))  # bayt
+
+# Event loop kechikishi monitori (database/metrics.py)
+LOOP_LAG_CHECK_INTERVAL = float(os.getenv("LOOP_LAG_CHECK_INTERVAL", "0.5"))  # soniya
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "25"))  # shundan ko'p bloklansa ogohlantirish
+
 # Admin ID lar (vergul bilan ajratilgan)
 ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "")
 ADMIN_IDS = [int(admin_id.strip()) for admin_id in ADMIN_IDS_STR.split(",") if admin_id.strip()]
@@ -39,6 +69,52 @@ DEFAULT_LANGUAGE = "uz"
 # Sahifa bo'yicha mahsulotlar soni
 PRODUCTS_PER_PAGE = 5
 
+# Savat xabarida sahifa bo'yicha mahsulotlar soni
+CART_ITEMS_PER_PAGE = 5
+
+# Admin panelda sahifa bo'yicha buyurtmalar soni
+ORDERS_PER_PAGE = 10
+
+# Foydalanuvchilar keshi (LRU + TTL)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))  # soniya
+
+# Katalog keshi (mahsulotlar o'zgarganda avtomatik yangilanadi)
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "300"))  # soniya
+
+# Xabarlarni fon rejimida yuborish (Telegram limitlari: ~30 xabar/soniya,
+# bitta chatga ~1 xabar/soniya, guruhga ~20 xabar/daqiqa)
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "8"))
+NOTIFY_GLOBAL_RATE = float(os.getenv("NOTIFY_GLOBAL_RATE", "25"))  # xabar/soniya
+NOTIFY_CHAT_INTERVAL = float(os.getenv("NOTIFY_CHAT_INTERVAL", "1"))  # soniya
+NOTIFY_GROUP_INTERVAL = float(os.getenv("NOTIFY_GROUP_INTERVAL", "3"))  # soniya
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+
+# Outbox worker (buyurtma xabarlari database orqali yuboriladi)
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))  # soniya
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_CLAIM_TIMEOUT = float(os.getenv("OUTBOX_CLAIM_TIMEOUT", "300"))  # soniya, jarayon to'xtasa hodisa qayta olinadi
+
+# FSM storage: sql (database da, standart), redis yoki memory
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sql").lower()
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", "86400"))  # soniya, tashlab ketilgan holatlar o'chiriladi
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "0.2"))  # soniya, yozuvlar partiya qilib saqlanadi
+# SQL storage o'qish keshi (jarayon ichida): boshqa jarayon yozgan holat TTL dan keyin ko'rinadi, 0 - o'chirilgan
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+FSM_CACHE_TTL = float(os.getenv("FSM_CACHE_TTL", "60"))  # soniya
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Throttling (@rate_limit): memory yoki redis (bir nechta jarayon uchun umumiy)
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "memory").lower()
+THROTTLE_IDLE_TTL = float(os.getenv("THROTTLE_IDLE_TTL", "60"))  # soniya, ishlatilmagan bucket lar o'chiriladi
+
+# Savat -/+ tugmalari - shu oyna ichidagi bosishlar bitta yozuv va bitta tahrirga jamlanadi
+CART_DEBOUNCE_WINDOW = float(os.getenv("CART_DEBOUNCE_WINDOW", "0.7"))  # soniya
+
+# Kam qolgan mahsulotlar haqida ogohlantirish - shu oyna ichidagi o'zgarishlar bitta xabarga jamlanadi
+LOW_STOCK_ALERT_WINDOW = float(os.getenv("LOW_STOCK_ALERT_WINDOW", "60"))  # soniya
+
 # Click va Payme sozlamalari (ixtiyoriy)
 CLICK_MERCHANT_ID = os.getenv("CLICK_MERCHANT_ID", "")
 CLICK_SERVICE_ID = os.getenv("CLICK_SERVICE_ID", "")
@@ -4,7 +4,7 @@ Database modulini import qilish
 """
 
 from .db import init_db
-from .models import User, Product, Cart, Order, OrderItem
+from .models import User, Product, Cart, Order, OrderItem, DailySales, Outbox, FSMState
 
 __all__ = [
     'init_db',
@@ -12,5 +12,8 @@ __all__ = [
     'Product',
     'Cart',
     'Order',
-    'OrderItem'
+    'OrderItem',
+    'DailySales',
+    'Outbox',
+    'FSMState'
 ]
\ No newline at end of file
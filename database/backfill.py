@@ -0,0 +1,27 @@
+# database/backfill.py
+"""
+daily_sales yig'indisini orders jadvalidan qayta hisoblash
+
+Ishga tushirish:
+    python -m database.backfill
+"""
+
+import asyncio
+
+from .db import init_db, rebuild_daily_sales, engine
+
+
+async def main():
+    await init_db()
+
+    rows = await rebuild_daily_sales()
+    if rows < 0:
+        print("❌ daily_sales qayta hisoblanmadi")
+    else:
+        print(f"✅ daily_sales qayta hisoblandi: {rows} ta qator")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,179 @@
+# database/cache.py
+"""
+Jarayon ichidagi (in-process) keshlar
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+
+def _clone(value: Any) -> Any:
+    """
+    Lug'at/ro'yxat/kortejlardan iborat qiymatning chuqur nusxasi (copy.deepcopy dan tezroq)
+    """
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_clone(item) for item in value)
+    return value
+
+
+class TTLCache:
+    """
+    Chegaralangan LRU kesh, har bir yozuv TTL (soniya) o'tgach eskiradi
+    hits / misses hisoblagichlari bilan
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Kalit bo'yicha qiymatni olish (topilmasa yoki eskirgan bo'lsa None)
+        """
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        # Oxirgi ishlatilgan sifatida belgilash
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Qiymatni saqlash, limitdan oshsa eng eski yozuvni chiqarib tashlash
+        """
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Bitta yozuvni o'chirish
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Butun keshni tozalash
+        """
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Kesh statistikasi (monitoring uchun)
+        """
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class VersionedCache:
+    """
+    Versiyali kesh: yozuvlar teglar bilan saqlanadi (masalan ('product', id)).
+    invalidate_tags() faqat shu teglarga bog'langan yozuvlarni, bump() esa butun keshni bekor qiladi.
+    Yuklash boshlanganidan keyin uning teglaridan biri bekor qilingan bo'lsa, eskirgan natija saqlanmaydi.
+    Qiymatlar nusxa sifatida saqlanadi va qaytariladi - chaqiruvchi o'zgartirsa kesh buzilmaydi.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: Dict[Hashable, tuple] = {}
+        self._tag_keys: Dict[Hashable, Set[Hashable]] = {}
+        self._tag_versions: Dict[Hashable, int] = {}
+        self._cleared_version = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Kalit bo'yicha qiymat nusxasini olish (topilmasa yoki eskirgan bo'lsa None)
+        """
+        entry = self._data.get(key)
+
+        if entry is None or entry[1] < time.monotonic():
+            self._data.pop(key, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return _clone(entry[0])
+
+    def set(self, key: Hashable, value: Any, version: int, tags: Iterable[Hashable] = ()) -> bool:
+        """
+        Qiymatni saqlash - yuklash boshlangandan (version) keyin kesh tozalanmagan
+        va teglardan hech biri bekor qilinmagan bo'lsagina
+        """
+        tags = tuple(tags)
+        if version < self._cleared_version:
+            return False
+        if any(self._tag_versions.get(tag, -1) > version for tag in tags):
+            return False
+
+        self._data[key] = (_clone(value), time.monotonic() + self.ttl)
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        return True
+
+    def invalidate_tags(self, tags: Iterable[Hashable]) -> None:
+        """
+        Teglarga bog'langan yozuvlarni bekor qilish (qolgan yozuvlar saqlanadi)
+        """
+        self.version += 1
+        for tag in tags:
+            self._tag_versions[tag] = self.version
+            for key in self._tag_keys.pop(tag, ()):
+                self._data.pop(key, None)
+
+    def bump(self) -> None:
+        """
+        Versiyani oshirish va barcha yozuvlarni bekor qilish
+        """
+        self.version += 1
+        self._cleared_version = self.version
+        self._data.clear()
+        self._tag_keys.clear()
+        self._tag_versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Kesh statistikasi (monitoring uchun)
+        """
+        total = self.hits + self.misses
+        return {
+            'version': self.version,
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
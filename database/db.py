@@ -3,228 +3,460 @@
 Database bilan ishlash funksiyalari
 """
 
-from sqlalchemy import create_engine, select, and_, func
-from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional, List, Dict
-from datetime import datetime
-
-from .models import Base, User, Product, Cart, Order, OrderItem, ProductMLVariant
-from config import DATABASE_URL
-
-# Engine va session yaratish
-engine = create_engine(DATABASE_URL, echo=False)
-session_factory = sessionmaker(bind=engine)
-Session = scoped_session(session_factory)
+import json
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select, insert, update, delete, and_, or_, func, case
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError, DBAPIError
+from typing import Optional, List, Dict, Tuple
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, date, timedelta
+
+from .models import (
+    Base, User, Product, Cart, Order, OrderItem, ProductMLVariant,
+    DailySales, Outbox, FSMState
+)
+from .cache import TTLCache, VersionedCache
+from .engine import create_db_engine
+from .metrics import timed
+from config import (
+    DATABASE_URL, DATABASE_READ_URL, READ_REPLICA_RETRY_INTERVAL,
+    PRODUCTS_PER_PAGE, ORDERS_PER_PAGE,
+    USER_CACHE_SIZE, USER_CACHE_TTL, CATALOG_CACHE_TTL
+)
+
+
+# Engine va session yaratish (AsyncEngine / AsyncSession - event loop bloklanmaydi)
+# Pool va SQLite pragmalari database/engine.py da
+engine = create_db_engine(DATABASE_URL)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# Hisobot so'rovlari uchun ixtiyoriy read-only replica (DATABASE_READ_URL)
+read_engine = create_db_engine(DATABASE_READ_URL) if DATABASE_READ_URL else None
+ReadSession = async_sessionmaker(read_engine, expire_on_commit=False) if read_engine else None
+_replica_down_until = 0.0
+
+# Foydalanuvchilar keshi (user_id -> foydalanuvchi lug'ati)
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# Katalog keshi (mahsulotlar va ML variantlar; o'zgarishda faqat tegishli yozuvlar bekor qilinadi)
+catalog_cache = VersionedCache(ttl=CATALOG_CACHE_TTL)
 
 
 async def init_db():
     """
     Database jadvalllarini yaratish
     """
-    Base.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     print("✅ Database initialized successfully!")
 
 
+@asynccontextmanager
+async def read_session():
+    """
+    Hisobot so'rovlari uchun session: replica sozlangan bo'lsa undan, aks holda primary dan
+    Replica ga ulanib bo'lmasa READ_REPLICA_RETRY_INTERVAL soniya davomida primary ishlatiladi.
+    Replica biroz orqada qolishi mumkin - yozuvdan keyin darhol o'qiladigan joylarda Session() ishlatiladi.
+    """
+    global _replica_down_until
+
+    if ReadSession is not None and time.monotonic() >= _replica_down_until:
+        session = ReadSession()
+        try:
+            await session.connection()
+        except (DBAPIError, OSError) as e:
+            await session.close()
+            _replica_down_until = time.monotonic() + READ_REPLICA_RETRY_INTERVAL
+            print(f"⚠️ Read replica ga ulanib bo'lmadi, primary ishlatiladi: {e}")
+        else:
+            async with session:
+                yield session
+            return
+
+    async with Session() as session:
+        yield session
+
+
 # ==================== USER FUNCTIONS ====================
 
+def _user_to_dict(user: User) -> Dict:
+    """
+    User obyektini lug'atga o'tkazish
+    """
+    return {
+        'id': user.id,
+        'user_id': user.user_id,
+        'username': user.username,
+        'full_name': user.full_name,
+        'language': user.language,
+        'language_selected': user.language_selected,
+        'is_admin': user.is_admin,
+        'role': user.role if hasattr(user, 'role') else 'user',
+        'created_at': user.created_at.strftime('%Y-%m-%d %H:%M')
+    }
+
+
 async def get_user(user_id: int) -> Optional[Dict]:
     """
-    Foydalanuvchini olish
+    Foydalanuvchini olish (avval keshdan)
+    """
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+
+    return await _fetch_user(user_id)
+
+
+@timed
+async def _fetch_user(user_id: int) -> Optional[Dict]:
+    """
+    Keshda yo'q foydalanuvchini database dan o'qish
     """
     try:
-        session = Session()
-        user = session.query(User).filter(User.user_id == user_id).first()
+        async with Session() as session:
+            user = await session.scalar(select(User).where(User.user_id == user_id))
 
-        if user:
-            return {
-                'id': user.id,
-                'user_id': user.user_id,
-                'username': user.username,
-                'full_name': user.full_name,
-                'language': user.language,
-                'is_admin': user.is_admin,
-                'role': user.role if hasattr(user, 'role') else 'user',
-                'created_at': user.created_at.strftime('%Y-%m-%d %H:%M')
-            }
-        return None
+            if user:
+                user_dict = _user_to_dict(user)
+                user_cache.set(user_id, user_dict)
+                return dict(user_dict)
+            return None
     except SQLAlchemyError as e:
         print(f"❌ Error getting user: {e}")
         return None
-    finally:
-        Session.remove()
 
 
+async def get_or_create_user(user_id: int, username: str, full_name: str,
+                             language: str = 'uz') -> Tuple[Optional[Dict], bool]:
+    """
+    Foydalanuvchini olish, mavjud bo'lmasa yaratish (bitta sessiyada)
+    Qaytaradi: (foydalanuvchi, yangi yaratildimi)
+    """
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return dict(cached), False
+
+    return await _fetch_or_create_user(user_id, username, full_name, language)
+
+
+@timed
+async def _fetch_or_create_user(user_id: int, username: str, full_name: str,
+                                language: str) -> Tuple[Optional[Dict], bool]:
+    """
+    Keshda yo'q foydalanuvchini database dan o'qish yoki yaratish
+    """
+    try:
+        async with Session() as session:
+            user = await session.scalar(select(User).where(User.user_id == user_id))
+            if user:
+                user_dict = _user_to_dict(user)
+                user_cache.set(user_id, user_dict)
+                return dict(user_dict), False
+
+            new_user = User(
+                user_id=user_id,
+                username=username,
+                full_name=full_name,
+                language=language
+            )
+
+            session.add(new_user)
+            await session.commit()
+
+            user_dict = _user_to_dict(new_user)
+            user_cache.set(user_id, user_dict)
+            return dict(user_dict), True
+    except IntegrityError:
+        # Parallel update allaqachon yaratgan bo'lsa
+        return await _fetch_user(user_id), False
+    except SQLAlchemyError as e:
+        print(f"❌ Error getting or creating user: {e}")
+        return None, False
+
+
+@timed
 async def create_user(user_id: int, username: str, full_name: str, language: str = 'uz') -> bool:
     """
     Yangi foydalanuvchi yaratish
     """
     try:
-        session = Session()
+        async with Session() as session:
+            # Foydalanuvchi mavjudligini tekshirish
+            existing_user = await session.scalar(select(User).where(User.user_id == user_id))
+            if existing_user:
+                return True
 
-        # Foydalanuvchi mavjudligini tekshirish
-        existing_user = session.query(User).filter(User.user_id == user_id).first()
-        if existing_user:
-            return True
-
-        new_user = User(
-            user_id=user_id,
-            username=username,
-            full_name=full_name,
-            language=language
-        )
+            new_user = User(
+                user_id=user_id,
+                username=username,
+                full_name=full_name,
+                language=language
+            )
 
-        session.add(new_user)
-        session.commit()
-        return True
+            session.add(new_user)
+            await session.commit()
+            user_cache.invalidate(user_id)
+            return True
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error creating user: {e}")
         return False
-    finally:
-        Session.remove()
 
 
+@timed
 async def update_user_language(user_id: int, language: str) -> bool:
     """
-    Foydalanuvchi tilini yangilash
+    Foydalanuvchi tilini yangilash (til tanlandi deb belgilanadi)
     """
     try:
-        session = Session()
-        user = session.query(User).filter(User.user_id == user_id).first()
-
-        if user:
-            user.language = language
-            session.commit()
-            return True
-        return False
+        async with Session() as session:
+            user = await session.scalar(select(User).where(User.user_id == user_id))
+
+            if user:
+                user.language = language
+                user.language_selected = True
+                await session.commit()
+                user_cache.invalidate(user_id)
+                return True
+            return False
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error updating language: {e}")
         return False
-    finally:
-        Session.remove()
 
 
+@timed
 async def get_admins() -> List[int]:
     """
     Admin foydalanuvchilarni olish
     """
     try:
-        session = Session()
-        admins = session.query(User.user_id).filter(User.is_admin == True).all()
-        return [admin[0] for admin in admins]
+        async with Session() as session:
+            admins = await session.scalars(select(User.user_id).where(User.is_admin == True))
+            return list(admins)
     except SQLAlchemyError as e:
         print(f"❌ Error getting admins: {e}")
         return []
-    finally:
-        Session.remove()
 
 
 # ==================== PRODUCT FUNCTIONS ====================
 
-async def get_products_by_category(category: str, lang: str) -> List[Dict]:
+def _catalog_lang(lang: str) -> str:
     """
-    Kategoriya bo'yicha mahsulotlarni olish
+    Katalog keshi uchun til kaliti (uz yoki ru)
     """
-    try:
-        session = Session()
-        products = session.query(Product).filter(
-            and_(Product.category == category, Product.is_active == True)
-        ).all()
+    return 'uz' if lang == 'uz' else 'ru'
+
+
+def _product_tags(product_ids: List[int]) -> List[Tuple]:
+    """
+    Katalog keshi teglari: mahsulot kartasi va u turgan sahifalar
+    """
+    return [('product', product_id) for product_id in product_ids]
+
+
+def _invalidate_stock(product_ids: List[int]) -> None:
+    """
+    Ombori o'zgargan mahsulotlarni katalog keshidan chiqarish: ularning kartalari, ular turgan
+    sahifalar va ombor statistikasi. Boshqa mahsulotlar va sahifalar keshda qoladi.
+    """
+    catalog_cache.invalidate_tags(_product_tags(product_ids) + [('inventory',)])
+
+
+def _product_to_dict(product: Product, lang: str, ml_variants: List[Dict]) -> Dict:
+    """
+    Product obyektini foydalanuvchi tilidagi lug'atga o'tkazish
+    """
+    return {
+        'id': product.id,
+        'name': product.name_uz if lang == 'uz' else product.name_ru,
+        'description': product.description_uz if lang == 'uz' else product.description_ru,
+        'price': product.price,
+        'category': product.category,
+        'image_url': product.image_url,
+        'stock_quantity': product.stock_quantity,
+        'low_stock_threshold': product.low_stock_threshold,
+        'ml_variants': ml_variants
+    }
+
+
+async def _load_ml_variants(session, product_ids: List[int]) -> Dict[int, List[Dict]]:
+    """
+    Bir nechta mahsulotning faol ML variantlarini bitta so'rovda olish
+    """
+    variants_map = {product_id: [] for product_id in product_ids}
+    if not product_ids:
+        return variants_map
+
+    variants = await session.scalars(
+        select(ProductMLVariant).where(
+            and_(
+                ProductMLVariant.product_id.in_(product_ids),
+                ProductMLVariant.is_active == True
+            )
+        ).order_by(ProductMLVariant.ml_amount)
+    )
+
+    for variant in variants:
+        variants_map[variant.product_id].append({
+            'id': variant.id,
+            'ml_amount': variant.ml_amount,
+            'price': variant.price
+        })
+
+    return variants_map
 
-        result = []
-        for product in products:
-            result.append({
-                'id': product.id,
-                'name': product.name_uz if lang == 'uz' else product.name_ru,
-                'description': product.description_uz if lang == 'uz' else product.description_ru,
-                'price': product.price,
-                'category': product.category,
-                'image_url': product.image_url,
-                'stock_quantity': product.stock_quantity
-            })
 
-        return result
+async def get_products_by_category(category: str, lang: str, page: int = 0,
+                                   limit: int = PRODUCTS_PER_PAGE,
+                                   after_id: Optional[int] = None,
+                                   before_id: Optional[int] = None) -> Tuple[List[Dict], bool]:
+    """
+    Kategoriya bo'yicha mahsulotlarning bitta sahifasini olish (id bo'yicha keyset)
+    after_id: shu id dan keyingi mahsulotlar (keyingi sahifa)
+    before_id: shu id dan oldingi mahsulotlar (oldingi sahifa)
+    Ikkalasi ham berilmasa page * limit OFFSET ishlatiladi
+    Qaytaradi: (mahsulotlar, keyingi sahifa bormi)
+    Sahifalar katalog keshida ikkala til uchun ML variantlari bilan saqlanadi
+    (kategoriya va sahifadagi mahsulotlar teglari bilan)
+    """
+    lang = _catalog_lang(lang)
+    cache_key = ('page', category, page, limit, after_id, before_id)
+    cached = catalog_cache.get(cache_key + (lang,))
+    if cached is not None:
+        items, has_next = cached
+        return items, has_next
+
+    return await _fetch_products_page(category, lang, cache_key, page, limit, after_id, before_id)
+
+
+@timed
+async def _fetch_products_page(category: str, lang: str, cache_key: Tuple, page: int, limit: int,
+                               after_id: Optional[int],
+                               before_id: Optional[int]) -> Tuple[List[Dict], bool]:
+    """
+    Keshda yo'q sahifani database dan o'qish va ikkala til uchun keshga yozish
+    """
+    version = catalog_cache.version
+
+    try:
+        async with Session() as session:
+            query = select(Product).where(
+                and_(Product.category == category, Product.is_active == True)
+            )
+
+            if before_id is not None:
+                query = query.where(Product.id < before_id).order_by(Product.id.desc())
+            else:
+                query = query.order_by(Product.id)
+                if after_id is not None:
+                    query = query.where(Product.id > after_id)
+                else:
+                    query = query.offset(page * limit)
+
+            # Keyingi sahifa borligini bilish uchun bitta ortiqcha qator olinadi
+            products = (await session.scalars(query.limit(limit + 1))).all()
+            has_more = len(products) > limit
+            products = products[:limit]
+
+            if before_id is not None:
+                products.reverse()
+                has_next = True
+            else:
+                has_next = has_more
+
+            variants_map = await _load_ml_variants(session, [product.id for product in products])
+
+            page_tags = [('category', category)] + _product_tags([product.id for product in products])
+
+            result = []
+            for snapshot_lang in ('uz', 'ru'):
+                items = [
+                    _product_to_dict(product, snapshot_lang, variants_map[product.id])
+                    for product in products
+                ]
+                catalog_cache.set(cache_key + (snapshot_lang,), (items, has_next), version, page_tags)
+                for item in items:
+                    catalog_cache.set(('product', item['id'], snapshot_lang), item, version,
+                                      _product_tags([item['id']]))
+
+                if snapshot_lang == lang:
+                    result = items
+
+            return result, has_next
     except SQLAlchemyError as e:
         print(f"❌ Error getting products: {e}")
-        return []
-    finally:
-        Session.remove()
+        return [], False
 
 
 async def get_product_by_id(product_id: int, lang: str) -> Optional[Dict]:
     """
-    ID bo'yicha mahsulotni olish
+    ID bo'yicha mahsulotni olish (katalog keshi orqali)
     """
-    try:
-        session = Session()
-        product = session.query(Product).filter(Product.id == product_id).first()
+    lang = _catalog_lang(lang)
+    cached = catalog_cache.get(('product', product_id, lang))
+    if cached is not None:
+        return cached
 
-        if product:
-            # ML variantlarni olish
-            ml_variants = session.query(ProductMLVariant).filter(
-                and_(
-                    ProductMLVariant.product_id == product_id,
-                    ProductMLVariant.is_active == True
-                )
-            ).order_by(ProductMLVariant.ml_amount).all()
+    return await _fetch_product(product_id, lang)
 
-            variants_list = []
-            for variant in ml_variants:
-                variants_list.append({
-                    'id': variant.id,
-                    'ml_amount': variant.ml_amount,
-                    'price': variant.price
-                })
 
-            return {
-                'id': product.id,
-                'name': product.name_uz if lang == 'uz' else product.name_ru,
-                'description': product.description_uz if lang == 'uz' else product.description_ru,
-                'price': product.price,
-                'category': product.category,
-                'image_url': product.image_url,
-                'stock_quantity': product.stock_quantity,
-                'ml_variants': variants_list
-            }
-        return None
+@timed
+async def _fetch_product(product_id: int, lang: str) -> Optional[Dict]:
+    """
+    Keshda yo'q mahsulotni database dan o'qish
+    """
+    version = catalog_cache.version
+
+    try:
+        async with Session() as session:
+            product = await session.scalar(select(Product).where(Product.id == product_id))
+
+            if product:
+                # ML variantlarni olish
+                variants_map = await _load_ml_variants(session, [product_id])
+
+                result = _product_to_dict(product, lang, variants_map[product_id])
+                catalog_cache.set(('product', product_id, lang), result, version,
+                                  _product_tags([product_id]))
+                return result
+            return None
     except SQLAlchemyError as e:
         print(f"❌ Error getting product: {e}")
         return None
-    finally:
-        Session.remove()
 
 
+@timed
 async def get_all_products() -> List[Dict]:
     """
     Barcha mahsulotlarni olish (admin uchun)
     """
     try:
-        session = Session()
-        products = session.query(Product).filter(Product.is_active == True).all()
-
-        result = []
-        for product in products:
-            result.append({
-                'id': product.id,
-                'name_uz': product.name_uz,
-                'name_ru': product.name_ru,
-                'price': product.price,
-                'category': product.category,
-                'image_url': product.image_url,
-                'stock_quantity': product.stock_quantity,
-                'low_stock_threshold': product.low_stock_threshold
-            })
+        async with Session() as session:
+            products = await session.scalars(select(Product).where(Product.is_active == True))
+
+            result = []
+            for product in products:
+                result.append({
+                    'id': product.id,
+                    'name_uz': product.name_uz,
+                    'name_ru': product.name_ru,
+                    'price': product.price,
+                    'category': product.category,
+                    'image_url': product.image_url,
+                    'stock_quantity': product.stock_quantity,
+                    'low_stock_threshold': product.low_stock_threshold
+                })
 
-        return result
+            return result
     except SQLAlchemyError as e:
         print(f"❌ Error getting all products: {e}")
         return []
-    finally:
-        Session.remove()
 
 
+@timed
 async def create_product(name_uz: str, name_ru: str, description_uz: str,
                          description_ru: str, price: float, category: str,
                          image_url: str, stock_quantity: int = 0,
@@ -233,693 +465,1324 @@ async def create_product(name_uz: str, name_ru: str, description_uz: str,
     Yangi mahsulot yaratish
     """
     try:
-        session = Session()
-
-        new_product = Product(
-            name_uz=name_uz,
-            name_ru=name_ru,
-            description_uz=description_uz,
-            description_ru=description_ru,
-            price=price,
-            category=category,
-            image_url=image_url,
-            stock_quantity=stock_quantity,
-            low_stock_threshold=low_stock_threshold
-        )
+        async with Session() as session:
+            new_product = Product(
+                name_uz=name_uz,
+                name_ru=name_ru,
+                description_uz=description_uz,
+                description_ru=description_ru,
+                price=price,
+                category=category,
+                image_url=image_url,
+                stock_quantity=stock_quantity,
+                low_stock_threshold=low_stock_threshold
+            )
 
-        session.add(new_product)
-        session.commit()
-        session.refresh(new_product)
+            session.add(new_product)
+            await session.commit()
+            # Yangi mahsulot faqat o'z kategoriyasi sahifalarini o'zgartiradi
+            catalog_cache.invalidate_tags([('category', category), ('inventory',)])
+            await session.refresh(new_product)
 
-        return {
-            'id': new_product.id,
-            'name_uz': new_product.name_uz,
-            'name_ru': new_product.name_ru,
-            'price': new_product.price,
-            'stock_quantity': new_product.stock_quantity
-        }
+            return {
+                'id': new_product.id,
+                'name_uz': new_product.name_uz,
+                'name_ru': new_product.name_ru,
+                'price': new_product.price,
+                'stock_quantity': new_product.stock_quantity
+            }
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error creating product: {e}")
         return None
-    finally:
-        Session.remove()
 
 
+@timed
 async def delete_product(product_id: int) -> bool:
     """
     Mahsulotni o'chirish (soft delete)
     """
     try:
-        session = Session()
-        product = session.query(Product).filter(Product.id == product_id).first()
-
-        if product:
-            product.is_active = False
-            session.commit()
-            return True
-        return False
+        async with Session() as session:
+            product = await session.scalar(select(Product).where(Product.id == product_id))
+
+            if product:
+                product.is_active = False
+                await session.commit()
+                catalog_cache.invalidate_tags([('category', product.category)])
+                _invalidate_stock([product_id])
+                return True
+            return False
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error deleting product: {e}")
         return False
-    finally:
-        Session.remove()
 
 
 # ==================== INVENTORY MANAGEMENT FUNCTIONS ====================
 
+@timed
 async def update_product_stock(product_id: int, new_stock: int) -> bool:
     """
     Mahsulot miqdorini yangilash (admin tomonidan qo'lda)
     """
     try:
-        session = Session()
-        product = session.query(Product).filter(Product.id == product_id).first()
-
-        if product:
-            product.stock_quantity = new_stock
-            session.commit()
-            return True
-        return False
+        async with Session() as session:
+            product = await session.scalar(select(Product).where(Product.id == product_id))
+
+            if product:
+                product.stock_quantity = new_stock
+                await session.commit()
+                _invalidate_stock([product_id])
+                return True
+            return False
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error updating stock: {e}")
         return False
-    finally:
-        Session.remove()
 
 
-async def reduce_product_stock(product_id: int, quantity: int) -> bool:
+@timed
+async def get_stock_report(lang: str = 'uz') -> Dict[str, List[Dict]]:
     """
-    Mahsulot miqdorini kamaytirish (buyurtma berilganda)
+    Kam qolgan va tugagan mahsulotlar - bitta so'rovda
+    Shart ix_products_low_stock qisman (partial) indeksi sharti bilan bir xil,
+    shuning uchun butun products jadvali skan qilinmaydi
+    Qaytaradi: {'low_stock': [...], 'out_of_stock': [...]}
     """
+    report = {'low_stock': [], 'out_of_stock': []}
+
     try:
-        session = Session()
-        product = session.query(Product).filter(Product.id == product_id).first()
+        async with read_session() as session:
+            rows = await session.execute(
+                select(
+                    Product.id,
+                    Product.name_uz,
+                    Product.name_ru,
+                    Product.stock_quantity,
+                    Product.low_stock_threshold
+                ).where(
+                    Product.is_active == True,
+                    Product.stock_quantity <= Product.low_stock_threshold
+                ).order_by(Product.stock_quantity, Product.id)
+            )
 
-        if product and product.stock_quantity >= quantity:
-            product.stock_quantity -= quantity
-            session.commit()
-            return True
-        return False
+            for row in rows:
+                bucket = 'out_of_stock' if row.stock_quantity <= 0 else 'low_stock'
+                report[bucket].append({
+                    'id': row.id,
+                    'name': row.name_uz if lang == 'uz' else row.name_ru,
+                    'stock_quantity': row.stock_quantity,
+                    'low_stock_threshold': row.low_stock_threshold
+                })
+
+            return report
     except SQLAlchemyError as e:
-        session.rollback()
-        print(f"❌ Error reducing stock: {e}")
-        return False
-    finally:
-        Session.remove()
+        print(f"❌ Error getting stock report: {e}")
+        return report
 
 
 async def get_low_stock_products(lang: str = 'uz') -> List[Dict]:
     """
     Kam qolgan mahsulotlarni olish
     """
-    try:
-        session = Session()
-        products = session.query(Product).filter(
-            and_(
-                Product.is_active == True,
-                Product.stock_quantity <= Product.low_stock_threshold,
-                Product.stock_quantity > 0
-            )
-        ).all()
+    return (await get_stock_report(lang))['low_stock']
+
+
+async def get_out_of_stock_products(lang: str = 'uz') -> List[Dict]:
+    """
+    Tugagan mahsulotlarni olish
+    """
+    return (await get_stock_report(lang))['out_of_stock']
 
-        result = []
-        for product in products:
-            result.append({
-                'id': product.id,
-                'name': product.name_uz if lang == 'uz' else product.name_ru,
-                'stock_quantity': product.stock_quantity,
-                'low_stock_threshold': product.low_stock_threshold
-            })
 
-        return result
+async def get_inventory_summary() -> Dict:
+    """
+    Ombor holati bo'yicha qisqa statistika (katalog keshida 'inventory' tegi bilan saqlanadi,
+    ombor o'zgarganda bekor qilinadi)
+    """
+    key = ('inventory_summary',)
+    cached = catalog_cache.get(key)
+    if cached is not None:
+        return cached
+
+    return await _fetch_inventory_summary(key)
+
+
+@timed
+async def _fetch_inventory_summary(key: Tuple) -> Dict:
+    """
+    Keshda yo'q ombor statistikasini database dan hisoblash
+    """
+    version = catalog_cache.version
+    is_out = Product.stock_quantity <= 0
+    is_low = and_(Product.stock_quantity > 0, Product.stock_quantity <= Product.low_stock_threshold)
+
+    try:
+        async with Session() as session:
+            row = (await session.execute(
+                select(
+                    func.count(Product.id),
+                    func.coalesce(func.sum(case((is_low, 1), else_=0)), 0),
+                    func.coalesce(func.sum(case((is_out, 1), else_=0)), 0),
+                    func.coalesce(func.sum(Product.stock_quantity), 0)
+                ).where(Product.is_active == True)
+            )).one()
+
+            summary = {
+                'total_products': row[0],
+                'low_stock': row[1],
+                'out_of_stock': row[2],
+                'in_stock': row[0] - row[1] - row[2],
+                'total_units': row[3]
+            }
+
+            catalog_cache.set(key, summary, version, [('inventory',)])
+            return summary
     except SQLAlchemyError as e:
-        print(f"❌ Error getting low stock products: {e}")
-        return []
-    finally:
-        Session.remove()
+        print(f"❌ Error getting inventory summary: {e}")
+        return {
+            'total_products': 0,
+            'low_stock': 0,
+            'out_of_stock': 0,
+            'in_stock': 0,
+            'total_units': 0
+        }
 
 
-async def get_out_of_stock_products(lang: str = 'uz') -> List[Dict]:
+@timed
+async def get_stock_levels(product_ids: List[int], lang: str = 'uz') -> List[Dict]:
     """
-    Tugagan mahsulotlarni olish
+    Berilgan mahsulotlarning ombor holati (bitta so'rovda)
+    Kam qolgan mahsulotlar monitori faqat o'zgargan mahsulotlarni so'raydi
     """
+    if not product_ids:
+        return []
+
     try:
-        session = Session()
-        products = session.query(Product).filter(
-            and_(
-                Product.is_active == True,
-                Product.stock_quantity == 0
+        async with Session() as session:
+            rows = await session.execute(
+                select(
+                    Product.id,
+                    Product.name_uz,
+                    Product.name_ru,
+                    Product.stock_quantity,
+                    Product.low_stock_threshold,
+                    Product.is_active
+                ).where(Product.id.in_(set(product_ids)))
             )
-        ).all()
-
-        result = []
-        for product in products:
-            result.append({
-                'id': product.id,
-                'name': product.name_uz if lang == 'uz' else product.name_ru,
-                'stock_quantity': product.stock_quantity
-            })
 
-        return result
+            return [{
+                'id': row.id,
+                'name': row.name_uz if lang == 'uz' else row.name_ru,
+                'stock_quantity': row.stock_quantity,
+                'low_stock_threshold': row.low_stock_threshold,
+                'is_active': row.is_active
+            } for row in rows]
     except SQLAlchemyError as e:
-        print(f"❌ Error getting out of stock products: {e}")
+        print(f"❌ Error getting stock levels: {e}")
         return []
-    finally:
-        Session.remove()
 
 
 # ==================== ML VARIANT FUNCTIONS ====================
 
+@timed
 async def add_ml_variant(product_id: int, ml_amount: int, price: float) -> Optional[Dict]:
     """
     Mahsulotga ML variant qo'shish
     """
     try:
-        session = Session()
-
-        # Mahsulot mavjudligini tekshirish
-        product = session.query(Product).filter(Product.id == product_id).first()
-        if not product:
-            return None
-
-        # Variant mavjudligini tekshirish
-        existing = session.query(ProductMLVariant).filter(
-            and_(
-                ProductMLVariant.product_id == product_id,
-                ProductMLVariant.ml_amount == ml_amount
+        async with Session() as session:
+            # Mahsulot mavjudligini tekshirish
+            product = await session.scalar(select(Product).where(Product.id == product_id))
+            if not product:
+                return None
+
+            # Variant mavjudligini tekshirish
+            existing = await session.scalar(
+                select(ProductMLVariant).where(
+                    and_(
+                        ProductMLVariant.product_id == product_id,
+                        ProductMLVariant.ml_amount == ml_amount
+                    )
+                )
             )
-        ).first()
 
-        if existing:
-            return None  # Allaqachon mavjud
+            if existing:
+                return None  # Allaqachon mavjud
 
-        new_variant = ProductMLVariant(
-            product_id=product_id,
-            ml_amount=ml_amount,
-            price=price
-        )
+            new_variant = ProductMLVariant(
+                product_id=product_id,
+                ml_amount=ml_amount,
+                price=price
+            )
 
-        session.add(new_variant)
-        session.commit()
-        session.refresh(new_variant)
+            session.add(new_variant)
+            await session.commit()
+            catalog_cache.invalidate_tags(_product_tags([product_id]))
+            await session.refresh(new_variant)
 
-        return {
-            'id': new_variant.id,
-            'product_id': new_variant.product_id,
-            'ml_amount': new_variant.ml_amount,
-            'price': new_variant.price
-        }
+            return {
+                'id': new_variant.id,
+                'product_id': new_variant.product_id,
+                'ml_amount': new_variant.ml_amount,
+                'price': new_variant.price
+            }
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error adding ML variant: {e}")
         return None
-    finally:
-        Session.remove()
 
 
+@timed
 async def get_ml_variants(product_id: int) -> List[Dict]:
     """
     Mahsulotning ML variantlarini olish
     """
     try:
-        session = Session()
-        variants = session.query(ProductMLVariant).filter(
-            and_(
-                ProductMLVariant.product_id == product_id,
-                ProductMLVariant.is_active == True
+        async with Session() as session:
+            variants = await session.scalars(
+                select(ProductMLVariant).where(
+                    and_(
+                        ProductMLVariant.product_id == product_id,
+                        ProductMLVariant.is_active == True
+                    )
+                ).order_by(ProductMLVariant.ml_amount)
             )
-        ).order_by(ProductMLVariant.ml_amount).all()
 
-        result = []
-        for variant in variants:
-            result.append({
-                'id': variant.id,
-                'product_id': variant.product_id,
-                'ml_amount': variant.ml_amount,
-                'price': variant.price
-            })
+            result = []
+            for variant in variants:
+                result.append({
+                    'id': variant.id,
+                    'product_id': variant.product_id,
+                    'ml_amount': variant.ml_amount,
+                    'price': variant.price
+                })
 
-        return result
+            return result
     except SQLAlchemyError as e:
         print(f"❌ Error getting ML variants: {e}")
         return []
-    finally:
-        Session.remove()
 
 
+@timed
 async def delete_ml_variant(variant_id: int) -> bool:
     """
     ML variantni o'chirish (soft delete)
     """
     try:
-        session = Session()
-        variant = session.query(ProductMLVariant).filter(ProductMLVariant.id == variant_id).first()
+        async with Session() as session:
+            variant = await session.scalar(
+                select(ProductMLVariant).where(ProductMLVariant.id == variant_id)
+            )
 
-        if variant:
-            variant.is_active = False
-            session.commit()
-            return True
-        return False
+            if variant:
+                variant.is_active = False
+                await session.commit()
+                catalog_cache.invalidate_tags(_product_tags([variant.product_id]))
+                return True
+            return False
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error deleting ML variant: {e}")
         return False
-    finally:
-        Session.remove()
 
 
 # ==================== CART FUNCTIONS ====================
 
+@timed
 async def add_to_cart(user_id: int, product_id: int, quantity: int = 1) -> bool:
     """
     Savatga mahsulot qo'shish
     """
     try:
-        session = Session()
-
-        # Savatda mavjudligini tekshirish
-        cart_item = session.query(Cart).filter(
-            and_(Cart.user_id == user_id, Cart.product_id == product_id)
-        ).first()
-
-        if cart_item:
-            # Agar mavjud bo'lsa, miqdorni oshirish
-            cart_item.quantity += quantity
-        else:
-            # Yangi qo'shish
-            new_cart_item = Cart(
-                user_id=user_id,
-                product_id=product_id,
-                quantity=quantity
+        async with Session() as session:
+            # Savatda mavjudligini tekshirish
+            cart_item = await session.scalar(
+                select(Cart).where(and_(Cart.user_id == user_id, Cart.product_id == product_id))
             )
-            session.add(new_cart_item)
 
-        session.commit()
-        return True
+            if cart_item:
+                # Agar mavjud bo'lsa, miqdorni oshirish
+                cart_item.quantity += quantity
+            else:
+                # Yangi qo'shish
+                new_cart_item = Cart(
+                    user_id=user_id,
+                    product_id=product_id,
+                    quantity=quantity
+                )
+                session.add(new_cart_item)
+
+            await session.commit()
+            return True
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error adding to cart: {e}")
         return False
-    finally:
-        Session.remove()
 
 
-async def get_cart_items(user_id: int, lang: str) -> List[Dict]:
+@timed
+async def get_cart_summary(user_id: int, lang: str, page: int = 0,
+                           per_page: Optional[int] = None) -> Dict:
     """
-    Foydalanuvchi savatidagi mahsulotlarni olish
+    Savat xulosasi bitta so'rovda: qator summalari (subtotal), mahsulotlar soni va jami summa
+    Hisob SQL da: count/sum window funksiyalari LIMIT dan oldin hisoblanadi, shuning uchun
+    per_page berilsa faqat shu sahifa qatorlari o'qiladi, jami esa butun savat bo'yicha.
+    Sahifa savatdan tashqarida bo'lsa (oxirgi mahsulot o'chirilgan) oxirgi sahifa qaytariladi.
+    Qaytaradi: {'items': [...], 'count': int, 'total': float, 'page': int}
     """
-    try:
-        session = Session()
-        cart_items = session.query(Cart, Product).join(Product).filter(
-            Cart.user_id == user_id
-        ).all()
+    subtotal = (Product.price * Cart.quantity).label('subtotal')
+    query = (
+        select(
+            Cart.id,
+            Cart.product_id,
+            Cart.quantity,
+            (Product.name_uz if lang == 'uz' else Product.name_ru).label('name'),
+            Product.price,
+            Product.image_url,
+            subtotal,
+            func.count().over().label('items_count'),
+            func.sum(subtotal).over().label('items_total')
+        )
+        .join(Product, Product.id == Cart.product_id)
+        .where(Cart.user_id == user_id)
+        .order_by(Cart.id)
+    )
 
-        result = []
-        for cart, product in cart_items:
-            result.append({
-                'cart_id': cart.id,
-                'product_id': product.id,
-                'name': product.name_uz if lang == 'uz' else product.name_ru,
-                'price': product.price,
-                'quantity': cart.quantity,
-                'image_url': product.image_url
-            })
+    try:
+        async with Session() as session:
+            if per_page:
+                page = max(page, 0)
+                rows = (await session.execute(query.limit(per_page).offset(page * per_page))).all()
+
+                if not rows and page > 0:
+                    count = await session.scalar(select(func.count()).where(Cart.user_id == user_id))
+                    page = max(0, (count - 1) // per_page)
+                    rows = (await session.execute(query.limit(per_page).offset(page * per_page))).all()
+            else:
+                page = 0
+                rows = (await session.execute(query)).all()
 
-        return result
+            return {
+                'items': [
+                    {
+                        'cart_id': row.id,
+                        'product_id': row.product_id,
+                        'name': row.name,
+                        'price': row.price,
+                        'quantity': row.quantity,
+                        'image_url': row.image_url,
+                        'subtotal': row.subtotal
+                    }
+                    for row in rows
+                ],
+                'count': rows[0].items_count if rows else 0,
+                'total': rows[0].items_total if rows else 0,
+                'page': page
+            }
     except SQLAlchemyError as e:
-        print(f"❌ Error getting cart items: {e}")
-        return []
-    finally:
-        Session.remove()
+        print(f"❌ Error getting cart summary: {e}")
+        return {'items': [], 'count': 0, 'total': 0, 'page': 0}
+
 
+def _cart_item_columns(lang: str) -> List:
+    """
+    Savat qatori + mahsulot maydonlari (RETURNING uchun)
+    Mahsulot maydonlari PK bo'yicha skalyar subquery - SQLite RETURNING boshqa jadvalga
+    JOIN qila olmaydi, shuning uchun UPDATE ... FROM o'rniga shu usul ishlatiladi
+    """
+    product = aliased(Product, name='cart_product')
+
+    def product_field(column):
+        return select(column).where(product.id == Cart.product_id).scalar_subquery()
 
-async def get_cart_item_by_id(cart_item_id: int, user_id: int, lang: str) -> Optional[Dict]:
+    return [
+        Cart.id,
+        Cart.product_id,
+        Cart.quantity,
+        product_field(product.name_uz if lang == 'uz' else product.name_ru).label('name'),
+        product_field(product.price).label('price'),
+        product_field(product.image_url).label('image_url')
+    ]
+
+
+@timed
+async def change_cart_quantity(cart_item_id: int, user_id: int, change: int, lang: str) -> Optional[Dict]:
     """
-    ID bo'yicha savat mahsulotini olish
+    Savat mahsuloti miqdorini o'zgartirish va yangilangan qatorni qaytarish
+    change: +1 (oshirish) yoki -1 (kamaytirish)
+
+    Oddiy holatda bitta UPDATE ... RETURNING bajariladi (o'qish so'rovlarisiz).
+    Miqdor 0 ga tushsa qator shu tranzaksiyada DELETE ... RETURNING bilan o'chiriladi.
+    Qaytaradi: savat qatori (cart_id, product_id, name, price, quantity, image_url),
+    o'chirilganda quantity=0, mahsulot savatda bo'lmasa None
     """
+    columns = _cart_item_columns(lang)
+    item_filter = and_(Cart.id == cart_item_id, Cart.user_id == user_id)
+
     try:
-        session = Session()
-        cart_item = session.query(Cart, Product).join(Product).filter(
-            and_(Cart.id == cart_item_id, Cart.user_id == user_id)
-        ).first()
+        async with Session() as session:
+            row = (await session.execute(
+                update(Cart)
+                .where(item_filter, Cart.quantity + change > 0)
+                .values(quantity=Cart.quantity + change)
+                .returning(*columns)
+            )).first()
+
+            removed = False
+            if row is None and change < 0:
+                # Miqdor 0 yoki undan kam bo'ladi - o'chirish
+                row = (await session.execute(
+                    delete(Cart).where(item_filter).returning(*columns)
+                )).first()
+                removed = True
+
+            await session.commit()
+
+            if row is None:
+                return None
 
-        if cart_item:
-            cart, product = cart_item
             return {
-                'cart_id': cart.id,
-                'product_id': product.id,
-                'name': product.name_uz if lang == 'uz' else product.name_ru,
-                'price': product.price,
-                'quantity': cart.quantity,
-                'image_url': product.image_url
+                'cart_id': row.id,
+                'product_id': row.product_id,
+                'name': row.name,
+                'price': row.price,
+                'quantity': 0 if removed else row.quantity,
+                'image_url': row.image_url
             }
-        return None
     except SQLAlchemyError as e:
-        print(f"❌ Error getting cart item: {e}")
+        print(f"❌ Error updating cart quantity: {e}")
         return None
-    finally:
-        Session.remove()
 
 
-async def update_cart_quantity(cart_item_id: int, user_id: int, change: int) -> bool:
+@timed
+async def remove_from_cart(cart_item_id: int, user_id: int) -> bool:
     """
-    Savat mahsuloti miqdorini o'zgartirish
-    change: +1 (oshirish) yoki -1 (kamaytirish)
+    Savatdan mahsulotni o'chirish
     """
     try:
-        session = Session()
-        cart_item = session.query(Cart).filter(
-            and_(Cart.id == cart_item_id, Cart.user_id == user_id)
-        ).first()
+        async with Session() as session:
+            cart_item = await session.scalar(
+                select(Cart).where(and_(Cart.id == cart_item_id, Cart.user_id == user_id))
+            )
 
-        if cart_item:
-            cart_item.quantity += change
+            if cart_item:
+                await session.delete(cart_item)
+                await session.commit()
+                return True
+            return False
+    except SQLAlchemyError as e:
+        print(f"❌ Error removing from cart: {e}")
+        return False
 
-            # Agar miqdor 0 ga teng yoki kichik bo'lsa, o'chirish
-            if cart_item.quantity <= 0:
-                session.delete(cart_item)
 
-            session.commit()
+@timed
+async def clear_cart(user_id: int) -> bool:
+    """
+    Savatni tozalash
+    """
+    try:
+        async with Session() as session:
+            await session.execute(delete(Cart).where(Cart.user_id == user_id))
+            await session.commit()
             return True
-        return False
     except SQLAlchemyError as e:
-        session.rollback()
-        print(f"❌ Error updating cart quantity: {e}")
+        print(f"❌ Error clearing cart: {e}")
         return False
-    finally:
-        Session.remove()
 
 
-async def remove_from_cart(cart_item_id: int, user_id: int) -> bool:
+# ==================== OUTBOX FUNCTIONS ====================
+
+def _add_outbox_event(session, event_type: str, payload: Dict) -> None:
     """
-    Savatdan mahsulotni o'chirish
+    Outbox hodisasini chaqiruvchi tranzaksiyasiga qo'shish
+    """
+    session.add(Outbox(
+        event_type=event_type,
+        payload=json.dumps(payload, ensure_ascii=False),
+        created_at=datetime.utcnow(),
+        available_at=datetime.utcnow()
+    ))
+
+
+@timed
+async def claim_outbox_events(limit: int = 50, lease: float = 300) -> List[Dict]:
+    """
+    Yuborish vaqti kelgan outbox hodisalarini band qilib olish (eskilari birinchi)
+    Hodisalar bitta UPDATE da 'sending' qilinadi va available_at lease soniya oldinga suriladi:
+    bir nechta jarayon bir hodisani ikki marta olmaydi. Worker to'xtab qolsa, lease tugagach
+    hodisani boshqa worker oladi.
     """
+    now = datetime.utcnow()
+    claimable = and_(Outbox.status.in_(['pending', 'sending']), Outbox.available_at <= now)
+    claimed = {'status': 'sending', 'available_at': now + timedelta(seconds=lease)}
+
     try:
-        session = Session()
-        cart_item = session.query(Cart).filter(
-            and_(Cart.id == cart_item_id, Cart.user_id == user_id)
-        ).first()
+        async with Session() as session:
+            candidates = select(Outbox.id).where(claimable).order_by(Outbox.available_at, Outbox.id).limit(limit)
+            dialect = engine.dialect.name
+
+            if dialect in ('sqlite', 'postgresql'):
+                if dialect == 'postgresql':
+                    # Boshqa jarayon band qilayotgan qatorlar kutilmaydi, o'tkazib yuboriladi
+                    candidates = candidates.with_for_update(skip_locked=True)
+
+                # claimable sharti qayta tekshiriladi - oradagi band qilingan qator olinmaydi
+                rows = (await session.execute(
+                    update(Outbox)
+                    .where(Outbox.id.in_(candidates.scalar_subquery()), claimable)
+                    .values(**claimed)
+                    .returning(Outbox.id, Outbox.event_type, Outbox.payload, Outbox.attempts,
+                               Outbox.delivered_to)
+                )).all()
+            else:
+                # Boshqa database lar uchun: har bir qator shartli UPDATE bilan band qilinadi
+                rows = []
+                for event in (await session.execute(
+                    select(Outbox.id, Outbox.event_type, Outbox.payload, Outbox.attempts,
+                           Outbox.delivered_to)
+                    .where(Outbox.id.in_(candidates.scalar_subquery()))
+                )).all():
+                    result = await session.execute(
+                        update(Outbox).where(Outbox.id == event.id, claimable).values(**claimed)
+                    )
+                    if result.rowcount:
+                        rows.append(event)
+
+            await session.commit()
+
+            return [{
+                'id': row.id,
+                'event_type': row.event_type,
+                'payload': json.loads(row.payload),
+                'attempts': row.attempts,
+                'delivered_to': json.loads(row.delivered_to) if row.delivered_to else []
+            } for row in sorted(rows, key=lambda row: row.id)]
+    except SQLAlchemyError as e:
+        print(f"❌ Error claiming outbox events: {e}")
+        return []
+
 
-        if cart_item:
-            session.delete(cart_item)
-            session.commit()
+@timed
+async def delete_outbox_event(event_id: int) -> bool:
+    """
+    Yuborilgan hodisani outbox dan o'chirish
+    """
+    try:
+        async with Session() as session:
+            await session.execute(delete(Outbox).where(Outbox.id == event_id))
+            await session.commit()
             return True
+    except SQLAlchemyError as e:
+        print(f"❌ Error deleting outbox event: {e}")
         return False
+
+
+@timed
+async def retry_outbox_event(event_id: int, delay: float, max_attempts: int,
+                             delivered_to: Optional[List[int]] = None) -> bool:
+    """
+    Yuborilmagan hodisani keyinroq qayta urinish uchun qoldirish
+    delivered_to - xabar yetkazilgan chat_id lar (keyingi urinishda faqat qolganlarga yuboriladi)
+    max_attempts ga yetganda status 'failed' qilinadi
+    """
+    try:
+        async with Session() as session:
+            event = await session.scalar(select(Outbox).where(Outbox.id == event_id))
+
+            if event:
+                event.attempts += 1
+                if delivered_to is not None:
+                    event.delivered_to = json.dumps(sorted(delivered_to))
+                event.available_at = datetime.utcnow() + timedelta(seconds=delay)
+                event.status = 'failed' if event.attempts >= max_attempts else 'pending'
+                await session.commit()
+                return True
+            return False
     except SQLAlchemyError as e:
-        session.rollback()
-        print(f"❌ Error removing from cart: {e}")
+        print(f"❌ Error rescheduling outbox event: {e}")
         return False
-    finally:
-        Session.remove()
 
 
-async def clear_cart(user_id: int) -> bool:
+# ==================== FSM STORAGE FUNCTIONS ====================
+
+@timed
+async def get_fsm_record(key: str) -> Optional[Dict]:
     """
-    Savatni tozalash
+    FSM holati va ma'lumotlarini (JSON matn) olish (muddati o'tgan bo'lsa None)
     """
     try:
-        session = Session()
-        session.query(Cart).filter(Cart.user_id == user_id).delete()
-        session.commit()
+        async with Session() as session:
+            record = await session.scalar(
+                select(FSMState).where(
+                    FSMState.key == key,
+                    FSMState.expires_at > datetime.utcnow()
+                )
+            )
+
+            if record:
+                return {
+                    'state': record.state,
+                    'data': record.data
+                }
+            return None
+    except SQLAlchemyError as e:
+        print(f"❌ Error getting FSM record: {e}")
+        return None
+
+
+@timed
+async def save_fsm_records(records: Dict[str, Dict], ttl: float) -> bool:
+    """
+    Bir nechta FSM yozuvini bitta tranzaksiyada saqlash
+    Holati ham, ma'lumoti ham bo'sh yozuvlar o'chiriladi
+    records: {key: {'state': ..., 'data': JSON matn}}
+    """
+    if not records:
         return True
+
+    expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+    empty = [key for key, record in records.items() if record['state'] is None and record['data'] == '{}']
+    rows = [{
+        'key': key,
+        'state': record['state'],
+        'data': record['data'],
+        'expires_at': expires_at
+    } for key, record in records.items() if key not in empty]
+
+    try:
+        async with Session() as session:
+            if empty:
+                await session.execute(delete(FSMState).where(FSMState.key.in_(empty)))
+
+            if rows:
+                dialect = engine.dialect.name
+                if dialect in ('sqlite', 'postgresql'):
+                    insert_fn = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+                    stmt = insert_fn(FSMState)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[FSMState.key],
+                        set_={
+                            'state': stmt.excluded.state,
+                            'data': stmt.excluded.data,
+                            'expires_at': stmt.excluded.expires_at
+                        }
+                    )
+                    await session.execute(stmt, rows)
+                else:
+                    for row in rows:
+                        await session.merge(FSMState(**row))
+
+            await session.commit()
+            return True
     except SQLAlchemyError as e:
-        session.rollback()
-        print(f"❌ Error clearing cart: {e}")
+        print(f"❌ Error saving FSM records: {e}")
         return False
-    finally:
-        Session.remove()
-
 
-# ==================== ORDER FUNCTIONS ====================
 
-async def create_order(user_id: int, phone: str, address: str,
-                       payment_type: str, cart_items: List[Dict],
-                       total: float) -> Optional[Dict]:
+@timed
+async def delete_expired_fsm_records() -> int:
     """
-    Buyurtma yaratish
+    Muddati o'tgan (tashlab ketilgan) FSM holatlarini o'chirish
     """
     try:
-        session = Session()
+        async with Session() as session:
+            result = await session.execute(
+                delete(FSMState).where(FSMState.expires_at <= datetime.utcnow())
+            )
+            await session.commit()
+            return result.rowcount
+    except SQLAlchemyError as e:
+        print(f"❌ Error deleting expired FSM records: {e}")
+        return 0
 
-        # To'lov qilinganligi (Click/Payme uchun keyinchalik TRUE qilinadi)
-        is_paid = False
-        if payment_type in ['click', 'payme']:
-            # Bu yerda to'lov integratsiyasi bo'lishi kerak
-            # Hozircha FALSE qoldiramiz
-            pass
 
-        # Buyurtma yaratish
-        new_order = Order(
-            user_id=user_id,
-            phone=phone,
-            address=address,
-            payment_type=payment_type,
-            total=total,
-            is_paid=is_paid
+# ==================== DAILY SALES ROLLUP ====================
+
+async def _add_daily_sales(session, day: date, status: str, operator_id: Optional[int],
+                           operator_username: Optional[str], orders: int, revenue: float) -> None:
+    """
+    daily_sales yig'indisiga o'zgarishni qo'shish (upsert)
+    orders / revenue manfiy bo'lishi mumkin (buyurtma boshqa qatorga o'tganda)
+    Chaqiruvchi tranzaksiyasi ichida ishlaydi, commit qilmaydi
+    """
+    values = {
+        'day': day,
+        'status': status,
+        'operator_id': operator_id or 0,
+        'operator_username': operator_username,
+        'orders_count': orders,
+        'revenue': revenue
+    }
+    dialect = engine.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        insert_fn = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert_fn(DailySales).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailySales.day, DailySales.status, DailySales.operator_id],
+            set_={
+                'orders_count': DailySales.orders_count + stmt.excluded.orders_count,
+                'revenue': DailySales.revenue + stmt.excluded.revenue,
+                'operator_username': func.coalesce(stmt.excluded.operator_username,
+                                                   DailySales.operator_username)
+            }
         )
+        await session.execute(stmt)
+        return
+
+    # Boshqa database lar uchun oddiy o'qib-yozish
+    row = await session.get(DailySales, (day, status, operator_id or 0), with_for_update=True)
+    if row:
+        row.orders_count += orders
+        row.revenue += revenue
+        if operator_username:
+            row.operator_username = operator_username
+    else:
+        session.add(DailySales(**values))
+
+
+async def _move_daily_sales(session, order: Order, status: str, operator_id: Optional[int],
+                            operator_username: Optional[str]) -> None:
+    """
+    Buyurtmani daily_sales dagi eski (status, operator) qatoridan yangisiga o'tkazish
+    """
+    day = order.created_at.date()
+    await _add_daily_sales(session, day, order.status, order.operator_id,
+                           order.operator_username, -1, -order.total)
+    await _add_daily_sales(session, day, status, operator_id, operator_username, 1, order.total)
+
 
-        session.add(new_order)
-        session.flush()  # ID ni olish uchun
-
-        # Buyurtma mahsulotlarini qo'shish
-        for item in cart_items:
-            order_item = OrderItem(
-                order_id=new_order.id,
-                product_id=item['product_id'],
-                product_name=item['name'],
-                quantity=item['quantity'],
-                price=item['price']
+@timed
+async def rebuild_daily_sales() -> int:
+    """
+    daily_sales jadvalini orders jadvalidan qaytadan hisoblash (backfill)
+    Qaytaradi: yozilgan qatorlar soni, xatolikda -1
+    """
+    try:
+        async with Session() as session:
+            await session.execute(delete(DailySales))
+
+            operator = func.coalesce(Order.operator_id, 0)
+            await session.execute(
+                DailySales.__table__.insert().from_select(
+                    ['day', 'status', 'operator_id', 'operator_username', 'orders_count', 'revenue'],
+                    select(
+                        func.date(Order.created_at),
+                        func.coalesce(Order.status, 'new'),
+                        operator,
+                        func.max(Order.operator_username),
+                        func.count(Order.id),
+                        func.coalesce(func.sum(Order.total), 0)
+                    ).group_by(func.date(Order.created_at), func.coalesce(Order.status, 'new'), operator)
+                )
             )
-            session.add(order_item)
 
-        session.commit()
-        session.refresh(new_order)
+            rows = await session.scalar(select(func.count()).select_from(DailySales))
+            await session.commit()
+            return rows
+    except SQLAlchemyError as e:
+        print(f"❌ Error rebuilding daily sales: {e}")
+        return -1
+
+
+# ==================== STOCK RESERVATION ====================
 
+def _group_quantities(items: List[Dict]) -> List[Tuple[int, int]]:
+    """
+    Mahsulot miqdorlarini product_id bo'yicha jamlash
+    product_id bo'yicha tartiblangan - parallel tranzaksiyalarda qulflar bir xil tartibda olinadi
+    """
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+    return sorted(quantities.items())
+
+
+async def _reserve_stock(session, items: List[Dict]) -> List[int]:
+    """
+    Buyurtma mahsulotlarini ombordan band qilish (chaqiruvchi tranzaksiyasi ichida)
+    Har bir mahsulot uchun bitta shartli UPDATE: stock_quantity >= miqdor bo'lsagina kamayadi,
+    shuning uchun parallel buyurtmalar omborni manfiyga tushira olmaydi.
+    Qaytaradi: yetarli bo'lmagan mahsulotlar ID lari (bo'sh ro'yxat - hammasi band qilindi)
+    """
+    failed = []
+    for product_id, quantity in _group_quantities(items):
+        result = await session.execute(
+            update(Product)
+            .where(
+                Product.id == product_id,
+                Product.is_active == True,
+                Product.stock_quantity >= quantity
+            )
+            .values(stock_quantity=Product.stock_quantity - quantity)
+        )
+        if result.rowcount != 1:
+            failed.append(product_id)
+    return failed
+
+
+async def _release_stock(session, items: List[Dict]) -> None:
+    """
+    Band qilingan mahsulotlarni omborga qaytarish (chaqiruvchi tranzaksiyasi ichida)
+    """
+    for product_id, quantity in _group_quantities(items):
+        await session.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(stock_quantity=Product.stock_quantity + quantity)
+        )
+
+
+async def _deduct_stock(session, items: List[Dict]) -> None:
+    """
+    Ombordan band qilinmagan (eski) buyurtma uchun miqdorni kamaytirish, 0 dan pastga tushmaydi
+    """
+    for product_id, quantity in _group_quantities(items):
+        await session.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(stock_quantity=case(
+                (Product.stock_quantity >= quantity, Product.stock_quantity - quantity),
+                else_=0
+            ))
+        )
+
+
+# ==================== ORDER FUNCTIONS ====================
+
+async def _insert_order(session, user_id: int, phone: str, address: str, payment_type: str,
+                        cart_items: List[Dict], total: float, customer_name: Optional[str]) -> Dict:
+    """
+    Buyurtmani chaqiruvchi tranzaksiyasida yozish (commit qilmaydi)
+    Mahsulotlar ombordan band qilinadi, buyurtma INSERT ... RETURNING bilan, mahsulotlari
+    bitta executemany bilan yoziladi, daily_sales va 'new_order' outbox hodisasi yangilanadi.
+    Qaytaradi: buyurtma lug'ati yoki {'out_of_stock': [mahsulot nomlari]} - bu holda
+    chaqiruvchi rollback qiladi
+    """
+    # Avval omborni band qilish - yetmasa hech narsa yozilmaydi
+    failed = await _reserve_stock(session, cart_items)
+    if failed:
         return {
-            'id': new_order.id,
-            'total': new_order.total,
-            'status': new_order.status,
-            'is_paid': new_order.is_paid
+            'out_of_stock': [item['name'] for item in cart_items if item['product_id'] in failed]
         }
+
+    # To'lov qilinganligi (Click/Payme uchun keyinchalik TRUE qilinadi)
+    is_paid = False
+    if payment_type in ['click', 'payme']:
+        # Bu yerda to'lov integratsiyasi bo'lishi kerak
+        # Hozircha FALSE qoldiramiz
+        pass
+
+    # Buyurtma yaratish - ID RETURNING orqali (flush/refresh siz)
+    created_at = datetime.utcnow()
+    order_id = (await session.execute(
+        insert(Order).values(
+            user_id=user_id,
+            phone=phone,
+            address=address,
+            payment_type=payment_type,
+            total=total,
+            status='new',
+            is_paid=is_paid,
+            stock_reserved=bool(cart_items),
+            created_at=created_at
+        ).returning(Order.id)
+    )).scalar_one()
+
+    # Kunlik savdo yig'indisini yangilash (xuddi shu tranzaksiyada)
+    await _add_daily_sales(session, created_at.date(), 'new', None, None, 1, total)
+
+    # Buyurtma mahsulotlari - bitta executemany
+    if cart_items:
+        await session.execute(insert(OrderItem), [
+            {
+                'order_id': order_id,
+                'product_id': item['product_id'],
+                'product_name': item['name'],
+                'quantity': item['quantity'],
+                'price': item['price'],
+                'variant_type': 'bottle'
+            }
+            for item in cart_items
+        ])
+
+    # Adminlar va operatorlarga xabar - outbox orqali (worker yuboradi)
+    _add_outbox_event(session, 'new_order', {
+        'order_id': order_id,
+        'customer_name': customer_name,
+        'phone': phone,
+        'address': address,
+        'payment_type': payment_type,
+        'total': total,
+        'items': [
+            {'name': item['name'], 'quantity': item['quantity'], 'price': item['price']}
+            for item in cart_items
+        ]
+    })
+
+    return {
+        'id': order_id,
+        'total': total,
+        'status': 'new',
+        'is_paid': is_paid
+    }
+
+
+@timed
+async def create_order(user_id: int, phone: str, address: str,
+                       payment_type: str, cart_items: List[Dict],
+                       total: float, customer_name: Optional[str] = None) -> Optional[Dict]:
+    """
+    Berilgan mahsulotlar bilan buyurtma yaratish (bitta tranzaksiya)
+    Omborda yetarli bo'lmasa, buyurtma yaratilmaydi va {'out_of_stock': [mahsulot nomlari]} qaytariladi.
+    Savatdan checkout uchun create_order_from_cart ishlatiladi.
+    """
+    try:
+        async with Session() as session:
+            order = await _insert_order(session, user_id, phone, address, payment_type,
+                                        cart_items, total, customer_name)
+            if 'out_of_stock' in order:
+                await session.rollback()
+                return order
+
+            await session.commit()
+
+            if cart_items:
+                _invalidate_stock([item['product_id'] for item in cart_items])
+            return order
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error creating order: {e}")
         return None
-    finally:
-        Session.remove()
 
 
-async def get_all_orders() -> List[Dict]:
+@timed
+async def create_order_from_cart(user_id: int, phone: str, address: str, payment_type: str,
+                                 lang: str, customer_name: Optional[str] = None) -> Optional[Dict]:
     """
-    Barcha buyurtmalarni olish (admin uchun)
+    Foydalanuvchi savatidan buyurtma yaratish - checkout bitta tranzaksiya va bitta commit
+    Savat qatorlari DELETE ... RETURNING bilan olinadi: narxlar va jami summa shu tranzaksiyada
+    hisoblanadi va aynan buyurtmaga kirgan qatorlar o'chiriladi (oradagi o'zgarishlar yo'qolmaydi).
+    Omborda yetarli bo'lmasa rollback - savat o'zgarmaydi.
+    Qaytaradi: buyurtma lug'ati ('items' bilan), {'out_of_stock': [...]}, savat bo'sh bo'lsa
+    {'empty_cart': True}, xatolikda None
     """
     try:
-        session = Session()
-        orders = session.query(Order, User).join(User).order_by(Order.created_at.desc()).all()
+        async with Session() as session:
+            rows = (await session.execute(
+                delete(Cart).where(Cart.user_id == user_id).returning(*_cart_item_columns(lang))
+            )).all()
+
+            if not rows:
+                await session.rollback()
+                return {'empty_cart': True}
+
+            cart_items = [
+                {
+                    'product_id': row.product_id,
+                    'name': row.name,
+                    'quantity': row.quantity,
+                    'price': row.price
+                }
+                for row in sorted(rows, key=lambda row: row.id)
+            ]
+            total = sum(item['price'] * item['quantity'] for item in cart_items)
+
+            order = await _insert_order(session, user_id, phone, address, payment_type,
+                                        cart_items, total, customer_name)
+            if 'out_of_stock' in order:
+                await session.rollback()
+                return order
+
+            await session.commit()
+            _invalidate_stock([item['product_id'] for item in cart_items])
+
+            return {**order, 'items': cart_items}
+    except SQLAlchemyError as e:
+        print(f"❌ Error creating order from cart: {e}")
+        return None
 
-        result = []
-        for order, user in orders:
-            result.append({
-                'id': order.id,
-                'user_id': order.user_id,
-                'user_name': user.full_name,
-                'phone': order.phone,
-                'total': order.total,
-                'status': order.status,
-                'is_paid': order.is_paid,
-                'created_at': order.created_at.strftime('%Y-%m-%d %H:%M')
-            })
 
-        return result
-    except SQLAlchemyError as e:
-        print(f"❌ Error getting orders: {e}")
-        return []
-    finally:
-        Session.remove()
+def _utc_today() -> date:
+    """
+    Joriy kun (UTC) - created_at va daily_sales.day UTC da yoziladi
+    """
+    return datetime.utcnow().date()
 
 
-async def get_orders_by_filter(filter_type: str = 'all') -> List[Dict]:
+def _order_filter_conditions(filter_type: str) -> List:
     """
-    Filtrlangan buyurtmalarni olish
+    Buyurtmalar ro'yxati filtri uchun shartlar
     filter_type: all, new, processing, delivering, completed, today, week
     """
+    # Status bo'yicha filtrlash
+    if filter_type in ('new', 'processing', 'delivering', 'completed'):
+        return [Order.status == filter_type]
+    elif filter_type == 'today':
+        # Yarim ochiq oraliq [bugun 00:00, ertaga 00:00) - created_at indeksidan foydalanadi
+        # created_at UTC da saqlanadi, kun chegarasi statistika bilan bir xil (_utc_today)
+        day_start = datetime.combine(_utc_today(), datetime.min.time())
+        return [Order.created_at >= day_start, Order.created_at < day_start + timedelta(days=1)]
+    elif filter_type == 'week':
+        return [Order.created_at >= datetime.utcnow() - timedelta(days=7)]
+    # all uchun hech qanday filtr qo'shmaymiz
+    return []
+
+
+@timed
+async def get_orders_page(filter_type: str = 'all', limit: int = ORDERS_PER_PAGE,
+                          after_id: Optional[int] = None,
+                          before_id: Optional[int] = None) -> Tuple[List[Dict], bool]:
+    """
+    Filtrlangan buyurtmalarning bitta sahifasini olish
+    Tartib: (created_at, id) kamayish bo'yicha, keyset kursor - buyurtma id si
+    after_id: shu buyurtmadan keyingi (eskiroq) sahifa
+    before_id: shu buyurtmadan oldingi (yangiroq) sahifa
+    Qaytaradi: (buyurtmalar, keyingi sahifa bormi)
+    """
     try:
-        session = Session()
-        query = session.query(Order, User).join(User)
-
-        # Status bo'yicha filtrlash
-        if filter_type == 'new':
-            query = query.filter(Order.status == 'new')
-        elif filter_type == 'processing':
-            query = query.filter(Order.status == 'processing')
-        elif filter_type == 'delivering':
-            query = query.filter(Order.status == 'delivering')
-        elif filter_type == 'completed':
-            query = query.filter(Order.status == 'completed')
-        elif filter_type == 'today':
-            from datetime import date
-            today = date.today()
-            query = query.filter(func.date(Order.created_at) == today)
-        elif filter_type == 'week':
-            from datetime import datetime, timedelta
-            week_ago = datetime.now() - timedelta(days=7)
-            query = query.filter(Order.created_at >= week_ago)
-        # all uchun hech qanday filtr qo'shmaymiz
-
-        orders = query.order_by(Order.created_at.desc()).all()
-
-        result = []
-        for order, user in orders:
-            result.append({
-                'id': order.id,
-                'user_id': order.user_id,
-                'user_name': user.full_name,
-                'phone': order.phone,
-                'total': order.total,
-                'status': order.status,
-                'is_paid': order.is_paid,
-                'created_at': order.created_at.strftime('%Y-%m-%d %H:%M')
-            })
+        async with read_session() as session:
+            query = select(
+                Order.id,
+                Order.user_id,
+                User.full_name,
+                Order.phone,
+                Order.total,
+                Order.status,
+                Order.is_paid,
+                Order.created_at
+            ).join(User, Order.user_id == User.user_id).where(*_order_filter_conditions(filter_type))
+
+            if before_id is not None:
+                cursor_created_at = select(Order.created_at).where(Order.id == before_id).scalar_subquery()
+                query = query.where(
+                    or_(
+                        Order.created_at > cursor_created_at,
+                        and_(Order.created_at == cursor_created_at, Order.id > before_id)
+                    )
+                ).order_by(Order.created_at.asc(), Order.id.asc())
+            else:
+                if after_id is not None:
+                    cursor_created_at = select(Order.created_at).where(Order.id == after_id).scalar_subquery()
+                    query = query.where(
+                        or_(
+                            Order.created_at < cursor_created_at,
+                            and_(Order.created_at == cursor_created_at, Order.id < after_id)
+                        )
+                    )
+                query = query.order_by(Order.created_at.desc(), Order.id.desc())
+
+            # Keyingi sahifa borligini bilish uchun bitta ortiqcha qator olinadi
+            rows = (await session.execute(query.limit(limit + 1))).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            if before_id is not None:
+                rows.reverse()
+                has_next = True
+            else:
+                has_next = has_more
+
+            result = []
+            for row in rows:
+                result.append({
+                    'id': row.id,
+                    'user_id': row.user_id,
+                    'user_name': row.full_name,
+                    'phone': row.phone,
+                    'total': row.total,
+                    'status': row.status,
+                    'is_paid': row.is_paid,
+                    'created_at': row.created_at.strftime('%Y-%m-%d %H:%M')
+                })
 
-        return result
+            return result, has_next
     except SQLAlchemyError as e:
-        print(f"❌ Error getting filtered orders: {e}")
-        return []
-    finally:
-        Session.remove()
+        print(f"❌ Error getting orders page: {e}")
+        return [], False
 
 
+@timed
 async def get_order_by_id(order_id: int) -> Optional[Dict]:
     """
     Buyurtmani ID bo'yicha olish
     """
     try:
-        session = Session()
-        order = session.query(Order, User).join(User).filter(Order.id == order_id).first()
+        async with Session() as session:
+            order = (await session.execute(
+                select(Order, User).join(User).where(Order.id == order_id)
+            )).first()
+
+            if not order:
+                return None
+
+            order_obj, user = order
+
+            # Buyurtma mahsulotlarini olish
+            items = await session.scalars(select(OrderItem).where(OrderItem.order_id == order_id))
+
+            items_list = []
+            for item in items:
+                items_list.append({
+                    'product_id': item.product_id,
+                    'name': item.product_name,
+                    'quantity': item.quantity,
+                    'price': item.price
+                })
 
-        if not order:
-            return None
+            return {
+                'id': order_obj.id,
+                'user_id': order_obj.user_id,
+                'user_name': user.full_name,
+                'phone': order_obj.phone,
+                'address': order_obj.address,
+                'payment_type': order_obj.payment_type,
+                'total': order_obj.total,
+                'status': order_obj.status,
+                'is_paid': order_obj.is_paid,
+                'operator_id': order_obj.operator_id,
+                'operator_username': order_obj.operator_username,
+                'created_at': order_obj.created_at.strftime('%Y-%m-%d %H:%M'),
+                'items': items_list
+            }
+    except SQLAlchemyError as e:
+        print(f"❌ Error getting order: {e}")
+        return None
 
-        order_obj, user = order
 
-        # Buyurtma mahsulotlarini olish
-        items = session.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+async def _apply_order_stock(session, order: Order, new_status: str) -> List[int]:
+    """
+    Status o'zgarishida omborni moslash:
+    - cancelled: band qilingan mahsulotlar omborga qaytariladi
+    - completed: band qilinmagan (eski) buyurtmalar uchun ombor kamaytiriladi
+    Qaytaradi: ombori o'zgargan mahsulotlar ID lari
+    """
+    release = new_status == 'cancelled' and order.stock_reserved
+    deduct = new_status == 'completed' and not order.stock_reserved and order.status != 'completed'
 
-        items_list = []
-        for item in items:
-            items_list.append({
-                'product_id': item.product_id,
-                'name': item.product_name,
-                'quantity': item.quantity,
-                'price': item.price
-            })
+    if not release and not deduct:
+        return []
 
-        return {
-            'id': order_obj.id,
-            'user_id': order_obj.user_id,
-            'user_name': user.full_name,
-            'phone': order_obj.phone,
-            'address': order_obj.address,
-            'payment_type': order_obj.payment_type,
-            'total': order_obj.total,
-            'status': order_obj.status,
-            'is_paid': order_obj.is_paid,
-            'operator_id': order_obj.operator_id,
-            'operator_username': order_obj.operator_username,
-            'created_at': order_obj.created_at.strftime('%Y-%m-%d %H:%M'),
-            'items': items_list
-        }
-    except SQLAlchemyError as e:
-        print(f"❌ Error getting order: {e}")
-        return None
-    finally:
-        Session.remove()
+    items = await session.scalars(
+        select(OrderItem).where(
+            OrderItem.order_id == order.id,
+            or_(OrderItem.variant_type.is_(None), OrderItem.variant_type == 'bottle')
+        )
+    )
+    items = [{'product_id': item.product_id, 'quantity': item.quantity} for item in items]
+
+    if release:
+        await _release_stock(session, items)
+    else:
+        await _deduct_stock(session, items)
 
+    order.stock_reserved = deduct
+    return [item['product_id'] for item in items]
 
+
+@timed
 async def update_order_status(order_id: int, new_status: str) -> bool:
     """
     Buyurtma statusini yangilash
+    Bekor qilingan buyurtma yakuniy: uning mahsulotlari omborga qaytarilgan va
+    boshqa buyurtmalarga sotilgan bo'lishi mumkin, shuning uchun qayta ochilmaydi (False)
     """
     try:
-        session = Session()
-        order = session.query(Order).filter(Order.id == order_id).first()
+        async with Session() as session:
+            order = await session.scalar(
+                select(Order).where(Order.id == order_id).with_for_update()
+            )
 
-        if order:
-            order.status = new_status
-            order.updated_at = datetime.utcnow()
+            if order and order.status == 'cancelled' and new_status != 'cancelled':
+                return False
 
-            # Agar status 'completed' bo'lsa, to'landi deb belgilash
-            if new_status == 'completed':
-                order.is_paid = True
+            if order:
+                if order.status != new_status:
+                    await _move_daily_sales(session, order, new_status,
+                                            order.operator_id, order.operator_username)
 
-            session.commit()
-            return True
-        return False
+                changed_products = await _apply_order_stock(session, order, new_status)
+
+                order.status = new_status
+                order.updated_at = datetime.utcnow()
+
+                # Agar status 'completed' bo'lsa, to'landi deb belgilash
+                if new_status == 'completed':
+                    order.is_paid = True
+
+                await session.commit()
+
+                if changed_products:
+                    _invalidate_stock(changed_products)
+                return True
+            return False
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error updating order status: {e}")
         return False
-    finally:
-        Session.remove()
 
 
+@timed
 async def assign_operator_to_order(order_id: int, operator_id: int, operator_username: str) -> bool:
     """
     Buyurtmaga operator tayinlash
     """
     try:
-        session = Session()
-        order = session.query(Order).filter(Order.id == order_id).first()
+        async with Session() as session:
+            order = await session.scalar(
+                select(Order).where(Order.id == order_id).with_for_update()
+            )
 
-        if order and not order.operator_id:
-            order.operator_id = operator_id
-            order.operator_username = operator_username
-            session.commit()
-            return True
-        return False
+            if order and not order.operator_id:
+                await _move_daily_sales(session, order, order.status,
+                                        operator_id, operator_username)
+
+                order.operator_id = operator_id
+                order.operator_username = operator_username
+                await session.commit()
+                return True
+            return False
     except SQLAlchemyError as e:
-        session.rollback()
         print(f"❌ Error assigning operator: {e}")
         return False
-    finally:
-        Session.remove()
 
 
+def _period_filters(period: str) -> List:
+    """
+    daily_sales uchun vaqt bo'yicha filtr shartlari (kun aniqligida, UTC)
+    period: all, today, week, month
+    """
+    today = _utc_today()
+
+    if period == 'today':
+        return [DailySales.day == today]
+    elif period == 'week':
+        return [DailySales.day >= today - timedelta(days=7)]
+    elif period == 'month':
+        return [DailySales.day >= today - timedelta(days=30)]
+    return []
+
+
+@timed
 async def get_operator_statistics(operator_id: int, period: str = 'all') -> Dict:
     """
     Operator statistikasi
     period: all, today, week, month
     """
     try:
-        session = Session()
-        query = session.query(Order).filter(Order.operator_id == operator_id)
-
-        # Vaqt bo'yicha filtrlash
-        if period == 'today':
-            from datetime import date
-            today = date.today()
-            query = query.filter(func.date(Order.created_at) == today)
-        elif period == 'week':
-            from datetime import datetime, timedelta
-            week_ago = datetime.now() - timedelta(days=7)
-            query = query.filter(Order.created_at >= week_ago)
-        elif period == 'month':
-            from datetime import datetime, timedelta
-            month_ago = datetime.now() - timedelta(days=30)
-            query = query.filter(Order.created_at >= month_ago)
-
-        total_orders = query.count()
-        completed_orders = query.filter(Order.status == 'completed').count()
-        total_revenue = query.filter(Order.status == 'completed').with_entities(func.sum(Order.total)).scalar() or 0
+        async with read_session() as session:
+            filters = [DailySales.operator_id == operator_id] + _period_filters(period)
+            is_completed = DailySales.status == 'completed'
+
+            # Barcha ko'rsatkichlar daily_sales yig'indisidan bitta so'rovda
+            row = (await session.execute(
+                select(
+                    func.coalesce(func.sum(DailySales.orders_count), 0),
+                    func.coalesce(func.sum(case((is_completed, DailySales.orders_count), else_=0)), 0),
+                    func.coalesce(func.sum(case((is_completed, DailySales.revenue), else_=0)), 0)
+                ).where(*filters)
+            )).one()
+            total_orders, completed_orders, total_revenue = row
 
-        return {
-            'total_orders': total_orders,
-            'completed_orders': completed_orders,
-            'total_revenue': total_revenue
-        }
+            return {
+                'total_orders': total_orders,
+                'completed_orders': completed_orders,
+                'total_revenue': total_revenue
+            }
     except SQLAlchemyError as e:
         print(f"❌ Error getting operator statistics: {e}")
         return {
@@ -927,71 +1790,74 @@ async def get_operator_statistics(operator_id: int, period: str = 'all') -> Dict
             'completed_orders': 0,
             'total_revenue': 0
         }
-    finally:
-        Session.remove()
 
 
 # ==================== STATISTICS FUNCTIONS ====================
 
+@timed
 async def get_statistics(period: str = 'all') -> Dict:
     """
     Statistika ma'lumotlari
     period: all, today, week, month
     """
     try:
-        session = Session()
-
-        # Vaqt bo'yicha filtrlash uchun base query
-        orders_query = session.query(Order)
-
-        if period == 'today':
-            from datetime import date
-            today = date.today()
-            orders_query = orders_query.filter(func.date(Order.created_at) == today)
-        elif period == 'week':
-            from datetime import datetime, timedelta
-            week_ago = datetime.now() - timedelta(days=7)
-            orders_query = orders_query.filter(Order.created_at >= week_ago)
-        elif period == 'month':
-            from datetime import datetime, timedelta
-            month_ago = datetime.now() - timedelta(days=30)
-            orders_query = orders_query.filter(Order.created_at >= month_ago)
-
-        total_users = session.query(func.count(User.id)).scalar()
-        total_products = session.query(func.count(Product.id)).filter(Product.is_active == True).scalar()
-        total_orders = orders_query.count()
-        completed_orders = orders_query.filter(Order.status == 'completed').count()
-        pending_orders = orders_query.filter(Order.status.in_(['new', 'processing'])).count()
-        total_revenue = orders_query.filter(Order.status == 'completed').with_entities(
-            func.sum(Order.total)).scalar() or 0
-
-        # Top operatorlar
-        top_operators = session.query(
-            Order.operator_username,
-            func.count(Order.id).label('order_count'),
-            func.sum(Order.total).label('revenue')
-        ).filter(
-            Order.operator_id.isnot(None),
-            Order.status == 'completed'
-        ).group_by(Order.operator_username).order_by(func.sum(Order.total).desc()).limit(5).all()
-
-        operators_list = []
-        for operator in top_operators:
-            operators_list.append({
-                'username': operator[0],
-                'orders': operator[1],
-                'revenue': operator[2] or 0
-            })
+        async with read_session() as session:
+            # Vaqt bo'yicha filtrlash uchun shartlar
+            filters = _period_filters(period)
+            is_completed = DailySales.status == 'completed'
+            is_pending = DailySales.status.in_(['new', 'processing'])
+
+            # Foydalanuvchilar va mahsulotlar soni - skalyar subquery sifatida
+            users_count = select(func.count(User.id)).scalar_subquery()
+            products_count = select(func.count(Product.id)).where(
+                Product.is_active == True
+            ).scalar_subquery()
+
+            # Buyurtma ko'rsatkichlari daily_sales yig'indisidan bitta so'rovda
+            row = (await session.execute(
+                select(
+                    users_count,
+                    products_count,
+                    func.coalesce(func.sum(DailySales.orders_count), 0),
+                    func.coalesce(func.sum(case((is_completed, DailySales.orders_count), else_=0)), 0),
+                    func.coalesce(func.sum(case((is_pending, DailySales.orders_count), else_=0)), 0),
+                    func.coalesce(func.sum(case((is_completed, DailySales.revenue), else_=0)), 0)
+                ).select_from(DailySales).where(*filters)
+            )).one()
+            (total_users, total_products, total_orders,
+             completed_orders, pending_orders, total_revenue) = row
+
+            # Top operatorlar (status o'zgarishidan qolgan nol qatorlar hisobga olinmaydi)
+            top_operators = await session.execute(
+                select(
+                    DailySales.operator_username,
+                    func.sum(DailySales.orders_count).label('order_count'),
+                    func.sum(DailySales.revenue).label('revenue')
+                ).where(
+                    DailySales.operator_id != 0,
+                    DailySales.status == 'completed'
+                ).group_by(DailySales.operator_username)
+                .having(func.sum(DailySales.orders_count) > 0)
+                .order_by(func.sum(DailySales.revenue).desc()).limit(5)
+            )
 
-        return {
-            'total_users': total_users,
-            'total_products': total_products,
-            'total_orders': total_orders,
-            'completed_orders': completed_orders,
-            'pending_orders': pending_orders,
-            'total_revenue': total_revenue,
-            'top_operators': operators_list
-        }
+            operators_list = []
+            for operator in top_operators:
+                operators_list.append({
+                    'username': operator[0],
+                    'orders': operator[1],
+                    'revenue': operator[2] or 0
+                })
+
+            return {
+                'total_users': total_users,
+                'total_products': total_products,
+                'total_orders': total_orders,
+                'completed_orders': completed_orders,
+                'pending_orders': pending_orders,
+                'total_revenue': total_revenue,
+                'top_operators': operators_list
+            }
     except SQLAlchemyError as e:
         print(f"❌ Error getting statistics: {e}")
         return {
@@ -1003,5 +1869,3 @@ async def get_statistics(period: str = 'all') -> Dict:
             'total_revenue': 0,
             'top_operators': []
         }
-    finally:
-        Session.remove()
\ No newline at end of file
@@ -0,0 +1,98 @@
+# database/engine.py
+"""
+Database engine sozlamalari
+
+Har bir backend uchun connection pool parametrlari shu yerda tanlanadi.
+SQLite da har bir yangi ulanishga WAL pragmalari qo'yiladi: o'quvchilar yozuvchini
+kutmaydi (savatga yozish katalog o'qishni bloklamaydi).
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from config import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_MMAP_SIZE
+)
+
+
+def to_async_url(url: str) -> str:
+    """
+    Sinxron drayverli URL ni asinxron drayverga o'tkazish
+    sqlite:///... -> sqlite+aiosqlite:///..., postgresql://... -> postgresql+asyncpg://...
+    Boshqa URL lar o'zgarishsiz qaytadi - ularda asinxron drayver ko'rsatilgan bo'lishi kerak
+    """
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Backend ga mos create_async_engine parametrlari
+    """
+    if _is_sqlite_memory(url):
+        # Xotiradagi database (sinov uchun) - SQLAlchemy standart pool ini o'zi tanlaydi
+        return {}
+
+    if url.startswith("sqlite"):
+        # Fayl: aiosqlite standarti NullPool (har session da yangi ulanish va pragmalar) -
+        # ulanishlar qayta ishlatiladi. Ulanish uzilmaydi, shuning uchun pre-ping kerak emas.
+        # WAL da bir vaqtda bitta yozuvchi, o'quvchilar esa cheklanmagan
+        return {
+            'poolclass': AsyncAdaptedQueuePool,
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT / 1000}
+        }
+
+    # PostgreSQL va boshqa tarmoq orqali ulanadigan database lar
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,  # server/proxy yopgan eski ulanishlarni almashtirish
+        'pool_pre_ping': True  # uzilgan ulanish so'rovga berilmaydi
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Har bir yangi SQLite ulanishi uchun pragmalar
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # WAL da NORMAL xavfsiz: elektr o'chsa oxirgi tranzaksiya yo'qolishi mumkin, database buzilmaydi
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT)}")
+    cursor.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def create_db_engine(url: str, **kwargs) -> AsyncEngine:
+    """
+    Sozlangan AsyncEngine yaratish (kwargs - engine_options ustidan)
+    """
+    async_url = to_async_url(url)
+    engine = create_async_engine(async_url, echo=False, **{**engine_options(async_url), **kwargs})
+
+    if engine.dialect.name == 'sqlite' and not _is_sqlite_memory(async_url):
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+    return engine
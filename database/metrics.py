@@ -0,0 +1,185 @@
+# database/metrics.py
+"""
+Database chaqiruvlari metrikalari
+
+@timed bilan belgilangan db.py funksiyalari (database ga ulanadigan qismlar, kesh
+tekshiruvisiz) uchun har bir chaqiruv davomiyligi gistogrammaga yoziladi, bir vaqtda
+bajarilayotgan chaqiruvlar (navbat chuqurligi) hisoblanadi. LoopLagMonitor event loop
+kechikishini o'lchaydi - biror joyda loop bloklansa (sinxron so'rov, og'ir hisob) shu yerda
+ko'rinadi. Metrikalar admin /metrics komandasida ko'rsatiladi (utils/monitoring.py).
+"""
+
+import asyncio
+import bisect
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from config import logger, LOOP_LAG_CHECK_INTERVAL, LOOP_LAG_WARN_MS
+
+# Gistogramma chegaralari (millisekund), oxirgisidan kattalari "+Inf" ga tushadi
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Joriy vazifa @timed chaqiruv ichidami (ichki chaqiruvlar in_flight ga qo'shilmaydi)
+_inside_timed: ContextVar[bool] = ContextVar('inside_timed', default=False)
+
+
+class LatencyHistogram:
+    """
+    Qat'iy chegarali gistogramma: O(1) xotira, har bir qiymat uchun bitta bisect
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Taxminiy percentil (chegara qiymati), p - 0..1
+        """
+        if not self.count:
+            return None
+
+        rank = p * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bucket}" for bucket in self.buckets] + ["le_inf"]
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else None,
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 2),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+class DBMetrics:
+    """
+    Funksiya bo'yicha davomiylik va bajarilayotgan chaqiruvlar soni
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def timed(self, func: Callable) -> Callable:
+        """
+        Asinxron db funksiyasini o'lchaydigan dekorator
+        in_flight faqat tashqi chaqiruvni hisoblaydi: @timed funksiya ichidan chaqirilgan
+        boshqa @timed funksiya o'z gistogrammasiga yoziladi, lekin navbatni ikki marta oshirmaydi
+        """
+        name = func.__name__
+        histogram = self.histograms.setdefault(name, LatencyHistogram())
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            outer = not _inside_timed.get()
+            if outer:
+                token = _inside_timed.set(True)
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                self.errors[name] = self.errors.get(name, 0) + 1
+                raise
+            finally:
+                histogram.observe((time.perf_counter() - started) * 1000)
+                if outer:
+                    self.in_flight -= 1
+                    _inside_timed.reset(token)
+
+        return wrapper
+
+    def snapshot(self, pool=None) -> Dict[str, Any]:
+        """
+        Metrikalar (monitoring uchun)
+        pool - engine.pool: band ulanishlar va ulanish kutayotgan chaqiruvlar taxmini
+        """
+        result = {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'errors': dict(self.errors),
+            'calls': {
+                name: histogram.snapshot()
+                for name, histogram in self.histograms.items() if histogram.count
+            }
+        }
+
+        if pool is not None and hasattr(pool, 'checkedout'):
+            checked_out = pool.checkedout()
+            result['pool'] = {
+                'size': pool.size(),
+                'checked_out': checked_out,
+                'overflow': pool.overflow(),
+                # Ulanish kutayotganlar taxmini: ulanishni olmagan yoki qaytarib,
+                # natijani qayta ishlayotgan chaqiruvlar ham shu songa tushadi
+                'waiting': max(0, self.in_flight - checked_out)
+            }
+
+        return result
+
+
+class LoopLagMonitor:
+    """
+    Event loop kechikishini o'lchash: interval soniya uxlab, qancha kech uyg'onganini yozadi
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_CHECK_INTERVAL, warn_ms: float = LOOP_LAG_WARN_MS):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.histogram = LatencyHistogram()
+
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.histogram.observe(lag_ms)
+
+            if lag_ms > self.warn_ms:
+                logger.warning(f"⚠️ Event loop {lag_ms:.0f} ms bloklandi")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self.histogram.snapshot()
+
+
+# Global metrikalar (db.py funksiyalari @timed bilan belgilangan)
+db_metrics = DBMetrics()
+timed = db_metrics.timed
+
+# bot.py da ishga tushiriladi
+loop_lag_monitor = LoopLagMonitor()
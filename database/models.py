@@ -3,7 +3,7 @@
 SQLAlchemy ORM modellari
 """
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Boolean, Text, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -22,6 +22,7 @@ class User(Base):
     username = Column(String(255), nullable=True)
     full_name = Column(String(255), nullable=False)
     language = Column(String(2), default='uz')  # uz yoki ru
+    language_selected = Column(Boolean, default=False, nullable=False)  # /start da til tanlaganmi
     is_admin = Column(Boolean, default=False)
     role = Column(String(20), default='user')  # user, operator, admin, superadmin
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -39,6 +40,16 @@ class Product(Base):
     Mahsulotlar jadvali
     """
     __tablename__ = 'products'
+    __table_args__ = (
+        # Kategoriya sahifalari: category + is_active, id bo'yicha keyset
+        Index('ix_products_category_active_id', 'category', 'is_active', 'id'),
+        # Ombor hisoboti: faqat kam qolgan / tugagan faol mahsulotlar (qisman indeks)
+        Index(
+            'ix_products_low_stock', 'stock_quantity', 'id',
+            sqlite_where=text('is_active = 1 AND stock_quantity <= low_stock_threshold'),
+            postgresql_where=text('is_active AND stock_quantity <= low_stock_threshold')
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     name_uz = Column(String(255), nullable=False)
@@ -70,6 +81,10 @@ class Cart(Base):
     Savat (savatcha) jadvali
     """
     __tablename__ = 'cart'
+    __table_args__ = (
+        # Savatni olish va (user_id, product_id) bo'yicha qidirish
+        Index('ix_cart_user_product', 'user_id', 'product_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
@@ -90,6 +105,14 @@ class Order(Base):
     Buyurtmalar jadvali
     """
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Buyurtmalar ro'yxati: (created_at, id) bo'yicha keyset, status filtri bilan
+        Index('ix_orders_created_at_id', 'created_at', 'id'),
+        Index('ix_orders_status_created_at_id', 'status', 'created_at', 'id'),
+        # Operator buyurtmalari
+        Index('ix_orders_operator_created_at', 'operator_id', 'created_at'),
+        Index('ix_orders_user_id', 'user_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
@@ -99,6 +122,7 @@ class Order(Base):
     total = Column(Float, nullable=False)
     status = Column(String(20), default='new')  # new, processing, delivering, completed, cancelled
     is_paid = Column(Boolean, default=False)
+    stock_reserved = Column(Boolean, default=False, nullable=False)  # Ombordan mahsulot band qilinganmi
     operator_id = Column(Integer, nullable=True)  # Qaysi operator sotgani
     operator_username = Column(String(255), nullable=True)  # Operator username
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -117,6 +141,9 @@ class OrderItem(Base):
     Buyurtma mahsulotlari jadvali
     """
     __tablename__ = 'order_items'
+    __table_args__ = (
+        Index('ix_order_items_order_id', 'order_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
@@ -141,6 +168,10 @@ class ProductMLVariant(Base):
     ML larda sotiluvchi atirlar uchun
     """
     __tablename__ = 'product_ml_variants'
+    __table_args__ = (
+        # Mahsulotning faol variantlari ml_amount tartibida
+        Index('ix_ml_variants_product_active_ml', 'product_id', 'is_active', 'ml_amount'),
+    )
 
     id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
@@ -153,4 +184,71 @@ class ProductMLVariant(Base):
     product = relationship("Product", back_populates="ml_variants")
 
     def __repr__(self):
-        return f"<ProductMLVariant(product_id={self.product_id}, ml={self.ml_amount}, price={self.price})>"
\ No newline at end of file
+        return f"<ProductMLVariant(product_id={self.product_id}, ml={self.ml_amount}, price={self.price})>"
+
+
+class DailySales(Base):
+    """
+    Kunlik savdo yig'indisi (rollup) jadvali
+    Har bir kun, status va operator uchun buyurtmalar soni va summasi.
+    create_order, update_order_status va assign_operator_to_order tomonidan yangilanadi.
+    """
+    __tablename__ = 'daily_sales'
+    __table_args__ = (
+        # Operator statistikasi: operator_id + kun oralig'i
+        Index('ix_daily_sales_operator_day', 'operator_id', 'day'),
+    )
+
+    day = Column(Date, primary_key=True)  # Buyurtma yaratilgan kun (UTC)
+    status = Column(String(20), primary_key=True)
+    operator_id = Column(Integer, primary_key=True, default=0)  # 0 - operator tayinlanmagan
+    operator_username = Column(String(255), nullable=True)
+    orders_count = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DailySales(day={self.day}, status='{self.status}', operator_id={self.operator_id}, orders={self.orders_count})>"
+
+
+class Outbox(Base):
+    """
+    Yuborilishi kerak bo'lgan xabarlar (outbox) jadvali
+    Hodisa buyurtma bilan bitta tranzaksiyada yoziladi, worker uni o'qib yuboradi.
+    Bot qayta ishga tushsa ham yuborilmagan xabarlar yo'qolmaydi.
+    """
+    __tablename__ = 'outbox'
+    __table_args__ = (
+        # Worker: navbatdagi pending (va muddati o'tgan sending) yozuvlar
+        Index('ix_outbox_status_available', 'status', 'available_at', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False)  # new_order
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(20), default='pending', nullable=False)  # pending, sending, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    # JSON ro'yxat: xabar allaqachon yetkazilgan chat_id lar (qayta urinishda ularga yuborilmaydi)
+    delivered_to = Column(Text, nullable=True)
+    # Qachondan yuborish mumkin; sending uchun - band qilish muddati (o'tsa boshqa worker oladi)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Outbox(id={self.id}, event_type='{self.event_type}', status='{self.status}')>"
+
+
+class FSMState(Base):
+    """
+    FSM holatlari jadvali (checkout, mahsulot qo'shish va h.k. bosqichlari)
+    Bir nechta bot jarayoni umumiy holatdan foydalanishi va qayta ishga tushganda
+    yarim qolgan jarayonlar yo'qolmasligi uchun
+    """
+    __tablename__ = 'fsm_states'
+
+    key = Column(String(255), primary_key=True)  # bot_id:chat_id:user_id:thread_id:destiny
+    state = Column(String(255), nullable=True)
+    data = Column(Text, nullable=False, default='{}')  # JSON
+    expires_at = Column(DateTime, nullable=False, index=True)  # Tashlab ketilgan holatlar o'chiriladi
+
+    def __repr__(self):
+        return f"<FSMState(key='{self.key}', state='{self.state}')>"
@@ -8,7 +8,7 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from database.db import get_user, create_product
+from database.db import create_product
 from keyboards.admin_keyboards import (
     get_category_selection_keyboard,
     get_confirm_product_keyboard,
@@ -35,13 +35,10 @@ class AddProductStates(StatesGroup):
 
 @add_product_router.callback_query(F.data == "admin_add_product")
 @admin_only
-async def start_add_product(callback: CallbackQuery, state: FSMContext):
+async def start_add_product(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Yangi mahsulot qo'shish jarayonini boshlash
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     await callback.message.edit_text(
         get_text('enter_product_name_uz', lang),
         reply_markup=None
@@ -53,13 +50,10 @@ async def start_add_product(callback: CallbackQuery, state: FSMContext):
 
 @add_product_router.message(AddProductStates.waiting_for_name_uz, F.text)
 @admin_only
-async def process_name_uz(message: Message, state: FSMContext):
+async def process_name_uz(message: Message, state: FSMContext, lang: str):
     """
     O'zbekcha nom qabul qilish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     name_uz = message.text.strip()
 
     if len(name_uz) < 3:
@@ -74,13 +68,10 @@ async def process_name_uz(message: Message, state: FSMContext):
 
 @add_product_router.message(AddProductStates.waiting_for_name_ru, F.text)
 @admin_only
-async def process_name_ru(message: Message, state: FSMContext):
+async def process_name_ru(message: Message, state: FSMContext, lang: str):
     """
     Ruscha nom qabul qilish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     name_ru = message.text.strip()
 
     if len(name_ru) < 3:
@@ -95,13 +86,10 @@ async def process_name_ru(message: Message, state: FSMContext):
 
 @add_product_router.message(AddProductStates.waiting_for_description_uz, F.text)
 @admin_only
-async def process_description_uz(message: Message, state: FSMContext):
+async def process_description_uz(message: Message, state: FSMContext, lang: str):
     """
     O'zbekcha tavsif qabul qilish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     description_uz = message.text.strip()
 
     if len(description_uz) < 10:
@@ -123,13 +111,10 @@ async def process_description_uz(message: Message, state: FSMContext):
 
 @add_product_router.message(AddProductStates.waiting_for_description_ru, F.text)
 @admin_only
-async def process_description_ru(message: Message, state: FSMContext):
+async def process_description_ru(message: Message, state: FSMContext, lang: str):
     """
     Ruscha tavsif qabul qilish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     description_ru = message.text.strip()
 
     if len(description_ru) < 10:
@@ -151,13 +136,10 @@ async def process_description_ru(message: Message, state: FSMContext):
 
 @add_product_router.message(AddProductStates.waiting_for_price, F.text)
 @admin_only
-async def process_price(message: Message, state: FSMContext):
+async def process_price(message: Message, state: FSMContext, lang: str):
     """
     Narxni qabul qilish va tekshirish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     price_text = message.text.strip()
 
     # Narxni tekshirish
@@ -179,14 +161,11 @@ async def process_price(message: Message, state: FSMContext):
 
 @add_product_router.callback_query(AddProductStates.waiting_for_category, F.data.startswith("category_"))
 @admin_only
-async def process_category(callback: CallbackQuery, state: FSMContext):
+async def process_category(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Kategoriyani tanlash
     """
     category = callback.data.split("_")[1]  # category_men, category_women, category_unisex
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     await state.update_data(category=category)
 
     await callback.message.edit_text(
@@ -200,13 +179,10 @@ async def process_category(callback: CallbackQuery, state: FSMContext):
 
 @add_product_router.message(AddProductStates.waiting_for_image, F.photo)
 @admin_only
-async def process_image(message: Message, state: FSMContext):
+async def process_image(message: Message, state: FSMContext, lang: str):
     """
     Mahsulot rasmini qabul qilish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     # Eng katta o'lchamli rasmni olish
     photo = message.photo[-1]
     file_id = photo.file_id
@@ -251,13 +227,10 @@ async def process_image(message: Message, state: FSMContext):
 
 @add_product_router.callback_query(AddProductStates.waiting_for_confirm, F.data == "confirm_product")
 @admin_only
-async def confirm_product(callback: CallbackQuery, state: FSMContext):
+async def confirm_product(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Mahsulotni tasdiqlash va bazaga saqlash
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     data = await state.get_data()
 
     # Mahsulotni bazaga saqlash
@@ -291,13 +264,10 @@ async def confirm_product(callback: CallbackQuery, state: FSMContext):
 
 @add_product_router.callback_query(AddProductStates.waiting_for_confirm, F.data == "cancel_product")
 @admin_only
-async def cancel_product(callback: CallbackQuery, state: FSMContext):
+async def cancel_product(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Mahsulot qo'shishni bekor qilish
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     await callback.message.edit_caption(
         caption=get_text('product_cancelled', lang),
         reply_markup=None
@@ -314,11 +284,8 @@ async def cancel_product(callback: CallbackQuery, state: FSMContext):
 
 @add_product_router.message(AddProductStates.waiting_for_image)
 @admin_only
-async def invalid_image(message: Message):
+async def invalid_image(message: Message, lang: str):
     """
     Noto'g'ri fayl yuborilganda
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     await message.answer(get_text('invalid_image', lang))
\ No newline at end of file
@@ -9,13 +9,14 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from database.db import (
-    get_user, get_all_products, update_product_stock,
-    get_low_stock_products, get_out_of_stock_products,
-    add_ml_variant, get_ml_variants, delete_ml_variant,
+    get_all_products, update_product_stock,
+    get_stock_report, get_inventory_summary,
+    add_ml_variant, delete_ml_variant,
     get_product_by_id
 )
 from utils.localization import get_text
 from utils.decorators import admin_only
+from utils.stock_monitor import low_stock_monitor
 
 inventory_router = Router()
 
@@ -29,14 +30,23 @@ class InventoryStates(StatesGroup):
 
 @inventory_router.callback_query(F.data == "manage_inventory")
 @admin_only
-async def manage_inventory_menu(callback: CallbackQuery):
+async def manage_inventory_menu(callback: CallbackQuery, lang: str):
     """
     Ombor boshqaruvi menyusi
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
+    summary = await get_inventory_summary()
 
     text = "📦 " + get_text('manage_inventory', lang) + "\n\n"
+    if lang == 'uz':
+        text += f"✅ Yetarli: {summary['in_stock']}\n"
+        text += f"⚠️ Kam qolgan: {summary['low_stock']}\n"
+        text += f"❌ Tugagan: {summary['out_of_stock']}\n"
+        text += f"📊 Jami: {summary['total_products']} mahsulot, {summary['total_units']} dona\n\n"
+    else:
+        text += f"✅ В наличии: {summary['in_stock']}\n"
+        text += f"⚠️ Заканчивается: {summary['low_stock']}\n"
+        text += f"❌ Закончился: {summary['out_of_stock']}\n"
+        text += f"📊 Всего: {summary['total_products']} товаров, {summary['total_units']} шт.\n\n"
     text += "Mahsulotni tanlang va boshqaring:" if lang == 'uz' else "Выберите товар для управления:"
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -66,13 +76,10 @@ async def manage_inventory_menu(callback: CallbackQuery):
 
 @inventory_router.callback_query(F.data == "inventory_products_list")
 @admin_only
-async def show_inventory_products(callback: CallbackQuery):
+async def show_inventory_products(callback: CallbackQuery, lang: str):
     """
     Mahsulotlar ro'yxatini ombor ma'lumotlari bilan ko'rsatish
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     products = await get_all_products()
 
     if not products:
@@ -118,23 +125,20 @@ async def show_inventory_products(callback: CallbackQuery):
 
 @inventory_router.callback_query(F.data.startswith("inv_prod_"))
 @admin_only
-async def show_product_inventory(callback: CallbackQuery):
+async def show_product_inventory(callback: CallbackQuery, lang: str):
     """
     Mahsulot ombor ma'lumotlarini ko'rsatish va boshqarish
     """
     product_id = int(callback.data.split("_")[2])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     product = await get_product_by_id(product_id, lang)
 
     if not product:
         await callback.answer(get_text('product_not_found', lang), show_alert=True)
         return
 
-    # ML variantlarni olish
-    ml_variants = await get_ml_variants(product_id)
+    # ML variantlar (mahsulot bilan birga katalog keshidan keladi)
+    ml_variants = product['ml_variants']
 
     # Mahsulot kartasi
     text = f"🎁 <b>{product['name']}</b>\n\n"
@@ -209,7 +213,7 @@ async def show_product_inventory(callback: CallbackQuery):
 
 @inventory_router.callback_query(F.data.startswith("quick_add_"))
 @admin_only
-async def quick_add_stock(callback: CallbackQuery):
+async def quick_add_stock(callback: CallbackQuery, lang: str):
     """
     Tez miqdor qo'shish (+10, +50)
     """
@@ -217,9 +221,6 @@ async def quick_add_stock(callback: CallbackQuery):
     product_id = int(data[2])
     amount = int(data[3])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     # Hozirgi miqdorni olish
     product = await get_product_by_id(product_id, lang)
     if not product:
@@ -235,25 +236,22 @@ async def quick_add_stock(callback: CallbackQuery):
         await callback.answer(f"✅ +{amount} dona qo'shildi! Jami: {new_stock}", show_alert=True)
 
         # Sahifani yangilash
-        await show_product_inventory(callback)
+        await show_product_inventory(callback, lang=lang)
 
-        # Kam qolgan mahsulotlarni tekshirish
-        await check_and_notify_low_stock(callback.bot, lang)
+        # Kam qolgan mahsulotlar monitoriga o'zgarishni bildirish
+        low_stock_monitor.mark_changed([product_id])
     else:
         await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
 
 
 @inventory_router.callback_query(F.data.startswith("manual_stock_"))
 @admin_only
-async def start_manual_stock(callback: CallbackQuery, state: FSMContext):
+async def start_manual_stock(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Qo'lda miqdor kiritish
     """
     product_id = int(callback.data.split("_")[2])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     product = await get_product_by_id(product_id, lang)
 
     text = f"📦 <b>{product['name']}</b>\n\n"
@@ -303,8 +301,8 @@ async def process_manual_stock(message: Message, state: FSMContext):
                 parse_mode="HTML"
             )
 
-            # Kam qolgan mahsulotlarni tekshirish
-            await check_and_notify_low_stock(message.bot, lang)
+            # Kam qolgan mahsulotlar monitoriga o'zgarishni bildirish
+            low_stock_monitor.mark_changed([product_id])
         else:
             await message.answer("❌ Xatolik yuz berdi" if lang == 'uz' else "❌ Произошла ошибка")
 
@@ -316,7 +314,7 @@ async def process_manual_stock(message: Message, state: FSMContext):
 
 
 @inventory_router.callback_query(F.data.startswith("cancel_stock_"))
-async def cancel_stock_input(callback: CallbackQuery, state: FSMContext):
+async def cancel_stock_input(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Miqdor kiritishni bekor qilish
     """
@@ -325,20 +323,17 @@ async def cancel_stock_input(callback: CallbackQuery, state: FSMContext):
 
     # Mahsulot kartasiga qaytish
     callback.data = f"inv_prod_{product_id}"
-    await show_product_inventory(callback)
+    await show_product_inventory(callback, lang=lang)
 
 
 @inventory_router.callback_query(F.data.startswith("add_ml_menu_"))
 @admin_only
-async def show_ml_variant_menu(callback: CallbackQuery):
+async def show_ml_variant_menu(callback: CallbackQuery, lang: str):
     """
     ML variant qo'shish menyusi (tez tanlovlar)
     """
     product_id = int(callback.data.split("_")[3])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     product = await get_product_by_id(product_id, lang)
 
     text = f"💧 <b>ML variant qo'shish</b>\n\n"
@@ -378,7 +373,7 @@ async def show_ml_variant_menu(callback: CallbackQuery):
 
 @inventory_router.callback_query(F.data.startswith("quick_ml_"))
 @admin_only
-async def quick_add_ml_variant(callback: CallbackQuery, state: FSMContext):
+async def quick_add_ml_variant(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Tez ML variant qo'shish (faqat narxni so'rash)
     """
@@ -386,9 +381,6 @@ async def quick_add_ml_variant(callback: CallbackQuery, state: FSMContext):
     product_id = int(data[2])
     ml_amount = int(data[3])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     product = await get_product_by_id(product_id, lang)
 
     text = f"💧 <b>{ml_amount} ML variant</b>\n\n"
@@ -415,15 +407,12 @@ async def quick_add_ml_variant(callback: CallbackQuery, state: FSMContext):
 
 @inventory_router.callback_query(F.data.startswith("manual_ml_"))
 @admin_only
-async def start_manual_ml(callback: CallbackQuery, state: FSMContext):
+async def start_manual_ml(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Qo'lda ML variant qo'shish
     """
     product_id = int(callback.data.split("_")[2])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     product = await get_product_by_id(product_id, lang)
 
     text = f"💧 <b>ML variant qo'shish</b>\n\n"
@@ -516,7 +505,7 @@ async def process_ml_price(message: Message, state: FSMContext):
 
 
 @inventory_router.callback_query(F.data.startswith("cancel_ml_"))
-async def cancel_ml_input(callback: CallbackQuery, state: FSMContext):
+async def cancel_ml_input(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     ML qo'shishni bekor qilish
     """
@@ -525,22 +514,19 @@ async def cancel_ml_input(callback: CallbackQuery, state: FSMContext):
 
     # Mahsulot kartasiga qaytish
     callback.data = f"inv_prod_{product_id}"
-    await show_product_inventory(callback)
+    await show_product_inventory(callback, lang=lang)
 
 
 @inventory_router.callback_query(F.data.startswith("manage_ml_"))
 @admin_only
-async def manage_ml_variants(callback: CallbackQuery):
+async def manage_ml_variants(callback: CallbackQuery, lang: str):
     """
     ML variantlarni boshqarish (o'chirish)
     """
     product_id = int(callback.data.split("_")[2])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     product = await get_product_by_id(product_id, lang)
-    ml_variants = await get_ml_variants(product_id)
+    ml_variants = product['ml_variants']
 
     text = f"🗑 <b>ML variantlarni boshqarish</b>\n\n"
     text += f"Mahsulot: {product['name']}\n\n"
@@ -569,7 +555,7 @@ async def manage_ml_variants(callback: CallbackQuery):
 
 @inventory_router.callback_query(F.data.startswith("del_ml_"))
 @admin_only
-async def delete_ml_variant_handler(callback: CallbackQuery):
+async def delete_ml_variant_handler(callback: CallbackQuery, lang: str):
     """
     ML variantni o'chirish
     """
@@ -577,9 +563,6 @@ async def delete_ml_variant_handler(callback: CallbackQuery):
     variant_id = int(data[2])
     product_id = int(data[3])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     result = await delete_ml_variant(variant_id)
 
     if result:
@@ -587,22 +570,20 @@ async def delete_ml_variant_handler(callback: CallbackQuery):
 
         # Boshqaruv sahifasiga qaytish
         callback.data = f"manage_ml_{product_id}"
-        await manage_ml_variants(callback)
+        await manage_ml_variants(callback, lang=lang)
     else:
         await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
 
 
 @inventory_router.callback_query(F.data == "check_low_stock")
 @admin_only
-async def check_low_stock_handler(callback: CallbackQuery):
+async def check_low_stock_handler(callback: CallbackQuery, lang: str):
     """
     Kam qolgan mahsulotlarni ko'rsatish
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
-    low_stock = await get_low_stock_products(lang)
-    out_of_stock = await get_out_of_stock_products(lang)
+    report = await get_stock_report(lang)
+    low_stock = report['low_stock']
+    out_of_stock = report['out_of_stock']
 
     if not low_stock and not out_of_stock:
         await callback.answer(get_text('no_low_stock', lang), show_alert=True)
@@ -632,41 +613,3 @@ async def check_low_stock_handler(callback: CallbackQuery):
 
     await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
     await callback.answer()
-
-
-async def check_and_notify_low_stock(bot, lang='uz'):
-    """
-    Kam qolgan mahsulotlarni tekshirish va adminlarga xabar berish
-    """
-    from database.db import get_admins
-
-    low_stock = await get_low_stock_products(lang)
-    out_of_stock = await get_out_of_stock_products(lang)
-
-    if not low_stock and not out_of_stock:
-        return
-
-    products_text = ""
-
-    if out_of_stock:
-        products_text += "❌ <b>Tugagan:</b>\n"
-        for product in out_of_stock:
-            products_text += f"  • {product['name']}\n"
-        products_text += "\n"
-
-    if low_stock:
-        products_text += "⚠️ <b>Kam qolgan:</b>\n"
-        for product in low_stock:
-            products_text += f"  • {product['name']} - {product['stock_quantity']} dona\n"
-
-    text = "⚠️ <b>OMBOR OGOHLANTIRISHI!</b>\n\n"
-    text += "Quyidagi mahsulotlar tugab qolmoqda:\n\n" if lang == 'uz' else "Следующие товары заканчиваются:\n\n"
-    text += products_text
-
-    # Barcha adminlarga xabar yuborish
-    admins = await get_admins()
-    for admin_id in admins:
-        try:
-            await bot.send_message(admin_id, text, parse_mode="HTML")
-        except Exception as e:
-            print(f"Failed to send low stock notification to admin {admin_id}: {e}")
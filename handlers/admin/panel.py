@@ -8,8 +8,8 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 
 from database.db import (
-    get_user, get_all_products, delete_product,
-    get_all_orders, update_order_status, get_statistics
+    get_all_products, delete_product,
+    update_order_status, get_statistics
 )
 from keyboards.admin_keyboards import (
     get_admin_menu_keyboard,
@@ -19,34 +19,38 @@ from keyboards.admin_keyboards import (
 )
 from utils.decorators import admin_only
 from utils.localization import get_text
+from utils.monitoring import collect_metrics, format_metrics
 
 admin_panel_router = Router()
 
 
 @admin_panel_router.message(Command("admin"))
 @admin_only
-async def admin_panel(message: Message):
+async def admin_panel(message: Message, lang: str):
     """
     Admin panel - faqat adminlar uchun
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     await message.answer(
         get_text('admin_welcome', lang),
         reply_markup=get_admin_menu_keyboard(lang)
     )
 
 
+@admin_panel_router.message(Command("metrics"))
+@admin_only
+async def show_metrics(message: Message, lang: str):
+    """
+    Bot metrikalari: db chaqiruvlari, pool, event loop, keshlar
+    """
+    await message.answer(format_metrics(collect_metrics()))
+
+
 @admin_panel_router.callback_query(F.data == "admin_statistics")
 @admin_only
-async def show_statistics(callback: CallbackQuery):
+async def show_statistics(callback: CallbackQuery, lang: str):
     """
     Statistikani ko'rsatish - filtr tanlash
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     from keyboards.admin_keyboards import get_statistics_filter_keyboard
 
     await callback.message.edit_text(
@@ -58,15 +62,12 @@ async def show_statistics(callback: CallbackQuery):
 
 @admin_panel_router.callback_query(F.data.startswith("stats_"))
 @admin_only
-async def show_filtered_statistics(callback: CallbackQuery):
+async def show_filtered_statistics(callback: CallbackQuery, lang: str):
     """
     Filtrlangan statistikani ko'rsatish
     Format: stats_<period> (all, today, week, month)
     """
     period = callback.data.split("_")[1]
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     stats = await get_statistics(period)
 
     period_names = {
@@ -101,13 +102,10 @@ async def show_filtered_statistics(callback: CallbackQuery):
 
 @admin_panel_router.callback_query(F.data == "admin_products_list")
 @admin_only
-async def show_products_list(callback: CallbackQuery):
+async def show_products_list(callback: CallbackQuery, lang: str):
     """
     Mahsulotlar ro'yxatini ko'rsatish (tahrirlash va o'chirish uchun)
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     products = await get_all_products()
 
     if not products:
@@ -130,15 +128,12 @@ async def show_products_list(callback: CallbackQuery):
 
 @admin_panel_router.callback_query(F.data.startswith("delete_product_"))
 @admin_only
-async def delete_product_handler(callback: CallbackQuery):
+async def delete_product_handler(callback: CallbackQuery, lang: str):
     """
     Mahsulotni o'chirish
     Format: delete_product_<product_id>
     """
     product_id = int(callback.data.split("_")[2])
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     result = await delete_product(product_id)
 
     if result:
@@ -171,13 +166,10 @@ async def delete_product_handler(callback: CallbackQuery):
 
 @admin_panel_router.callback_query(F.data == "admin_orders_list")
 @admin_only
-async def show_orders_list(callback: CallbackQuery):
+async def show_orders_list(callback: CallbackQuery, lang: str):
     """
     Buyurtmalar ro'yxatini ko'rsatish - filtrlash menyusi
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     from keyboards.admin_keyboards import get_orders_filter_keyboard
 
     await callback.message.edit_text(
@@ -189,31 +181,31 @@ async def show_orders_list(callback: CallbackQuery):
 
 @admin_panel_router.callback_query(F.data.startswith("orders_filter_"))
 @admin_only
-async def show_filtered_orders(callback: CallbackQuery):
+async def show_filtered_orders(callback: CallbackQuery, lang: str):
     """
     Filtrlangan buyurtmalarni ko'rsatish
-    Format: orders_filter_<filter_type>_<page>
+    Format: orders_filter_<filter_type>_<page>[_<a|b><order_id>]
     """
-    from database.db import get_orders_by_filter
+    from database.db import get_orders_page
 
     data = callback.data.split("_")
     filter_type = data[2]  # all, new, processing, delivering, completed
     page = int(data[3]) if len(data) > 3 else 0
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
+    # Keyset kursor: a<id> - shu buyurtmadan keyin, b<id> - shu buyurtmadan oldin
+    after_id = before_id = None
+    if len(data) > 4 and len(data[4]) > 1:
+        if data[4][0] == 'a':
+            after_id = int(data[4][1:])
+        elif data[4][0] == 'b':
+            before_id = int(data[4][1:])
 
-    orders = await get_orders_by_filter(filter_type)
+    orders, has_next = await get_orders_page(filter_type, after_id=after_id, before_id=before_id)
 
     if not orders:
         await callback.answer(get_text('no_orders', lang), show_alert=True)
         return
 
-    # Pagination
-    ITEMS_PER_PAGE = 10
-    start_idx = page * ITEMS_PER_PAGE
-    end_idx = start_idx + ITEMS_PER_PAGE
-
     orders_text = get_text('orders_list_title', lang) + f" ({filter_type.upper()})\n\n"
 
     status_emoji = {
@@ -224,24 +216,24 @@ async def show_filtered_orders(callback: CallbackQuery):
         'cancelled': '❌'
     }
 
-    for order in orders[start_idx:end_idx]:
+    for order in orders:
         orders_text += f"{status_emoji.get(order['status'], '📦')} Buyurtma #{order['id']}\n"
         orders_text += f"   👤 {order['user_name']}\n"
         orders_text += f"   💰 {order['total']:,.0f} so'm\n"
         orders_text += f"   📅 {order['created_at']}\n\n"
 
-    orders_text += f"\n📄 Sahifa: {page + 1}/{(len(orders) + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE}"
+    orders_text += f"\n📄 Sahifa: {page + 1}"
 
     await callback.message.edit_text(
         orders_text,
-        reply_markup=get_orders_keyboard(orders, page, lang, filter_type)
+        reply_markup=get_orders_keyboard(orders, page, lang, filter_type, has_next)
     )
     await callback.answer()
 
 
 @admin_panel_router.callback_query(F.data.startswith("order_detail_"))
 @admin_only
-async def show_order_detail(callback: CallbackQuery):
+async def show_order_detail(callback: CallbackQuery, lang: str):
     """
     Buyurtma tafsilotlari
     Format: order_detail_<order_id>
@@ -249,9 +241,6 @@ async def show_order_detail(callback: CallbackQuery):
     from database.db import get_order_by_id
 
     order_id = int(callback.data.split("_")[2])
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     order = await get_order_by_id(order_id)
 
     if not order:
@@ -303,7 +292,7 @@ async def show_order_detail(callback: CallbackQuery):
 
 @admin_panel_router.callback_query(F.data.startswith("update_status_"))
 @admin_only
-async def update_status_handler(callback: CallbackQuery):
+async def update_status_handler(callback: CallbackQuery, lang: str):
     """
     Buyurtma statusini yangilash
     Format: update_status_<order_id>_<new_status>
@@ -312,33 +301,22 @@ async def update_status_handler(callback: CallbackQuery):
     order_id = int(data[2])
     new_status = data[3]
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
-    # Buyurtmani olish (ombor kamaytirish uchun kerak)
-    from database.db import get_order_by_id, reduce_product_stock
-    order = await get_order_by_id(order_id)
+    from database.db import get_order_by_id
 
+    # Ombor buyurtma yaratilganda band qilinadi, bekor qilinganda update_order_status qaytaradi
     result = await update_order_status(order_id, new_status)
 
     if result:
-        # Agar buyurtma yakunlangan bo'lsa, ombor miqdorini kamaytirish
-        if new_status == 'completed' and order:
-            for item in order['items']:
-                # Faqat bottle (asosiy mahsulot) uchun ombor miqdorini kamaytirish
-                variant_type = item.get('variant_type', 'bottle')
-                if variant_type == 'bottle':
-                    await reduce_product_stock(item['product_id'], item['quantity'])
-
-            # Kam qolgan mahsulotlarni tekshirish va adminlarga xabar berish
-            from handlers.admin.inventory import check_and_notify_low_stock
-            await check_and_notify_low_stock(callback.bot, lang)
-
         await callback.answer(get_text('status_updated', lang), show_alert=True)
 
         # Yangilangan buyurtmani ko'rsatish
         order = await get_order_by_id(order_id)
 
+        # Bekor qilish / yakunlash omborni o'zgartirishi mumkin
+        if order and new_status in ('cancelled', 'completed'):
+            from utils.stock_monitor import low_stock_monitor
+            low_stock_monitor.mark_changed(item['product_id'] for item in order['items'])
+
         status_text = {
             'new': get_text('status_new', lang),
             'processing': get_text('status_processing', lang),
@@ -380,13 +358,10 @@ async def update_status_handler(callback: CallbackQuery):
 
 @admin_panel_router.callback_query(F.data == "back_to_admin")
 @admin_only
-async def back_to_admin_menu(callback: CallbackQuery):
+async def back_to_admin_menu(callback: CallbackQuery, lang: str):
     """
     Admin menyuga qaytish
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     await callback.message.edit_text(
         get_text('admin_welcome', lang),
         reply_markup=get_admin_menu_keyboard(lang)
@@ -3,22 +3,29 @@
 Savat (cart) bilan ishlash: ko'rish, o'chirish, buyurtma berish
 """
 
+import math
+from typing import Dict
+
 from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from database.db import (
-    get_user, get_cart_items, remove_from_cart,
-    clear_cart, create_order, get_admins
+    get_cart_summary, remove_from_cart,
+    clear_cart, create_order_from_cart
 )
+from config import CART_ITEMS_PER_PAGE
 from keyboards.user_keyboards import (
-    get_cart_keyboard,
+    get_cart_page_keyboard,
     get_payment_keyboard,
     get_phone_request_keyboard,
     get_back_to_main_menu_keyboard
 )
 from utils.localization import get_text
+from utils.decorators import rate_limit
+from utils.cart_debouncer import cart_debouncer
 
 cart_router = Router()
 
@@ -30,259 +37,157 @@ class OrderStates(StatesGroup):
     waiting_for_payment = State()
 
 
+def render_cart_page(summary: Dict, lang: str):
+    """
+    Butun savat bitta xabarda: joriy sahifa mahsulotlari, jami summa va tugmalar
+    summary - get_cart_summary(..., per_page=CART_ITEMS_PER_PAGE) natijasi
+    Qaytaradi: (matn, klaviatura)
+    """
+    page = summary['page']
+    total_pages = max(1, math.ceil(summary['count'] / CART_ITEMS_PER_PAGE))
+    start = page * CART_ITEMS_PER_PAGE
+
+    cart_text = get_text('cart_title', lang) + "\n\n"
+
+    for idx, item in enumerate(summary['items'], start + 1):
+        cart_text += f"{idx}. {item['name']}\n"
+        cart_text += f"   💰 {item['price']:,.0f} {get_text('sum', lang)} x {item['quantity']}\n"
+        cart_text += f"   = {item['subtotal']:,.0f} {get_text('sum', lang)}\n\n"
+
+    cart_text += f"📦 {get_text('total_items', lang)}: {summary['count']} ta\n"
+    cart_text += f"💵 {get_text('total', lang)}: {summary['total']:,.0f} {get_text('sum', lang)}"
+
+    return cart_text, get_cart_page_keyboard(summary['items'], page, total_pages, lang)
+
+
+async def _edit_cart_message(message: Message, user_id: int, page: int, lang: str):
+    """
+    Savat xabarini joyida yangilash (bo'sh bo'lsa - "savat bo'sh")
+    """
+    summary = await get_cart_summary(user_id, lang, page, CART_ITEMS_PER_PAGE)
+
+    if not summary['count']:
+        await message.edit_text(get_text('cart_empty', lang), reply_markup=None)
+        return
+
+    cart_text, keyboard = render_cart_page(summary, lang)
+    await message.edit_text(cart_text, reply_markup=keyboard)
+
+
+def _cart_callback_page(data: str) -> int:
+    """
+    Callback dagi sahifa raqami: cart_increase_<id>_<page>
+    (Eski xabarlarda sahifa yo'q - birinchi sahifa)
+    """
+    parts = data.split("_")
+    return int(parts[3]) if len(parts) > 3 else 0
+
+
 @cart_router.message(F.text.in_(['🛒 Savat', '🛒 Корзина']))
-async def show_cart(message: Message):
+async def show_cart(message: Message, lang: str):
     """
-    Savatni ko'rsatish
+    Savatni ko'rsatish - bitta xabar, keyin shu xabar tahrirlanadi
     """
     user_id = message.from_user.id
-    user = await get_user(user_id)
-    lang = user.get('language', 'uz')
-
-    cart_items = await get_cart_items(user_id, lang)
+    summary = await get_cart_summary(user_id, lang, 0, CART_ITEMS_PER_PAGE)
 
-    if not cart_items:
+    if not summary['count']:
         await message.answer(
             get_text('cart_empty', lang),
             reply_markup=get_back_to_main_menu_keyboard(lang)
         )
         return
 
-    # Har bir mahsulot uchun inline keyboard yaratish
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    for idx, item in enumerate(cart_items, 1):
-        item_text = f"📦 {item['name']}\n\n"
-        item_text += f"💰 Narxi: {item['price']:,.0f} {get_text('sum', lang)}\n"
-        item_text += f"🔢 Miqdor: {item['quantity']} ta\n"
-        item_text += f"💵 Jami: {item['price'] * item['quantity']:,.0f} {get_text('sum', lang)}"
-
-        # Har bir mahsulot uchun o'chirish tugmasi
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text=get_text('decrease_quantity', lang),
-                    callback_data=f"cart_decrease_{item['cart_id']}"
-                ),
-                InlineKeyboardButton(
-                    text=f"🔢 {item['quantity']}",
-                    callback_data=f"cart_quantity_{item['cart_id']}"
-                ),
-                InlineKeyboardButton(
-                    text=get_text('increase_quantity', lang),
-                    callback_data=f"cart_increase_{item['cart_id']}"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text=get_text('remove_from_cart', lang),
-                    callback_data=f"remove_cart_{item['cart_id']}"
-                )
-            ]
-        ])
-
-        await message.answer(item_text, reply_markup=keyboard)
-
-    # Umumiy ma'lumot va harakatlar
-    total = sum(item['price'] * item['quantity'] for item in cart_items)
-
-    summary_text = f"\n{'=' * 30}\n"
-    summary_text += f"📊 {get_text('cart_summary', lang)}\n\n"
-    summary_text += f"📦 {get_text('total_items', lang)}: {len(cart_items)} ta\n"
-    summary_text += f"💵 {get_text('total', lang)}: {total:,.0f} {get_text('sum', lang)}"
-
-    await message.answer(
-        summary_text,
-        reply_markup=get_cart_keyboard(lang)
-    )
+    cart_text, keyboard = render_cart_page(summary, lang)
+    await message.answer(cart_text, reply_markup=keyboard)
 
 
-@cart_router.callback_query(F.data.startswith("cart_increase_"))
-async def increase_cart_quantity(callback: CallbackQuery):
+@cart_router.callback_query(F.data.startswith("cart_page_"))
+async def cart_page_handler(callback: CallbackQuery, lang: str):
     """
-    Savat mahsuloti miqdorini oshirish
+    Savat sahifasini almashtirish
+    Format: cart_page_<page>
     """
-    cart_item_id = int(callback.data.split("_")[2])
-    user_id = callback.from_user.id
-
-    user = await get_user(user_id)
-    lang = user.get('language', 'uz')
+    page = int(callback.data.split("_")[2])
 
-    from database.db import update_cart_quantity
-    result = await update_cart_quantity(cart_item_id, user_id, 1)  # +1
+    try:
+        await _edit_cart_message(callback.message, callback.from_user.id, page, lang)
+    except TelegramBadRequest:
+        # Joriy sahifa tugmasi bosildi - xabar o'zgarmadi
+        pass
 
-    if result:
-        # Yangilangan ma'lumotni ko'rsatish
-        from database.db import get_cart_item_by_id
-        item = await get_cart_item_by_id(cart_item_id, user_id, lang)
-
-        if item:
-            item_text = f"📦 {item['name']}\n\n"
-            item_text += f"💰 Narxi: {item['price']:,.0f} {get_text('sum', lang)}\n"
-            item_text += f"🔢 Miqdor: {item['quantity']} ta\n"
-            item_text += f"💵 Jami: {item['price'] * item['quantity']:,.0f} {get_text('sum', lang)}"
-
-            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text=get_text('decrease_quantity', lang),
-                        callback_data=f"cart_decrease_{item['cart_id']}"
-                    ),
-                    InlineKeyboardButton(
-                        text=f"🔢 {item['quantity']}",
-                        callback_data=f"cart_quantity_{item['cart_id']}"
-                    ),
-                    InlineKeyboardButton(
-                        text=get_text('increase_quantity', lang),
-                        callback_data=f"cart_increase_{item['cart_id']}"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text=get_text('remove_from_cart', lang),
-                        callback_data=f"remove_cart_{item['cart_id']}"
-                    )
-                ]
-            ])
-
-            await callback.message.edit_text(item_text, reply_markup=keyboard)
-
-        await callback.answer(get_text('quantity_increased', lang))
-    else:
-        await callback.answer(get_text('cart_error', lang), show_alert=True)
+    await callback.answer()
 
 
-@cart_router.callback_query(F.data.startswith("cart_decrease_"))
-async def decrease_cart_quantity(callback: CallbackQuery):
+@cart_router.callback_query(F.data.startswith("cart_quantity_"))
+async def cart_quantity_handler(callback: CallbackQuery):
     """
-    Savat mahsuloti miqdorini kamaytirish
+    Mahsulot nomi/miqdori tugmasi - faqat ma'lumot uchun
     """
-    cart_item_id = int(callback.data.split("_")[2])
-    user_id = callback.from_user.id
+    await callback.answer()
+
 
-    user = await get_user(user_id)
-    lang = user.get('language', 'uz')
+@cart_router.callback_query(F.data.startswith("cart_increase_"))
+@rate_limit(5, per=2.0, key="cart_quantity")
+async def increase_cart_quantity(callback: CallbackQuery, lang: str):
+    """
+    Savat mahsuloti miqdorini oshirish
+    """
+    await _apply_cart_change(callback, 1, lang)
 
-    from database.db import update_cart_quantity, get_cart_item_by_id
 
-    # Avval joriy miqdorni tekshirish
-    item = await get_cart_item_by_id(cart_item_id, user_id, lang)
+@cart_router.callback_query(F.data.startswith("cart_decrease_"))
+@rate_limit(5, per=2.0, key="cart_quantity")
+async def decrease_cart_quantity(callback: CallbackQuery, lang: str):
+    """
+    Savat mahsuloti miqdorini kamaytirish (1 ta qolganda o'chiriladi)
+    """
+    await _apply_cart_change(callback, -1, lang)
 
-    if not item:
-        await callback.answer(get_text('cart_error', lang), show_alert=True)
-        return
 
-    # Agar miqdor 1 ta bo'lsa, o'chirish
-    if item['quantity'] <= 1:
-        result = await remove_from_cart(cart_item_id, user_id)
-        if result:
-            await callback.message.delete()
-            await callback.answer(get_text('removed_from_cart', lang))
-        else:
-            await callback.answer(get_text('cart_error', lang), show_alert=True)
-        return
+async def _apply_cart_change(callback: CallbackQuery, change: int, lang: str):
+    """
+    Miqdor o'zgarishini debouncer ga berish - tez-tez bosishlar bitta yozuv va
+    bitta tahrirga jamlanadi (utils/cart_debouncer.py)
+    Format: cart_increase_<cart_item_id>_<page> / cart_decrease_<cart_item_id>_<page>
+    """
+    cart_item_id = int(callback.data.split("_")[2])
+    user_id = callback.from_user.id
+    page = _cart_callback_page(callback.data)
 
-    # Miqdorni kamaytirish
-    result = await update_cart_quantity(cart_item_id, user_id, -1)  # -1
+    async def render(message: Message, items: Dict, render_lang: str):
+        await _edit_cart_message(message, user_id, page, render_lang)
 
-    if result:
-        # Yangilangan ma'lumotni ko'rsatish
-        item = await get_cart_item_by_id(cart_item_id, user_id, lang)
-
-        if item:
-            item_text = f"📦 {item['name']}\n\n"
-            item_text += f"💰 Narxi: {item['price']:,.0f} {get_text('sum', lang)}\n"
-            item_text += f"🔢 Miqdor: {item['quantity']} ta\n"
-            item_text += f"💵 Jami: {item['price'] * item['quantity']:,.0f} {get_text('sum', lang)}"
-
-            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text=get_text('decrease_quantity', lang),
-                        callback_data=f"cart_decrease_{item['cart_id']}"
-                    ),
-                    InlineKeyboardButton(
-                        text=f"🔢 {item['quantity']}",
-                        callback_data=f"cart_quantity_{item['cart_id']}"
-                    ),
-                    InlineKeyboardButton(
-                        text=get_text('increase_quantity', lang),
-                        callback_data=f"cart_increase_{item['cart_id']}"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text=get_text('remove_from_cart', lang),
-                        callback_data=f"remove_cart_{item['cart_id']}"
-                    )
-                ]
-            ])
-
-            await callback.message.edit_text(item_text, reply_markup=keyboard)
-
-        await callback.answer(get_text('quantity_decreased', lang))
-    else:
-        await callback.answer(get_text('cart_error', lang), show_alert=True)
+    cart_debouncer.add(callback.message, user_id, cart_item_id, change, lang, render=render)
+    await callback.answer(get_text('quantity_increased' if change > 0 else 'quantity_decreased', lang))
 
 
 @cart_router.callback_query(F.data.startswith("remove_cart_"))
-async def remove_from_cart_handler(callback: CallbackQuery):
+async def remove_from_cart_handler(callback: CallbackQuery, lang: str):
     """
     Mahsulotni savatdan o'chirish
-    Format: remove_cart_<cart_item_id>
+    Format: remove_cart_<cart_item_id>_<page>
     """
     cart_item_id = int(callback.data.split("_")[2])
     user_id = callback.from_user.id
 
-    user = await get_user(user_id)
-    lang = user.get('language', 'uz')
-
     result = await remove_from_cart(cart_item_id, user_id)
 
     if result:
         await callback.answer(get_text('removed_from_cart', lang))
 
-        # Savatni yangilangan holda ko'rsatish
-        cart_items = await get_cart_items(user_id, lang)
-
-        if not cart_items:
-            await callback.message.edit_text(
-                get_text('cart_empty', lang),
-                reply_markup=None
-            )
-            return
-
-        # Yangilangan savatni ko'rsatish
-        cart_text = get_text('cart_title', lang) + "\n\n"
-        total = 0
-
-        for idx, item in enumerate(cart_items, 1):
-            cart_text += f"{idx}. {item['name']}\n"
-            cart_text += f"   💰 {item['price']:,.0f} {get_text('sum', lang)} x {item['quantity']}\n"
-            cart_text += f"   = {item['price'] * item['quantity']:,.0f} {get_text('sum', lang)}\n\n"
-            total += item['price'] * item['quantity']
-
-        cart_text += f"\n💵 {get_text('total', lang)}: {total:,.0f} {get_text('sum', lang)}"
-
-        await callback.message.edit_text(
-            cart_text,
-            reply_markup=get_cart_keyboard(lang)
-        )
+        # Savatni shu xabarning o'zida yangilash
+        await _edit_cart_message(callback.message, user_id, _cart_callback_page(callback.data), lang)
     else:
         await callback.answer(get_text('cart_error', lang), show_alert=True)
 
 
 @cart_router.callback_query(F.data == "clear_cart")
-async def clear_cart_handler(callback: CallbackQuery):
+async def clear_cart_handler(callback: CallbackQuery, lang: str):
     """
     Savatni tozalash
     """
     user_id = callback.from_user.id
-    user = await get_user(user_id)
-    lang = user.get('language', 'uz')
-
     result = await clear_cart(user_id)
 
     if result:
@@ -295,13 +200,10 @@ async def clear_cart_handler(callback: CallbackQuery):
 
 
 @cart_router.callback_query(F.data == "checkout")
-async def start_checkout(callback: CallbackQuery, state: FSMContext):
+async def start_checkout(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     Buyurtma berish jarayonini boshlash
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
 
 
     await callback.message.answer(
@@ -314,13 +216,10 @@ async def start_checkout(callback: CallbackQuery, state: FSMContext):
 
 
 @cart_router.message(OrderStates.waiting_for_phone, F.contact)
-async def process_phone(message: Message, state: FSMContext):
+async def process_phone(message: Message, state: FSMContext, lang: str):
     """
     Telefon raqamini qabul qilish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     phone = message.contact.phone_number
     await state.update_data(phone=phone)
 
@@ -333,13 +232,10 @@ async def process_phone(message: Message, state: FSMContext):
 
 
 @cart_router.message(OrderStates.waiting_for_address, F.text)
-async def process_address(message: Message, state: FSMContext):
+async def process_address(message: Message, state: FSMContext, lang: str):
     """
     Manzilni qabul qilish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     address = message.text
     await state.update_data(address=address)
 
@@ -352,90 +248,59 @@ async def process_address(message: Message, state: FSMContext):
 
 
 @cart_router.callback_query(OrderStates.waiting_for_payment, F.data.startswith("payment_"))
-async def process_payment(callback: CallbackQuery, state: FSMContext):
+async def process_payment(callback: CallbackQuery, state: FSMContext, lang: str):
     """
     To'lov turini tanlash va buyurtmani yakunlash
     Format: payment_<type> (cash, click, payme)
     """
     payment_type = callback.data.split("_")[1]
     user_id = callback.from_user.id
-    user = await get_user(user_id)
-    lang = user.get('language', 'uz')
-
     # State dan ma'lumotlarni olish
     data = await state.get_data()
     phone = data.get('phone')
     address = data.get('address')
 
-    # Savat mahsulotlarini olish
-    cart_items = await get_cart_items(user_id, lang)
-    total = sum(item['price'] * item['quantity'] for item in cart_items)
-
-    # Buyurtma yaratish
-    order = await create_order(
+    # Buyurtma savatdan yaratiladi - narxlar, jami summa, ombor, outbox xabari va
+    # savatni tozalash bitta tranzaksiyada
+    order = await create_order_from_cart(
         user_id=user_id,
         phone=phone,
         address=address,
         payment_type=payment_type,
-        cart_items=cart_items,
-        total=total
+        lang=lang,
+        customer_name=callback.from_user.full_name
     )
 
+    if order and order.get('empty_cart'):
+        await state.clear()
+        await callback.message.edit_text(get_text('cart_empty', lang), reply_markup=None)
+        await callback.answer()
+        return
+
+    if order and order.get('out_of_stock'):
+        # Omborda yetarli mahsulot yo'q - buyurtma yaratilmadi
+        await callback.answer(
+            get_text('order_out_of_stock', lang).format(products=", ".join(order['out_of_stock'])),
+            show_alert=True
+        )
+        return
+
     if order:
+        # Adminlar va operatorlar guruhiga xabarni outbox worker yuboradi
+        from utils.outbox import outbox_worker
+        outbox_worker.wake()
+
         # Foydalanuvchiga xabar
         order_text = get_text('order_created', lang).format(
             order_id=order['id'],
-            total=f"{total:,.0f}"
+            total=f"{order['total']:,.0f}"
         )
 
         await callback.message.edit_text(order_text, reply_markup=None)
 
-        # Savatni tozalash
-        await clear_cart(user_id)
-
-        # Adminga va operatorlar guruhiga xabar yuborish
-        admin_text = f"🆕 Yangi buyurtma #{order['id']}\n\n"
-        admin_text += f"👤 {callback.from_user.full_name}\n"
-        admin_text += f"📞 {phone}\n"
-        admin_text += f"📍 {address}\n"
-        admin_text += f"💳 {payment_type.upper()}\n\n"
-        admin_text += "📦 Mahsulotlar:\n"
-
-        for idx, item in enumerate(cart_items, 1):
-            admin_text += f"{idx}. {item['name']} x {item['quantity']} = {item['price'] * item['quantity']:,.0f} so'm\n"
-
-        admin_text += f"\n💵 Jami: {total:,.0f} so'm"
-
-        # Inline keyboard - operator qabul qilishi uchun
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-        operator_keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="✅ Qabul qilish",
-                    callback_data=f"operator_accept_{order['id']}"
-                )
-            ]
-        ])
-
-        # Adminga yuborish
-        admins = await get_admins()
-        for admin_id in admins:
-            try:
-                await callback.bot.send_message(admin_id, admin_text)
-            except Exception as e:
-                print(f"❌ Admin ga yuborishda xatolik: {e}")
-
-        # Operatorlar guruhiga yuborish
-        from config import OPERATORS_GROUP_ID
-        if OPERATORS_GROUP_ID:
-            try:
-                await callback.bot.send_message(
-                    OPERATORS_GROUP_ID,
-                    admin_text,
-                    reply_markup=operator_keyboard
-                )
-            except Exception as e:
-                print(f"❌ Operatorlar guruhiga yuborishda xatolik: {e}")
+        # Mahsulotlar band qilindi - kam qolganlar monitori oyna oxirida tekshiradi
+        from utils.stock_monitor import low_stock_monitor
+        low_stock_monitor.mark_changed(item['product_id'] for item in order['items'])
 
         await state.clear()
 
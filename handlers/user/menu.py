@@ -7,7 +7,7 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
-from database.db import get_user, get_products_by_category
+from database.db import get_products_by_category
 from keyboards.user_keyboards import (
     get_main_menu_keyboard,
     get_categories_keyboard,
@@ -21,14 +21,11 @@ menu_router = Router()
 
 
 @menu_router.message(F.text.in_(['👨 Erkaklar atirlari', '👨 Мужские духи']))
-async def show_men_category(message: Message):
+async def show_men_category(message: Message, lang: str):
     """
     Erkaklar atirlari kategoriyasini ko'rsatish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
-    products = await get_products_by_category('men', lang)
+    products, has_next = await get_products_by_category('men', lang)
 
     if not products:
         await message.answer(
@@ -39,19 +36,16 @@ async def show_men_category(message: Message):
 
     await message.answer(
         get_text('select_product', lang),
-        reply_markup=get_products_list_keyboard(products, 'men', 0, lang)
+        reply_markup=get_products_list_keyboard(products, 'men', 0, lang, has_next)
     )
 
 
 @menu_router.message(F.text.in_(['👩 Ayollar atirlari', '👩 Женские духи']))
-async def show_women_category(message: Message):
+async def show_women_category(message: Message, lang: str):
     """
     Ayollar atirlari kategoriyasini ko'rsatish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
-    products = await get_products_by_category('women', lang)
+    products, has_next = await get_products_by_category('women', lang)
 
     if not products:
         await message.answer(
@@ -62,19 +56,16 @@ async def show_women_category(message: Message):
 
     await message.answer(
         get_text('select_product', lang),
-        reply_markup=get_products_list_keyboard(products, 'women', 0, lang)
+        reply_markup=get_products_list_keyboard(products, 'women', 0, lang, has_next)
     )
 
 
 @menu_router.message(F.text.in_(['👥 Uniseks atirlar', '👥 Унисекс духи']))
-async def show_unisex_category(message: Message):
+async def show_unisex_category(message: Message, lang: str):
     """
     Uniseks atirlar kategoriyasini ko'rsatish
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
-    products = await get_products_by_category('unisex', lang)
+    products, has_next = await get_products_by_category('unisex', lang)
 
     if not products:
         await message.answer(
@@ -85,18 +76,15 @@ async def show_unisex_category(message: Message):
 
     await message.answer(
         get_text('select_product', lang),
-        reply_markup=get_products_list_keyboard(products, 'unisex', 0, lang)
+        reply_markup=get_products_list_keyboard(products, 'unisex', 0, lang, has_next)
     )
 
 
 @menu_router.message(F.text.in_(['ℹ️ Biz haqimizda', 'ℹ️ О нас']))
-async def show_about_us(message: Message):
+async def show_about_us(message: Message, lang: str):
     """
     Biz haqimizda ma'lumot
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     about_text = get_text('about_us', lang)
     contact_text = get_text('contact_info', lang)
 
@@ -107,13 +95,10 @@ async def show_about_us(message: Message):
 
 
 @menu_router.message(F.text.in_(['⚙️ Sozlamalar', '⚙️ Настройки']))
-async def show_settings(message: Message):
+async def show_settings(message: Message, lang: str):
     """
     Sozlamalar menyusi
     """
-    user = await get_user(message.from_user.id)
-    lang = user.get('language', 'uz')
-
     await message.answer(
         get_text('settings_menu', lang),
         reply_markup=get_settings_keyboard(lang)
@@ -121,13 +106,10 @@ async def show_settings(message: Message):
 
 
 @menu_router.callback_query(F.data == "back_to_main")
-async def back_to_main_menu(callback: CallbackQuery):
+async def back_to_main_menu(callback: CallbackQuery, lang: str):
     """
     Asosiy menyuga qaytish
     """
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
     await callback.message.edit_text(
         get_text('main_menu', lang),
         reply_markup=get_main_menu_keyboard(lang)
@@ -136,22 +118,31 @@ async def back_to_main_menu(callback: CallbackQuery):
 
 
 @menu_router.callback_query(F.data.startswith("page_"))
-async def pagination_handler(callback: CallbackQuery):
+async def pagination_handler(callback: CallbackQuery, lang: str):
     """
     Mahsulotlar ro'yxatida sahifalash (pagination)
-    Format: page_<category>_<page_num>
+    Format: page_<category>_<page_num>_<a|b><product_id>
+    a<id> - shu id dan keyingi sahifa, b<id> - shu id dan oldingi sahifa
     """
     data = callback.data.split("_")
     category = data[1]
     page = int(data[2])
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
-    products = await get_products_by_category(category, lang)
+    after_id = None
+    before_id = None
+    if len(data) > 3:
+        cursor = data[3]
+        if cursor.startswith("b"):
+            before_id = int(cursor[1:])
+        else:
+            after_id = int(cursor[1:])
+
+    products, has_next = await get_products_by_category(
+        category, lang, page=page, after_id=after_id, before_id=before_id
+    )
 
     await callback.message.edit_text(
         get_text('select_product', lang),
-        reply_markup=get_products_list_keyboard(products, category, page, lang)
+        reply_markup=get_products_list_keyboard(products, category, page, lang, has_next)
     )
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
@@ -7,30 +7,29 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, InputMediaPhoto
 from aiogram.fsm.context import FSMContext
 
-from database.db import get_user, get_product_by_id, add_to_cart
+from database.db import get_product_by_id, add_to_cart
 from keyboards.user_keyboards import (
     get_product_detail_keyboard,
     get_products_list_keyboard,
     get_back_to_category_keyboard
 )
 from utils.localization import get_text
+from utils.decorators import rate_limit
 
 product_router = Router()
 
 
 @product_router.callback_query(F.data.startswith("product_"))
-async def show_product_detail(callback: CallbackQuery):
+async def show_product_detail(callback: CallbackQuery, lang: str):
     """
     Mahsulot tafsilotlarini ko'rsatish
-    Format: product_<product_id>_<category>_<page>
+    Format: product_<product_id>_<category>_<page>_<page_after_id>
     """
     data = callback.data.split("_")
     product_id = int(data[1])
     category = data[2]
     page = int(data[3])
-
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
+    page_after_id = int(data[4]) if len(data) > 4 else None
 
     product = await get_product_by_id(product_id, lang)
 
@@ -80,7 +79,8 @@ async def show_product_detail(callback: CallbackQuery):
             reply_markup=get_product_detail_keyboard(
                 product_id, category, page, lang,
                 product.get('ml_variants', []),
-                stock_quantity
+                stock_quantity,
+                page_after_id
             )
         )
     except Exception as e:
@@ -90,7 +90,8 @@ async def show_product_detail(callback: CallbackQuery):
             reply_markup=get_product_detail_keyboard(
                 product_id, category, page, lang,
                 product.get('ml_variants', []),
-                stock_quantity
+                stock_quantity,
+                page_after_id
             )
         )
 
@@ -98,21 +99,19 @@ async def show_product_detail(callback: CallbackQuery):
 
 
 @product_router.callback_query(F.data.startswith("add_cart_"))
-async def add_product_to_cart(callback: CallbackQuery):
+@rate_limit(3, per=2.0)
+async def add_product_to_cart(callback: CallbackQuery, lang: str):
     """
     Mahsulotni savatga qo'shish (bottle yoki ml variant)
     Format: add_cart_<product_id>_bottle
     Format: add_cart_<product_id>_ml_<variant_id>
     """
-    from database.db import get_product_by_id, reduce_product_stock
+    from database.db import get_product_by_id
 
     data = callback.data.split("_")
     product_id = int(data[2])
     user_id = callback.from_user.id
 
-    user = await get_user(user_id)
-    lang = user.get('language', 'uz')
-
     # Variant turini aniqlash
     variant_type = data[3] if len(data) > 3 else "bottle"
     ml_variant_id = int(data[4]) if len(data) > 4 and variant_type == "ml" else None
@@ -143,32 +142,30 @@ async def add_product_to_cart(callback: CallbackQuery):
 
 
 @product_router.callback_query(F.data.startswith("back_category_"))
-async def back_to_category_list(callback: CallbackQuery):
+async def back_to_category_list(callback: CallbackQuery, lang: str):
     """
     Kategoriya ro'yxatiga qaytish
-    Format: back_category_<category>_<page>
+    Format: back_category_<category>_<page>_<page_after_id>
     """
     from database.db import get_products_by_category
 
     data = callback.data.split("_")
     category = data[2]
     page = int(data[3])
+    after_id = int(data[4]) if len(data) > 4 else None
 
-    user = await get_user(callback.from_user.id)
-    lang = user.get('language', 'uz')
-
-    products = await get_products_by_category(category, lang)
+    products, has_next = await get_products_by_category(category, lang, page=page, after_id=after_id)
 
     try:
         await callback.message.delete()
         await callback.message.answer(
             get_text('select_product', lang),
-            reply_markup=get_products_list_keyboard(products, category, page, lang)
+            reply_markup=get_products_list_keyboard(products, category, page, lang, has_next)
         )
     except:
         await callback.message.edit_text(
             get_text('select_product', lang),
-            reply_markup=get_products_list_keyboard(products, category, page, lang)
+            reply_markup=get_products_list_keyboard(products, category, page, lang, has_next)
         )
 
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
@@ -3,12 +3,14 @@
 /start komandasi va til tanlash handleri
 """
 
+from typing import Dict, Optional
+
 from aiogram import Router, F
 from aiogram.filters import CommandStart
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
-from database.db import get_user, create_user, update_user_language
+from database.db import update_user_language
 from keyboards.user_keyboards import get_language_keyboard, get_main_menu_keyboard
 from utils.localization import get_text
 
@@ -16,30 +18,20 @@ start_router = Router()
 
 
 @start_router.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(message: Message, state: FSMContext, lang: str, user: Optional[Dict] = None):
     """
-    /start komandasi - foydalanuvchini saqlab, til tanlashni taklif qilish
+    /start komandasi - til hali tanlanmagan bo'lsa til tanlashni taklif qilish
+    (foydalanuvchi UserLoaderMiddleware tomonidan allaqachon yaratilgan - birinchi
+    update tugma bosish yoki boshqa xabar bo'lgan bo'lishi mumkin)
     """
-    user_id = message.from_user.id
-    user = await get_user(user_id)
-
-    if not user:
-        # Yangi foydalanuvchi - bazaga qo'shamiz (default: uz)
-        await create_user(
-            user_id=user_id,
-            username=message.from_user.username or "unknown",
-            full_name=message.from_user.full_name or "User",
-            language="uz"
-        )
-
-        # Til tanlash menyusini ko'rsatamiz
+    if not user or not user.get('language_selected'):
+        # Til tanlanmagan - til tanlash menyusini ko'rsatamiz
         await message.answer(
             "🇺🇿 Tilni tanlang / 🇷🇺 Выберите язык:",
             reply_markup=get_language_keyboard()
         )
     else:
         # Mavjud foydalanuvchi - asosiy menyuni ko'rsatamiz
-        lang = user.get('language', 'uz')
         welcome_text = get_text('welcome', lang).format(
             name=message.from_user.full_name
         )
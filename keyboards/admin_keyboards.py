@@ -121,18 +121,16 @@ def get_products_admin_keyboard(products: List[Dict], page: int,
     return keyboard
 
 
-def get_orders_keyboard(orders: List[Dict], page: int, lang: str, filter_type: str = 'all') -> InlineKeyboardMarkup:
+def get_orders_keyboard(orders: List[Dict], page: int, lang: str, filter_type: str = 'all',
+                        has_next: bool = False) -> InlineKeyboardMarkup:
     """
     Buyurtmalar ro'yxati klaviaturasi
+    orders - faqat joriy sahifadagi buyurtmalar (database da sahifalangan)
     """
-    ITEMS_PER_PAGE = 10
-    start_idx = page * ITEMS_PER_PAGE
-    end_idx = start_idx + ITEMS_PER_PAGE
-
     buttons = []
 
     # Buyurtmalar tugmalari
-    for order in orders[start_idx:end_idx]:
+    for order in orders:
         status_emoji = {
             'new': '🆕',
             'processing': '⏳',
@@ -152,16 +150,17 @@ def get_orders_keyboard(orders: List[Dict], page: int, lang: str, filter_type: s
     # Pagination tugmalari
     nav_buttons = []
 
-    if page > 0:
+    # Kursor: b<id> - shu buyurtmadan oldingi sahifa, a<id> - keyingi sahifa
+    if page > 0 and orders:
         nav_buttons.append(
             InlineKeyboardButton(text="◀️ " + get_text('previous', lang),
-                                 callback_data=f"orders_filter_{filter_type}_{page - 1}")
+                                 callback_data=f"orders_filter_{filter_type}_{page - 1}_b{orders[0]['id']}")
         )
 
-    if end_idx < len(orders):
+    if has_next and orders:
         nav_buttons.append(
             InlineKeyboardButton(text=get_text('next', lang) + " ▶️",
-                                 callback_data=f"orders_filter_{filter_type}_{page + 1}")
+                                 callback_data=f"orders_filter_{filter_type}_{page + 1}_a{orders[-1]['id']}")
         )
 
     if nav_buttons:
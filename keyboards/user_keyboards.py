@@ -49,38 +49,40 @@ def get_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
 
 
 def get_products_list_keyboard(products: List[Dict], category: str,
-                               page: int, lang: str) -> InlineKeyboardMarkup:
+                               page: int, lang: str,
+                               has_next: bool = False) -> InlineKeyboardMarkup:
     """
     Mahsulotlar ro'yxati klaviaturasi (pagination bilan)
+    products - faqat joriy sahifa mahsulotlari (bazada sahifalangan)
+    Sahifalar id bo'yicha keyset kursor bilan: a<id> - keyingi, b<id> - oldingi sahifa
     """
-    ITEMS_PER_PAGE = 5
-    start_idx = page * ITEMS_PER_PAGE
-    end_idx = start_idx + ITEMS_PER_PAGE
-
     buttons = []
 
+    # Joriy sahifaga qaytish uchun kursor (sahifaning birinchi mahsulotidan oldingi id)
+    page_after_id = products[0]['id'] - 1 if products else 0
+
     # Mahsulotlar tugmalari
-    for product in products[start_idx:end_idx]:
+    for product in products:
         buttons.append([
             InlineKeyboardButton(
                 text=f"{product['name']} - {product['price']:,.0f} {get_text('sum', lang)}",
-                callback_data=f"product_{product['id']}_{category}_{page}"
+                callback_data=f"product_{product['id']}_{category}_{page}_{page_after_id}"
             )
         ])
 
     # Pagination tugmalari
     nav_buttons = []
 
-    if page > 0:
+    if page > 0 and products:
         nav_buttons.append(
             InlineKeyboardButton(text="◀️ " + get_text('previous', lang),
-                                 callback_data=f"page_{category}_{page - 1}")
+                                 callback_data=f"page_{category}_{page - 1}_b{products[0]['id']}")
         )
 
-    if end_idx < len(products):
+    if has_next and products:
         nav_buttons.append(
             InlineKeyboardButton(text=get_text('next', lang) + " ▶️",
-                                 callback_data=f"page_{category}_{page + 1}")
+                                 callback_data=f"page_{category}_{page + 1}_a{products[-1]['id']}")
         )
 
     if nav_buttons:
@@ -99,7 +101,8 @@ def get_products_list_keyboard(products: List[Dict], category: str,
 def get_product_detail_keyboard(product_id: int, category: str,
                                 page: int, lang: str,
                                 ml_variants: List[Dict] = None,
-                                stock_quantity: int = 0) -> InlineKeyboardMarkup:
+                                stock_quantity: int = 0,
+                                page_after_id: int = None) -> InlineKeyboardMarkup:
     """
     Mahsulot tafsilotlari klaviaturasi (ML variantlar bilan)
     """
@@ -131,10 +134,14 @@ def get_product_detail_keyboard(product_id: int, category: str,
             InlineKeyboardButton(text=out_of_stock_text, callback_data="out_of_stock")
         ])
 
-    # Orqaga qaytish tugmasi
+    # Orqaga qaytish tugmasi (sahifa kursori bilan)
+    back_data = f"back_category_{category}_{page}"
+    if page_after_id is not None:
+        back_data += f"_{page_after_id}"
+
     buttons.append([
         InlineKeyboardButton(text=get_text('back', lang),
-                             callback_data=f"back_category_{category}_{page}")
+                             callback_data=back_data)
     ])
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -175,6 +182,57 @@ def get_cart_keyboard(lang: str) -> InlineKeyboardMarkup:
     return keyboard
 
 
+def get_cart_page_keyboard(items: List[Dict], page: int, total_pages: int,
+                           lang: str) -> InlineKeyboardMarkup:
+    """
+    Bitta xabarli savat klaviaturasi
+    items - faqat joriy sahifa mahsulotlari; har biri uchun -/+/o'chirish tugmalari
+    Tugmalarda sahifa raqami bor - tahrirdan keyin shu sahifa qayta chiziladi
+    """
+    buttons = []
+
+    for item in items:
+        buttons.append([
+            InlineKeyboardButton(text="➖",
+                                 callback_data=f"cart_decrease_{item['cart_id']}_{page}"),
+            InlineKeyboardButton(text=f"{item['quantity']} × {item['name']}",
+                                 callback_data=f"cart_quantity_{item['cart_id']}"),
+            InlineKeyboardButton(text="➕",
+                                 callback_data=f"cart_increase_{item['cart_id']}_{page}"),
+            InlineKeyboardButton(text="❌",
+                                 callback_data=f"remove_cart_{item['cart_id']}_{page}")
+        ])
+
+    # Pagination tugmalari
+    if total_pages > 1:
+        nav_buttons = []
+
+        if page > 0:
+            nav_buttons.append(
+                InlineKeyboardButton(text="◀️ " + get_text('previous', lang),
+                                     callback_data=f"cart_page_{page - 1}")
+            )
+
+        nav_buttons.append(
+            InlineKeyboardButton(text=f"{page + 1}/{total_pages}",
+                                 callback_data=f"cart_page_{page}")
+        )
+
+        if page < total_pages - 1:
+            nav_buttons.append(
+                InlineKeyboardButton(text=get_text('next', lang) + " ▶️",
+                                     callback_data=f"cart_page_{page + 1}")
+            )
+
+        buttons.append(nav_buttons)
+
+    # Umumiy amallar
+    buttons.extend(get_cart_keyboard(lang).inline_keyboard)
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    return keyboard
+
+
 def get_checkout_keyboard(lang: str) -> InlineKeyboardMarkup:
     """
     Buyurtma berish klaviaturasi
@@ -0,0 +1,27 @@
+# middlewares/__init__.py
+"""
+Barcha middlewarelarni shu yerda ro'yxatga olamiz
+"""
+
+from .user_loader import UserLoaderMiddleware
+from .throttling import ThrottlingMiddleware, throttling_middleware
+
+
+def register_all_middlewares(dp):
+    """
+    Barcha middlewarelarni dispatcher ga qo'shish
+    """
+    # Har bir update uchun foydalanuvchini bir marta yuklash
+    dp.update.outer_middleware(UserLoaderMiddleware())
+
+    # @rate_limit bilan belgilangan handlerlar uchun token bucket
+    dp.message.middleware(throttling_middleware)
+    dp.callback_query.middleware(throttling_middleware)
+
+
+__all__ = [
+    'UserLoaderMiddleware',
+    'ThrottlingMiddleware',
+    'throttling_middleware',
+    'register_all_middlewares'
+]
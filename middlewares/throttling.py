@@ -0,0 +1,159 @@
+# middlewares/throttling.py
+"""
+Token-bucket asosidagi throttling middleware
+
+Handler @rate_limit(rate, per, key) bilan belgilanadi (utils/decorators.py).
+Har bir (foydalanuvchi, amal) juftligi uchun bucket: sig'imi `rate` token,
+`per` soniyada to'liq to'ladi. Token qolmasa update handlerga yetib bormaydi.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject, CallbackQuery, User as TelegramUser
+
+from config import logger, THROTTLE_BACKEND, THROTTLE_IDLE_TTL, REDIS_URL
+from utils.localization import get_text
+
+
+class MemoryTokenBucket:
+    """
+    Jarayon ichidagi token bucket lar
+    Har bir faol kalit uchun bitta (tokens, vaqt) juftligi saqlanadi.
+    Uzoq vaqt ishlatilmagan kalitlar (bucket allaqachon to'lgan) o'chiriladi.
+    """
+
+    def __init__(self, idle_ttl: float = THROTTLE_IDLE_TTL):
+        self.idle_ttl = idle_ttl
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: Hashable, rate: float, per: float) -> bool:
+        """
+        Bitta token olish - olinsa True, bucket bo'sh bo'lsa False
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (rate, now))
+
+        # O'tgan vaqt uchun tokenlarni to'ldirish
+        tokens = min(rate, tokens + (now - updated_at) * rate / per)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        # Oxirgi ishlatilgan kalit oxirida turadi - eskilari boshidan o'chiriladi
+        self._buckets[key] = (tokens, now)
+        self._evict(now)
+        return allowed
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < self.idle_ttl:
+                break
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisTokenBucket:
+    """
+    Redis dagi token bucket lar (bir nechta bot jarayoni uchun umumiy holat)
+    Hisob-kitob Lua skriptda atomar bajariladi
+    """
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local per = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local ttl = tonumber(ARGV[4])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or rate
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(rate, tokens + (now - ts) * rate / per)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], ttl)
+    return allowed
+    """
+
+    def __init__(self, url: str = REDIS_URL, idle_ttl: float = THROTTLE_IDLE_TTL):
+        from redis.asyncio import Redis
+
+        self.idle_ttl = int(idle_ttl)
+        self._redis = Redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def consume(self, key: Hashable, rate: float, per: float) -> bool:
+        redis_key = "throttle:" + ":".join(str(part) for part in key)
+        return bool(await self._script(keys=[redis_key], args=[rate, per, time.time(), self.idle_ttl]))
+
+
+def create_token_bucket():
+    """
+    THROTTLE_BACKEND sozlamasiga ko'ra bucket saqlash joyini tanlash
+    """
+    if THROTTLE_BACKEND == "redis":
+        try:
+            return RedisTokenBucket()
+        except ImportError:
+            logger.error("❌ THROTTLE_BACKEND=redis uchun 'redis' kutubxonasini o'rnating, memory ishlatiladi")
+    return MemoryTokenBucket()
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    @rate_limit bilan belgilangan handlerlarni cheklash (inner middleware)
+    """
+
+    def __init__(self, bucket=None):
+        self.bucket = bucket if bucket is not None else create_token_bucket()
+        self.allowed = 0
+        self.throttled: Dict[str, int] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        limit: Optional[Dict[str, Any]] = get_flag(data, 'rate_limit')
+        from_user: TelegramUser = data.get('event_from_user')
+
+        if not limit or not from_user:
+            return await handler(event, data)
+
+        action = limit['key'] or data['handler'].callback.__name__
+
+        if await self.bucket.consume((from_user.id, action), limit['rate'], limit['per']):
+            self.allowed += 1
+            return await handler(event, data)
+
+        # Cheklandi - handler chaqirilmaydi
+        self.throttled[action] = self.throttled.get(action, 0) + 1
+        logger.debug(f"Throttled: user={from_user.id} action={action}")
+
+        if isinstance(event, CallbackQuery):
+            await event.answer(get_text('too_many_requests', data.get('lang', 'uz')))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Throttling statistikasi (monitoring uchun)
+        """
+        return {
+            'allowed': self.allowed,
+            'throttled': dict(self.throttled),
+            'throttled_total': sum(self.throttled.values()),
+            'active_buckets': len(self.bucket) if isinstance(self.bucket, MemoryTokenBucket) else None
+        }
+
+
+# Global middleware (register_all_middlewares ulaydi, /metrics statistikasini o'qiydi)
+throttling_middleware = ThrottlingMiddleware()
@@ -0,0 +1,43 @@
+# middlewares/user_loader.py
+"""
+Foydalanuvchi kontekstini har bir update uchun bir marta yuklovchi middleware
+
+aiogram ning o'z UserContextMiddleware i (event_from_user ni aniqlaydi) Dispatcher da
+allaqachon ro'yxatdan o'tgan - bu middleware uning natijasidan foydalanadi.
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User as TelegramUser
+
+from config import DEFAULT_LANGUAGE
+from database.db import get_or_create_user
+
+
+class UserLoaderMiddleware(BaseMiddleware):
+    """
+    Update dan foydalanuvchini aniqlab, bazadan bir marta oladi (yo'q bo'lsa yaratadi)
+    va handlerlarga `user`, `lang` argumentlarini uzatadi
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        from_user: TelegramUser = data.get('event_from_user')
+
+        if from_user:
+            user, _ = await get_or_create_user(
+                user_id=from_user.id,
+                username=from_user.username or "unknown",
+                full_name=from_user.full_name or "User",
+                language=DEFAULT_LANGUAGE
+            )
+
+            data['user'] = user
+            data['lang'] = (user or {}).get('language') or DEFAULT_LANGUAGE
+
+        return await handler(event, data)
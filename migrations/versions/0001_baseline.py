@@ -0,0 +1,106 @@
+"""Baseline schema: users, products, cart, orders, order items and ML variants
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Migratsiyalardan oldin init_db() yaratgan bazada jadvallar allaqachon bor
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(255), nullable=True),
+            sa.Column('full_name', sa.String(255), nullable=False),
+            sa.Column('language', sa.String(2), nullable=True),
+            sa.Column('is_admin', sa.Boolean(), nullable=True),
+            sa.Column('role', sa.String(20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True)
+        )
+        op.create_index('ix_users_user_id', 'users', ['user_id'], unique=True)
+
+    if 'products' not in existing:
+        op.create_table(
+            'products',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name_uz', sa.String(255), nullable=False),
+            sa.Column('name_ru', sa.String(255), nullable=False),
+            sa.Column('description_uz', sa.Text(), nullable=False),
+            sa.Column('description_ru', sa.Text(), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('category', sa.String(50), nullable=False),
+            sa.Column('image_url', sa.String(500), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('stock_quantity', sa.Integer(), nullable=False),
+            sa.Column('low_stock_threshold', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True)
+        )
+
+    if 'product_ml_variants' not in existing:
+        op.create_table(
+            'product_ml_variants',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id'), nullable=False),
+            sa.Column('ml_amount', sa.Integer(), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True)
+        )
+
+    if 'cart' not in existing:
+        op.create_table(
+            'cart',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=False),
+            sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id'), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True)
+        )
+
+    if 'orders' not in existing:
+        op.create_table(
+            'orders',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=False),
+            sa.Column('phone', sa.String(20), nullable=False),
+            sa.Column('address', sa.Text(), nullable=False),
+            sa.Column('payment_type', sa.String(20), nullable=False),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('status', sa.String(20), nullable=True),
+            sa.Column('is_paid', sa.Boolean(), nullable=True),
+            sa.Column('operator_id', sa.Integer(), nullable=True),
+            sa.Column('operator_username', sa.String(255), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True)
+        )
+
+    if 'order_items' not in existing:
+        op.create_table(
+            'order_items',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id'), nullable=False),
+            sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id'), nullable=False),
+            sa.Column('product_name', sa.String(255), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('variant_type', sa.String(20), nullable=True),
+            sa.Column('ml_variant_id', sa.Integer(), sa.ForeignKey('product_ml_variants.id'), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    for table in ('order_items', 'orders', 'cart', 'product_ml_variants', 'products', 'users'):
+        op.drop_table(table)
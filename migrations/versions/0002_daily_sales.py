@@ -0,0 +1,35 @@
+"""Daily sales rollup table for statistics
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() yangi bazada jadvalni allaqachon yaratgan bo'lishi mumkin
+    if 'daily_sales' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    # Mavjud buyurtmalar uchun yig'indi: python -m database.backfill
+    op.create_table(
+        'daily_sales',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('status', sa.String(20), primary_key=True),
+        sa.Column('operator_id', sa.Integer(), primary_key=True),
+        sa.Column('operator_username', sa.String(255), nullable=True),
+        sa.Column('orders_count', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_sales')
@@ -0,0 +1,38 @@
+"""Query indexes for orders, cart, order items, ML variants and daily sales
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+# (index nomi, jadval, ustunlar)
+INDEXES = [
+    ('ix_products_category_active_id', 'products', ['category', 'is_active', 'id']),
+    ('ix_cart_user_product', 'cart', ['user_id', 'product_id']),
+    ('ix_orders_created_at_id', 'orders', ['created_at', 'id']),
+    ('ix_orders_status_created_at_id', 'orders', ['status', 'created_at', 'id']),
+    ('ix_orders_operator_created_at', 'orders', ['operator_id', 'created_at']),
+    ('ix_orders_user_id', 'orders', ['user_id']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_ml_variants_product_active_ml', 'product_ml_variants', ['product_id', 'is_active', 'ml_amount']),
+    ('ix_daily_sales_operator_day', 'daily_sales', ['operator_id', 'day']),
+]
+
+
+def upgrade() -> None:
+    # init_db() yaratgan bazada indekslar allaqachon bo'lishi mumkin
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
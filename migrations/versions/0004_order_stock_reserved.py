@@ -0,0 +1,32 @@
+"""Add orders.stock_reserved flag for checkout stock reservation
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() yangi bazada ustunni allaqachon yaratgan bo'lishi mumkin
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('orders')]
+    if 'stock_reserved' in columns:
+        return
+
+    # Mavjud buyurtmalar uchun ombor band qilinmagan (yakunlanganda kamaytiriladi)
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.add_column(
+            sa.Column('stock_reserved', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_column('stock_reserved')
@@ -0,0 +1,37 @@
+"""Outbox table for notifications written in the order transaction
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() yangi bazada jadvalni allaqachon yaratgan bo'lishi mumkin
+    if 'outbox' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'outbox',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('event_type', sa.String(50), nullable=False),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('available_at', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True)
+        )
+
+    op.create_index(
+        'ix_outbox_status_available', 'outbox', ['status', 'available_at', 'id'], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('outbox')
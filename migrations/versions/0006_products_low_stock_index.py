@@ -0,0 +1,27 @@
+"""Partial index for the low-stock / out-of-stock report
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_products_low_stock', 'products', ['stock_quantity', 'id'],
+        sqlite_where=sa.text('is_active = 1 AND stock_quantity <= low_stock_threshold'),
+        postgresql_where=sa.text('is_active AND stock_quantity <= low_stock_threshold'),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_low_stock', table_name='products', if_exists=True)
@@ -0,0 +1,32 @@
+"""FSM states table for the SQL-backed FSM storage
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() yangi bazada jadvalni allaqachon yaratgan bo'lishi mumkin
+    if 'fsm_states' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'fsm_states',
+            sa.Column('key', sa.String(255), primary_key=True),
+            sa.Column('state', sa.String(255), nullable=True),
+            sa.Column('data', sa.Text(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False)
+        )
+
+    op.create_index('ix_fsm_states_expires_at', 'fsm_states', ['expires_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_table('fsm_states')
@@ -0,0 +1,34 @@
+"""Add users.language_selected flag for the /start language picker
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() yangi bazada ustunni allaqachon yaratgan bo'lishi mumkin
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')]
+    if 'language_selected' in columns:
+        return
+
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(
+            sa.Column('language_selected', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+    # Mavjud foydalanuvchilar /start orqali yaratilgan va til tanlash menyusini ko'rgan
+    op.execute(sa.text("UPDATE users SET language_selected = :selected").bindparams(selected=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('language_selected')
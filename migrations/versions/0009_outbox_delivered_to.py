@@ -0,0 +1,29 @@
+"""Add outbox.delivered_to for per-recipient delivery tracking
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() yangi bazada ustunni allaqachon yaratgan bo'lishi mumkin
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('outbox')]
+    if 'delivered_to' in columns:
+        return
+
+    with op.batch_alter_table('outbox') as batch_op:
+        batch_op.add_column(sa.Column('delivered_to', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('outbox') as batch_op:
+        batch_op.drop_column('delivered_to')
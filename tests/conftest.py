@@ -0,0 +1,79 @@
+# tests/conftest.py
+"""
+Testlar uchun umumiy sozlamalar
+
+config.py import qilinishidan oldin DATABASE_URL vaqtinchalik SQLite faylga yo'naltiriladi.
+Asinxron funksiyalar run fixture orqali asyncio.run bilan bajariladi.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="atir-bot-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+os.environ["DATABASE_READ_URL"] = ""
+
+from database import db  # noqa: E402
+from database.models import Base  # noqa: E402
+
+
+@pytest.fixture
+def run():
+    """
+    Korutinani yangi event loop da bajarish
+    Pool ulanishlari loop ga bog'langan, shuning uchun oxirida engine lar yopiladi.
+    """
+    def _run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await db.engine.dispose()
+                if db.read_engine is not None:
+                    await db.read_engine.dispose()
+
+        return asyncio.run(main())
+
+    return _run
+
+
+@pytest.fixture
+def fresh_db(run):
+    """
+    Bo'sh jadvallar va tozalangan keshlar
+    """
+    async def reset():
+        async with db.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    run(reset())
+    db.user_cache.clear()
+    db.catalog_cache.bump()
+    return db
+
+
+@pytest.fixture
+def user(run, fresh_db):
+    """
+    Test foydalanuvchisi (Telegram user_id)
+    """
+    run(db.create_user(1001, "tester", "Test User"))
+    return 1001
+
+
+async def create_test_product(stock: int = 10, price: float = 100000, category: str = 'men') -> int:
+    """
+    Test mahsuloti yaratish, id qaytaradi
+    """
+    product = await db.create_product(
+        "Atir", "Духи", "Tavsif", "Описание", price, category, "file-id", stock_quantity=stock
+    )
+    return product['id']
@@ -0,0 +1,132 @@
+# tests/test_cart_debouncer.py
+"""
+CartDebouncer: bosishlar jamlanadi, partiyalar navbat bilan yoziladi va oxirgi
+tahrir database dagi oxirgi holatni ko'rsatadi
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from conftest import create_test_product
+from database import db
+from utils.cart_debouncer import CartDebouncer
+
+WINDOW = 0.05
+
+
+def fake_message(message_id=1):
+    return SimpleNamespace(chat=SimpleNamespace(id=1001), message_id=message_id)
+
+
+async def cart_item(user_id, quantity=1):
+    product_id = await create_test_product()
+    await db.add_to_cart(user_id, product_id, quantity)
+    return (await db.get_cart_summary(user_id, 'uz'))['items'][0]['cart_id']
+
+
+async def cart_quantity(user_id):
+    items = (await db.get_cart_summary(user_id, 'uz'))['items']
+    return items[0]['quantity'] if items else 0
+
+
+class Renders:
+    """
+    render chaqiruvlari: har birida yangilangan qatorlar miqdori
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.quantities = []
+
+    async def __call__(self, message, items, lang):
+        await asyncio.sleep(self.delay)
+        self.quantities.append({
+            cart_id: item['quantity'] if item else None for cart_id, item in items.items()
+        })
+
+
+def test_taps_in_window_are_written_once(run, user):
+    async def scenario():
+        cart_id = await cart_item(user)
+        debouncer, render = CartDebouncer(window=WINDOW), Renders()
+
+        for _ in range(4):
+            debouncer.add(fake_message(), user, cart_id, +1, 'uz', render)
+        await asyncio.sleep(WINDOW * 4)
+
+        return cart_id, render.quantities, debouncer.stats(), await cart_quantity(user)
+
+    cart_id, renders, stats, quantity = run(scenario())
+    assert renders == [{cart_id: 5}]
+    assert stats == {'taps': 4, 'flushes': 1, 'pending': 0}
+    assert quantity == 5
+
+
+def test_batches_are_applied_in_order_and_last_render_is_final(run, user):
+    async def scenario():
+        cart_id = await cart_item(user)
+        debouncer = CartDebouncer(window=WINDOW)
+        # Sekin render: ikkinchi partiya birinchisi tugashini kutadi
+        render = Renders(delay=WINDOW * 3)
+
+        for _ in range(3):
+            debouncer.add(fake_message(), user, cart_id, +1, 'uz', render)
+        await asyncio.sleep(WINDOW * 1.5)
+
+        for _ in range(2):
+            debouncer.add(fake_message(), user, cart_id, +1, 'uz', render)
+        debouncer.add(fake_message(), user, cart_id, -1, 'uz', render)
+        await asyncio.sleep(WINDOW * 10)
+
+        return cart_id, render.quantities, await cart_quantity(user)
+
+    cart_id, renders, quantity = run(scenario())
+    assert renders == [{cart_id: 4}, {cart_id: 5}]
+    assert quantity == 5
+
+
+def test_net_zero_taps_do_not_touch_database(run, user):
+    async def scenario():
+        cart_id = await cart_item(user)
+        debouncer, render = CartDebouncer(window=WINDOW), Renders()
+
+        debouncer.add(fake_message(), user, cart_id, +1, 'uz', render)
+        debouncer.add(fake_message(), user, cart_id, -1, 'uz', render)
+        await asyncio.sleep(WINDOW * 4)
+
+        return render.quantities, debouncer.flushes, await cart_quantity(user)
+
+    assert run(scenario()) == ([], 0, 1)
+
+
+def test_decrement_to_zero_removes_item(run, user):
+    async def scenario():
+        cart_id = await cart_item(user, quantity=2)
+        debouncer, render = CartDebouncer(window=WINDOW), Renders()
+
+        for _ in range(3):
+            debouncer.add(fake_message(), user, cart_id, -1, 'uz', render)
+        await asyncio.sleep(WINDOW * 4)
+
+        return cart_id, render.quantities, await cart_quantity(user)
+
+    cart_id, renders, quantity = run(scenario())
+    assert renders == [{cart_id: 0}]
+    assert quantity == 0
+
+
+def test_stop_flushes_pending_changes(run, user):
+    async def scenario():
+        cart_id = await cart_item(user)
+        debouncer, render = CartDebouncer(window=60), Renders()
+
+        debouncer.add(fake_message(), user, cart_id, +1, 'uz', render)
+        debouncer.add(fake_message(message_id=2), user, cart_id, +1, 'uz', render)
+        await debouncer.stop()
+
+        return render.quantities, debouncer.stats(), await cart_quantity(user)
+
+    renders, stats, quantity = run(scenario())
+    assert len(renders) == 2
+    assert stats['pending'] == 0
+    assert quantity == 3
@@ -0,0 +1,94 @@
+# tests/test_catalog_cache.py
+"""
+Katalog keshi: buyurtma faqat o'zgargan mahsulotlar yozuvlarini bekor qiladi,
+keshdan qaytgan qiymatni o'zgartirish keshni buzmaydi
+"""
+
+from conftest import create_test_product
+from database import db
+from database.cache import VersionedCache
+from database.metrics import db_metrics
+
+
+def fetch_count(name):
+    return db_metrics.histograms[name].count
+
+
+def test_order_invalidates_only_touched_products(run, user):
+    async def main():
+        sold = await create_test_product(stock=10, category='men')
+        other = await create_test_product(stock=10, category='men')
+        women = await create_test_product(stock=10, category='women')
+
+        # Keshni to'ldirish
+        await db.get_products_by_category('men', 'uz')
+        await db.get_products_by_category('women', 'uz')
+        await db.get_product_by_id(other, 'uz')
+
+        await db.add_to_cart(user, sold, 3)
+        order = await db.create_order_from_cart(user, "+998901234567", "Manzil", "cash", 'uz')
+        assert order['id']
+
+        products_before = fetch_count('_fetch_product')
+        pages_before = fetch_count('_fetch_products_page')
+
+        # Boshqa mahsulot kartasi va boshqa kategoriya sahifasi keshda qoladi
+        assert (await db.get_product_by_id(other, 'uz'))['stock_quantity'] == 10
+        assert len((await db.get_products_by_category('women', 'uz'))[0]) == 1
+        assert fetch_count('_fetch_product') == products_before
+        assert fetch_count('_fetch_products_page') == pages_before
+
+        # Sotilgan mahsulot kartasi va u turgan sahifa yangi ombor bilan qayta o'qiladi
+        assert (await db.get_product_by_id(sold, 'uz'))['stock_quantity'] == 7
+        page, _ = await db.get_products_by_category('men', 'uz')
+        assert {product['id']: product['stock_quantity'] for product in page} == {sold: 7, other: 10}
+        assert fetch_count('_fetch_product') == products_before + 1
+        assert fetch_count('_fetch_products_page') == pages_before + 1
+
+        assert (await db.get_inventory_summary())['total_units'] == 27
+
+    run(main())
+
+
+def test_cached_values_are_copies(run, user):
+    async def main():
+        product_id = await create_test_product(stock=5)
+        await db.add_ml_variant(product_id, 10, 20000)
+
+        product = await db.get_product_by_id(product_id, 'uz')
+        product['stock_quantity'] = 0
+        product['ml_variants'].clear()
+
+        page, _ = await db.get_products_by_category('men', 'uz')
+        page[0]['name'] = "O'zgartirildi"
+
+        summary = await db.get_inventory_summary()
+        summary['total_units'] = -1
+
+        cached = await db.get_product_by_id(product_id, 'uz')
+        assert cached['stock_quantity'] == 5
+        assert len(cached['ml_variants']) == 1
+        assert (await db.get_products_by_category('men', 'uz'))[0][0]['name'] == "Atir"
+        assert (await db.get_inventory_summary())['total_units'] == 5
+
+    run(main())
+
+
+def test_invalidated_tag_rejects_inflight_load():
+    cache = VersionedCache()
+
+    version = cache.version
+    cache.invalidate_tags([('product', 1)])
+
+    # Yuklash boshlangandan keyin bekor qilingan teg - natija saqlanmaydi
+    assert not cache.set('card-1', {'stock': 1}, version, [('product', 1)])
+    # Boshqa mahsulot teglari ta'sirlanmaydi
+    assert cache.set('card-2', {'stock': 2}, version, [('product', 2)])
+    assert cache.get('card-2') == {'stock': 2}
+
+    cache.invalidate_tags([('product', 2)])
+    assert cache.get('card-2') is None
+
+    version = cache.version
+    cache.bump()
+    assert not cache.set('card-3', {'stock': 3}, version, [('product', 3)])
@@ -0,0 +1,56 @@
+# tests/test_checkout.py
+"""
+Savatdan checkout: narxlar va jami summa buyurtma tranzaksiyasida hisoblanadi
+"""
+
+from sqlalchemy import update
+
+from conftest import create_test_product
+from database import db
+from database.models import Product
+
+
+async def checkout(user_id):
+    return await db.create_order_from_cart(user_id, "+998901234567", "Toshkent", "cash", 'uz', "Test User")
+
+
+def test_order_uses_commit_time_prices_and_empties_cart(run, user):
+    async def scenario():
+        first = await create_test_product(price=100000)
+        second = await create_test_product(price=50000)
+        await db.add_to_cart(user, first, 2)
+        await db.add_to_cart(user, second, 1)
+
+        # Savat ko'rsatilgandan keyin narx o'zgardi - buyurtma yangi narx bilan
+        async with db.Session() as session:
+            await session.execute(update(Product).where(Product.id == second).values(price=70000))
+            await session.commit()
+
+        order = await checkout(user)
+        saved = await db.get_order_by_id(order['id'])
+        return order, saved, await db.get_cart_summary(user, 'uz')
+
+    order, saved, cart = run(scenario())
+    assert order['total'] == saved['total'] == 2 * 100000 + 70000
+    assert [(item['quantity'], item['price']) for item in saved['items']] == [(2, 100000), (1, 70000)]
+    assert cart['items'] == []
+
+
+def test_out_of_stock_keeps_cart(run, user):
+    async def scenario():
+        product_id = await create_test_product(stock=1)
+        await db.add_to_cart(user, product_id, 3)
+        return await checkout(user), await db.get_cart_summary(user, 'uz')
+
+    order, cart = run(scenario())
+    assert order == {'out_of_stock': ['Atir']}
+    assert [item['quantity'] for item in cart['items']] == [3]
+
+
+def test_empty_cart_creates_no_order(run, user):
+    async def scenario():
+        return await checkout(user), await db.get_orders_page('all')
+
+    order, (orders, _) = run(scenario())
+    assert order == {'empty_cart': True}
+    assert orders == []
@@ -0,0 +1,88 @@
+# tests/test_fsm_storage.py
+"""
+SQLStorage: navbatdagi yozuvlar bitta foydalanuvchining xatosi yoki flush xatoligi tufayli yo'qolmaydi,
+o'qishlar keshdan beriladi
+"""
+
+import datetime
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from utils import fsm_storage
+from database.db import get_fsm_record
+from utils.fsm_storage import SQLStorage
+
+
+def storage_key(user_id):
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+
+def test_unencodable_data_fails_only_for_its_caller(run, fresh_db):
+    async def scenario():
+        storage = SQLStorage(flush_interval=3600)
+        await storage.set_state(storage_key(1), "Checkout:phone")
+        await storage.set_data(storage_key(1), {'phone': '+998901234567'})
+
+        with pytest.raises(TypeError):
+            await storage.set_data(storage_key(2), {'when': datetime.datetime.now()})
+
+        await storage.close()
+
+        # Yangi storage faqat database dan o'qiydi
+        fresh = SQLStorage()
+        return (await fresh.get_state(storage_key(1)), await fresh.get_data(storage_key(1)),
+                await fresh.get_data(storage_key(2)))
+
+    state, data, other = run(scenario())
+    assert state == "Checkout:phone"
+    assert data == {'phone': '+998901234567'}
+    assert other == {}
+
+
+def test_flush_keeps_batch_when_save_raises(run, fresh_db, monkeypatch):
+    async def failing_save(records, ttl):
+        raise RuntimeError("database unavailable")
+
+    async def scenario():
+        storage = SQLStorage(flush_interval=3600)
+        await storage.set_data(storage_key(1), {'step': 1})
+
+        monkeypatch.setattr(fsm_storage, "save_fsm_records", failing_save)
+        with pytest.raises(RuntimeError):
+            await storage.flush()
+        monkeypatch.undo()
+
+        assert await storage.get_data(storage_key(1)) == {'step': 1}
+        await storage.close()
+        return await SQLStorage().get_data(storage_key(1))
+
+    assert run(scenario()) == {'step': 1}
+
+
+def test_reads_served_from_cache(run, fresh_db, monkeypatch):
+    loads = []
+
+    async def counting_get(key):
+        loads.append(key)
+        return await get_fsm_record(key)
+
+    monkeypatch.setattr(fsm_storage, "get_fsm_record", counting_get)
+
+    async def scenario():
+        storage = SQLStorage(flush_interval=3600)
+
+        # Holatsiz foydalanuvchi: bitta database so'rovi, keyingi update lar keshdan
+        for _ in range(5):
+            assert await storage.get_state(storage_key(1)) is None
+
+        # Yozilgan holat flush dan keyin ham keshdan o'qiladi
+        await storage.set_state(storage_key(2), "Checkout:phone")
+        await storage.flush()
+        for _ in range(5):
+            assert await storage.get_state(storage_key(2)) == "Checkout:phone"
+
+        await storage.close()
+
+    run(scenario())
+    assert loads == [fsm_storage._storage_key(storage_key(1)), fsm_storage._storage_key(storage_key(2))]
@@ -0,0 +1,67 @@
+# tests/test_language_selection.py
+"""
+/start til tanlash menyusi: foydalanuvchi birinchi marta qaysi update bilan kelganidan qat'i
+nazar, til tanlanmaguncha ko'rsatiladi
+"""
+
+from types import SimpleNamespace
+
+from database import db
+from handlers.user.start import cmd_start
+from middlewares.user_loader import UserLoaderMiddleware
+
+PICKER = "🇺🇿 Tilni tanlang / 🇷🇺 Выберите язык:"
+
+
+class FakeMessage:
+    def __init__(self, user_id):
+        self.from_user = SimpleNamespace(id=user_id, full_name="Test User")
+        self.answers = []
+
+    async def answer(self, text, **kwargs):
+        self.answers.append(text)
+
+
+async def load_user(user_id):
+    """
+    UserLoaderMiddleware orqali update o'tkazish, handlerga uzatilgan data qaytariladi
+    """
+    data = {'event_from_user': SimpleNamespace(id=user_id, username="tester", full_name="Test User")}
+
+    async def handler(event, handler_data):
+        return handler_data
+
+    return await UserLoaderMiddleware()(handler, None, data)
+
+
+async def start(user_id):
+    data = await load_user(user_id)
+    message = FakeMessage(user_id)
+    await cmd_start(message, None, data['lang'], data['user'])
+    return message.answers
+
+
+def test_picker_shown_when_first_update_is_not_start(run, fresh_db):
+    async def main():
+        # Birinchi update - tugma bosish: foydalanuvchi yaratiladi, til tanlanmagan
+        data = await load_user(2001)
+        assert data['user']['language_selected'] is False
+
+        assert await start(2001) == [PICKER]
+
+        # Til tanlangandan keyin /start asosiy menyuni ko'rsatadi
+        assert await db.update_user_language(2001, 'ru')
+        answers = await start(2001)
+        assert answers != [PICKER]
+        assert data['lang'] == 'uz' and (await load_user(2001))['lang'] == 'ru'
+
+    run(main())
+
+
+def test_picker_shown_until_language_selected(run, fresh_db):
+    async def main():
+        assert await start(2002) == [PICKER]
+        # Til tanlanmadi - keyingi /start da ham menyu ko'rsatiladi
+        assert await start(2002) == [PICKER]
+
+    run(main())
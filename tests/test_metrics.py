@@ -0,0 +1,81 @@
+# tests/test_metrics.py
+"""
+Metrikalar: kesh hitlari va ichki @timed chaqiruvlar navbatga qo'shilmaydi,
+/metrics matni yig'ilgan metrikalardan tuziladi
+"""
+
+import asyncio
+
+from conftest import create_test_product
+from database import db
+from database.metrics import DBMetrics, db_metrics
+from utils.monitoring import collect_metrics, format_metrics
+
+
+def test_nested_timed_calls_counted_once(run):
+    metrics = DBMetrics()
+    seen = []
+
+    @metrics.timed
+    async def inner():
+        seen.append(metrics.in_flight)
+
+    @metrics.timed
+    async def outer():
+        await asyncio.sleep(0)
+        await inner()
+
+    async def main():
+        await asyncio.gather(outer(), outer(), outer())
+
+    run(main())
+
+    # inner tashqi chaqiruv ichida - navbat oshmaydi
+    assert seen == [3, 2, 1]
+    assert metrics.in_flight == 0
+    assert metrics.max_in_flight == 3
+    assert metrics.histograms['inner'].count == 3
+    assert metrics.histograms['outer'].count == 3
+
+
+def test_cache_hits_not_timed(run, user):
+    product_id = run(create_test_product())
+    db.user_cache.clear()
+    db.catalog_cache.bump()
+    histograms = db_metrics.histograms
+
+    def count(name):
+        return histograms[name].count
+
+    before_user = count('_fetch_user')
+    before_product = count('_fetch_product')
+
+    async def main():
+        for _ in range(5):
+            await db.get_user(user)
+            await db.get_product_by_id(product_id, 'uz')
+
+    run(main())
+
+    # Faqat birinchi chaqiruv database ga boradi, qolganlari keshdan
+    assert count('_fetch_user') - before_user == 1
+    assert count('_fetch_product') - before_product == 1
+    assert 'get_user' not in histograms
+    assert 'get_product_by_id' not in histograms
+
+
+def test_format_metrics(run, user):
+    run(db.get_statistics())
+
+    async def main():
+        return collect_metrics()
+
+    metrics = run(main())
+    # db_metrics butun sessiya bo'yicha yig'iladi - top bilan kesilmasligi uchun hammasi
+    text = format_metrics(metrics, top=len(metrics['db']['calls']))
+
+    assert metrics['db']['in_flight'] == 0
+    assert 'get_statistics' in metrics['db']['calls']
+    assert "get_statistics" in text
+    assert "Pool" in text
+    assert "Katalog keshi" in text
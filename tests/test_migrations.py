@@ -0,0 +1,74 @@
+# tests/test_migrations.py
+"""
+Alembic migratsiyalari: bo'sh baza, migratsiyalardan oldingi baza va init_db() yaratgan baza
+uchun alembic upgrade head bir xil sxemaga olib kelishi kerak
+"""
+
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect, text
+
+from conftest import ROOT
+from database.models import Base
+
+
+def alembic(db_path, *args):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    subprocess.run(
+        [sys.executable, "-m", "alembic", *args], cwd=ROOT, env=env, check=True, capture_output=True
+    )
+
+
+def schema(db_path):
+    inspector = inspect(create_engine(f"sqlite:///{db_path}"))
+    return {
+        table: (
+            sorted(column['name'] for column in inspector.get_columns(table)),
+            sorted(index['name'] for index in inspector.get_indexes(table))
+        )
+        for table in inspector.get_table_names() if table != 'alembic_version'
+    }
+
+
+def expected_schema(tmp_path):
+    path = tmp_path / "models.db"
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    return schema(path)
+
+
+def test_upgrade_fresh_database(tmp_path):
+    path = tmp_path / "fresh.db"
+    alembic(path, "upgrade", "head")
+    assert schema(path) == expected_schema(tmp_path)
+
+
+def test_upgrade_pre_migration_database(tmp_path):
+    # Migratsiyalardan oldingi init_db() bazasi: asosiy jadvallar bor, alembic_version yo'q
+    path = tmp_path / "legacy.db"
+    alembic(path, "upgrade", "0001")
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(text("INSERT INTO users (id, user_id, full_name) VALUES (1, 1001, 'Test')"))
+        conn.execute(text(
+            "INSERT INTO orders (id, user_id, phone, address, payment_type, total, status) "
+            "VALUES (1, 1001, '+998', 'Toshkent', 'cash', 100, 'new')"
+        ))
+    engine.dispose()
+
+    alembic(path, "upgrade", "head")
+    assert schema(path) == expected_schema(tmp_path)
+
+    with create_engine(f"sqlite:///{path}").connect() as conn:
+        assert conn.execute(text("SELECT stock_reserved FROM orders WHERE id = 1")).scalar() == 0
+        # Mavjud foydalanuvchi /start orqali yaratilgan - til tanlash qayta ko'rsatilmaydi
+        assert conn.execute(text("SELECT language_selected FROM users WHERE id = 1")).scalar() == 1
+
+
+def test_upgrade_database_created_by_init_db(tmp_path):
+    path = tmp_path / "current.db"
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    alembic(path, "upgrade", "head")
+    assert schema(path) == expected_schema(tmp_path)
@@ -0,0 +1,110 @@
+# tests/test_notifier.py
+"""
+Notifier: RetryAfter, bloklangan chat va tezlik limitlari (soxta Bot bilan)
+"""
+
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from utils.notifier import Notifier
+
+# Tez ishlashi uchun kichik oraliqlar
+GLOBAL_RATE = 50
+CHAT_INTERVAL = 0.1
+GROUP_INTERVAL = 0.2
+TOLERANCE = 0.01
+
+
+class FakeBot:
+    """
+    send_message chaqiruvlarini yozib boradi; errors[chat_id] - navbatdagi chaqiruvlarda ko'tariladigan xatolar
+    """
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.calls = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls.append((chat_id, time.monotonic()))
+        errors = self.errors.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+
+
+def method(chat_id):
+    return SendMessage(chat_id=chat_id, text="test")
+
+
+def run_notifier(bot, scenario, max_retries=3):
+    async def main():
+        notifier = Notifier(concurrency=4, global_rate=GLOBAL_RATE, chat_interval=CHAT_INTERVAL,
+                            group_interval=GROUP_INTERVAL, max_retries=max_retries)
+        notifier.start(bot)
+        try:
+            return await scenario(notifier)
+        finally:
+            await notifier.stop()
+
+    return asyncio.run(main())
+
+
+def call_times(bot, chat_id):
+    return [at for cid, at in bot.calls if cid == chat_id]
+
+
+def test_retry_after_waits_and_resends():
+    bot = FakeBot({1: [TelegramRetryAfter(method(1), "Flood control", retry_after=1)]})
+
+    result = run_notifier(bot, lambda notifier: notifier.send(1, "salom"))
+
+    first, second = call_times(bot, 1)
+    assert result is True
+    assert second - first >= 1 - TOLERANCE
+
+
+def test_blocked_chat_fails_without_retry_and_others_delivered():
+    bot = FakeBot({2: [TelegramForbiddenError(method(2), "bot was blocked by the user")]})
+
+    result = run_notifier(bot, lambda notifier: notifier.broadcast([1, 2, 3], "salom"))
+
+    assert result == {1: True, 2: False, 3: True}
+    assert len(call_times(bot, 2)) == 1
+
+
+def test_retries_are_limited():
+    bot = FakeBot({1: [TelegramRetryAfter(method(1), "Flood control", retry_after=0) for _ in range(5)]})
+
+    result = run_notifier(bot, lambda notifier: notifier.send(1, "salom"), max_retries=2)
+
+    assert result is False
+    assert len(call_times(bot, 1)) == 3
+
+
+def test_per_chat_and_group_intervals():
+    bot = FakeBot()
+
+    async def scenario(notifier):
+        futures = [notifier.send(chat_id, "salom") for _ in range(3) for chat_id in (1, -100)]
+        return await asyncio.gather(*futures)
+
+    assert all(run_notifier(bot, scenario))
+
+    for chat_id, interval in ((1, CHAT_INTERVAL), (-100, GROUP_INTERVAL)):
+        times = call_times(bot, chat_id)
+        assert len(times) == 3
+        assert all(b - a >= interval - TOLERANCE for a, b in zip(times, times[1:]))
+
+
+def test_global_rate_limit():
+    bot = FakeBot()
+    chats = list(range(1, 21))
+
+    result = run_notifier(bot, lambda notifier: notifier.broadcast(chats, "salom"))
+
+    assert all(result.values())
+    times = sorted(at for _, at in bot.calls)
+    # 20 ta xabar soniyasiga GLOBAL_RATE tadan tez yuborilmaydi
+    assert times[-1] - times[0] >= (len(chats) - 1) / GLOBAL_RATE - TOLERANCE
@@ -0,0 +1,129 @@
+# tests/test_outbox.py
+"""
+Outbox hodisalarini band qilish: bir vaqtda ishlagan worker lar bir hodisani ikki marta olmaydi,
+qayta urinishda xabar faqat yetmagan qabul qiluvchilarga yuboriladi
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from database import db
+from database.models import Outbox
+
+
+NEW_ORDER = {
+    'order_id': 1, 'customer_name': "Test", 'phone': "+998901234567", 'address': "Toshkent",
+    'payment_type': 'cash', 'total': 100000, 'items': [{'name': "Atir", 'quantity': 1, 'price': 100000}]
+}
+
+
+async def add_events(count):
+    async with db.Session() as session:
+        for _ in range(count):
+            db._add_outbox_event(session, 'new_order', NEW_ORDER)
+        await session.commit()
+
+
+def test_concurrent_claims_do_not_overlap(run, fresh_db):
+    async def scenario():
+        await add_events(40)
+        batches = await asyncio.gather(*[db.claim_outbox_events(limit=7) for _ in range(10)])
+        return [event['id'] for batch in batches for event in batch]
+
+    claimed = run(scenario())
+    assert len(claimed) == len(set(claimed)) == 40
+
+
+def test_expired_claim_is_taken_again(run, fresh_db):
+    async def scenario():
+        await add_events(1)
+        first = await db.claim_outbox_events(lease=0)
+        second = await db.claim_outbox_events(lease=300)
+        third = await db.claim_outbox_events(lease=300)
+        return first, second, third
+
+    first, second, third = run(scenario())
+    assert [event['id'] for event in first] == [event['id'] for event in second]
+    assert third == []
+
+
+def test_retry_returns_event_to_pending(run, fresh_db):
+    async def scenario():
+        await add_events(1)
+        event = (await db.claim_outbox_events())[0]
+        await db.retry_outbox_event(event['id'], delay=0, max_attempts=2)
+        again = await db.claim_outbox_events()
+        await db.retry_outbox_event(event['id'], delay=0, max_attempts=2)
+        async with db.Session() as session:
+            status = (await session.get(Outbox, event['id'])).status
+        return again, status, await db.claim_outbox_events()
+
+    again, status, last = run(scenario())
+    assert again[0]['attempts'] == 1
+    assert status == 'failed'
+    assert last == []
+
+
+class FakeNotifier:
+    """
+    broadcast chaqiruvlarini yozib boradi, failing dagi chatlarga yuborish muvaffaqiyatsiz
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.failing = set()
+
+    def broadcast(self, chat_ids, text, **kwargs):
+        self.sent.extend(chat_ids)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result({chat_id: chat_id not in self.failing for chat_id in chat_ids})
+        return future
+
+
+def test_retry_sends_only_to_failed_recipients(run, fresh_db, monkeypatch):
+    import utils.outbox as outbox
+
+    fake = FakeNotifier()
+    fake.failing = {-100}
+
+    async def get_admins():
+        return [1001, 1002]
+
+    monkeypatch.setattr(outbox, 'notifier', fake)
+    monkeypatch.setattr(outbox, 'get_admins', get_admins)
+    monkeypatch.setattr(outbox, 'OPERATORS_GROUP_ID', -100)
+
+    async def make_available():
+        async with db.Session() as session:
+            await session.execute(update(Outbox).values(available_at=datetime.utcnow()))
+            await session.commit()
+
+    async def remaining():
+        async with db.Session() as session:
+            return (await session.scalars(select(Outbox))).all()
+
+    async def scenario():
+        worker = outbox.OutboxWorker()
+        await add_events(1)
+
+        # Adminlarga yetdi, guruhga yetmadi - hodisa qoladi
+        await worker.process_batch()
+        first_sent = sorted(fake.sent)
+        events = await remaining()
+
+        # Qayta urinish faqat guruhga
+        fake.sent.clear()
+        fake.failing.clear()
+        await make_available()
+        await worker.process_batch()
+        return first_sent, events, list(fake.sent), await remaining()
+
+    first_sent, events, second_sent, left = run(scenario())
+    assert first_sent == [-100, 1001, 1002]
+    assert len(events) == 1 and events[0].status == 'pending'
+    assert json.loads(events[0].delivered_to) == [1001, 1002]
+    assert second_sent == [-100]
+    assert left == []
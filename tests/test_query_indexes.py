@@ -0,0 +1,73 @@
+# tests/test_query_indexes.py
+"""
+Asosiy so'rovlar indekslardan foydalanishini tekshirish (EXPLAIN QUERY PLAN)
+
+db.py funksiyalari bajargan SQL ushlab olinadi va xuddi shu parametrlar bilan
+SQLite so'rov rejasi olinadi: jadval to'liq skanerlanmasligi kerak.
+"""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import event
+
+from conftest import TEST_DB_PATH, create_test_product
+from database import db
+
+
+def query_plans(run, coro):
+    """
+    Korutina bajargan so'rovlarning rejalari (bitta matn)
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        run(coro)
+    finally:
+        event.remove(db.engine.sync_engine, "before_cursor_execute", capture)
+
+    assert statements, "so'rov bajarilmadi"
+
+    with sqlite3.connect(TEST_DB_PATH) as conn:
+        plans = []
+        for statement, parameters in statements:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            plans.append("\n".join(row[-1] for row in rows))
+    return "\n".join(plans)
+
+
+@pytest.fixture
+def catalog(run, user):
+    async def seed():
+        product_id = await create_test_product(stock=2)
+        await db.add_ml_variant(product_id, 10, 50000)
+        await db.add_to_cart(user, product_id, 1)
+        await db.create_order(user, "+998901234567", "Toshkent", "cash",
+                              [{'product_id': product_id, 'name': 'Atir', 'quantity': 1, 'price': 100000}],
+                              100000)
+        return product_id
+
+    return run(seed())
+
+
+@pytest.mark.parametrize("call, index", [
+    (lambda uid, pid: db.get_orders_page('new'), 'ix_orders_status_created_at_id'),
+    (lambda uid, pid: db.get_orders_page('all'), 'ix_orders_created_at_id'),
+    (lambda uid, pid: db.get_orders_page('today'), 'ix_orders_created_at_id'),
+    (lambda uid, pid: db.get_order_by_id(1), 'ix_order_items_order_id'),
+    (lambda uid, pid: db.get_cart_summary(uid, 'uz'), 'ix_cart_user_product'),
+    (lambda uid, pid: db.get_products_by_category('men', 'uz'), 'ix_products_category_active_id'),
+    (lambda uid, pid: db.get_products_by_category('men', 'uz'), 'ix_ml_variants_product_active_ml'),
+    (lambda uid, pid: db.get_stock_report('uz'), 'ix_products_low_stock'),
+    (lambda uid, pid: db.get_operator_statistics(7, 'week'), 'ix_daily_sales_operator_day'),
+    (lambda uid, pid: db.claim_outbox_events(), 'ix_outbox_status_available'),
+])
+def test_hot_query_uses_index(run, user, catalog, call, index):
+    db.catalog_cache.bump()
+    plan = query_plans(run, call(user, catalog))
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
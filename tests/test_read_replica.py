@@ -0,0 +1,82 @@
+# tests/test_read_replica.py
+"""
+Hisobot so'rovlari read replica ga yo'naltiriladi, replica ishlamasa primary ishlatiladi
+Replica sifatida ikkinchi SQLite fayl ishlatiladi (undagi ma'lumot primary dan farq qiladi).
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from conftest import create_test_product
+from database import db
+from database.engine import create_db_engine
+from database.models import Base, Order, User
+
+
+def use_replica(monkeypatch, url):
+    engine = create_db_engine(url)
+    monkeypatch.setattr(db, "read_engine", engine)
+    monkeypatch.setattr(db, "ReadSession", async_sessionmaker(engine, expire_on_commit=False))
+    monkeypatch.setattr(db, "_replica_down_until", 0.0)
+    return engine
+
+
+async def seed_replica(engine, phone):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with db.ReadSession() as session:
+        session.add(User(user_id=1001, full_name="Replica User"))
+        session.add(Order(user_id=1001, phone=phone, address="Toshkent", payment_type="cash",
+                          total=100000, status='new', created_at=datetime.utcnow()))
+        await session.commit()
+
+
+async def order_phones():
+    orders, _ = await db.get_orders_page('all')
+    return [order['phone'] for order in orders]
+
+
+@pytest.fixture
+def primary_order(run, user):
+    async def place():
+        product_id = await create_test_product()
+        items = [{'product_id': product_id, 'name': 'Atir', 'quantity': 1, 'price': 100000}]
+        await db.create_order(user, "primary", "Toshkent", "cash", items, 100000)
+
+    run(place())
+
+
+def test_reports_read_from_replica(run, primary_order, monkeypatch, tmp_path):
+    replica = use_replica(monkeypatch, f"sqlite:///{tmp_path / 'replica.db'}")
+
+    async def scenario():
+        await seed_replica(replica, "replica")
+        # Yozuvdan keyin o'qiladigan joylar primary dan foydalanadi
+        return await order_phones(), (await db.get_order_by_id(1))['phone']
+
+    assert run(scenario()) == (["replica"], "primary")
+
+
+def test_unavailable_replica_falls_back_to_primary(run, primary_order, monkeypatch, tmp_path):
+    # Mavjud bo'lmagan papkadagi fayl - ulanish xatolik beradi
+    use_replica(monkeypatch, f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    attempts = []
+    original = db.ReadSession
+
+    def counting_session():
+        attempts.append(1)
+        return original()
+
+    monkeypatch.setattr(db, "ReadSession", counting_session)
+
+    async def scenario():
+        return await order_phones(), await order_phones()
+
+    first, second = run(scenario())
+    assert first == second == ["primary"]
+    # Replica ishlamayapti deb belgilandi - ikkinchi so'rovda qayta urinilmaydi
+    assert len(attempts) == 1
+    assert db._replica_down_until > 0
@@ -0,0 +1,41 @@
+# tests/test_statistics.py
+"""
+daily_sales yig'indisidan olinadigan statistika
+"""
+
+from conftest import create_test_product
+from database import db
+
+
+async def place_order(user_id, product_id, price=100000):
+    order = await db.create_order(
+        user_id, "+998901234567", "Toshkent", "cash",
+        [{'product_id': product_id, 'name': 'Atir', 'quantity': 1, 'price': price}], price
+    )
+    return order['id']
+
+
+def test_top_operators_skip_orders_moved_away(run, user):
+    async def scenario():
+        product_id = await create_test_product()
+        order_id = await place_order(user, product_id)
+        await db.assign_operator_to_order(order_id, 7, "op")
+        await db.update_order_status(order_id, 'completed')
+        await db.update_order_status(order_id, 'cancelled')
+        return await db.get_statistics('today')
+
+    stats = run(scenario())
+    assert stats['top_operators'] == []
+    assert stats['total_orders'] == 1
+    assert stats['completed_orders'] == 0
+
+
+def test_today_filter_matches_statistics(run, user):
+    async def scenario():
+        product_id = await create_test_product()
+        await place_order(user, product_id)
+        orders, _ = await db.get_orders_page('today')
+        return orders, await db.get_statistics('today')
+
+    orders, stats = run(scenario())
+    assert len(orders) == stats['total_orders'] == 1
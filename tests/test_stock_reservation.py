@@ -0,0 +1,71 @@
+# tests/test_stock_reservation.py
+"""
+Checkout da ombor band qilish: parallel buyurtmalar omborni manfiyga tushirmaydi
+"""
+
+import asyncio
+
+from conftest import create_test_product
+from database import db
+
+
+def order_items(product_id, quantity=1):
+    return [{'product_id': product_id, 'name': 'Atir', 'quantity': quantity, 'price': 100000}]
+
+
+async def place_order(user_id, product_id, quantity=1):
+    return await db.create_order(user_id, "+998901234567", "Toshkent", "cash",
+                                 order_items(product_id, quantity), 100000 * quantity)
+
+
+async def stock_of(product_id):
+    return (await db.get_stock_levels([product_id]))[0]['stock_quantity']
+
+
+def test_concurrent_orders_never_oversell(run, user):
+    stock, buyers = 5, 20
+
+    async def scenario():
+        product_id = await create_test_product(stock=stock)
+        results = await asyncio.gather(*[place_order(user, product_id) for _ in range(buyers)])
+        return results, await stock_of(product_id)
+
+    results, final_stock = run(scenario())
+    placed = [result for result in results if result and 'id' in result]
+    rejected = [result for result in results if result and 'out_of_stock' in result]
+
+    assert len(placed) == stock
+    assert len(rejected) == buyers - stock
+    assert final_stock == 0
+
+
+def test_cancel_releases_and_cancelled_order_stays_cancelled(run, user):
+    async def scenario():
+        product_id = await create_test_product(stock=3)
+        order = await place_order(user, product_id, quantity=2)
+        after_order = await stock_of(product_id)
+
+        assert await db.update_order_status(order['id'], 'cancelled')
+        after_cancel = await stock_of(product_id)
+
+        # Bekor qilingan buyurtmani yakunlab bo'lmaydi (ombor qayta kamaytirilmagan bo'lardi)
+        reopened = await db.update_order_status(order['id'], 'completed')
+        status = (await db.get_order_by_id(order['id']))['status']
+        return after_order, after_cancel, reopened, status, await stock_of(product_id)
+
+    after_order, after_cancel, reopened, status, final_stock = run(scenario())
+    assert (after_order, after_cancel) == (1, 3)
+    assert reopened is False
+    assert status == 'cancelled'
+    assert final_stock == 3
+
+
+def test_completing_reserved_order_does_not_deduct_twice(run, user):
+    async def scenario():
+        product_id = await create_test_product(stock=3)
+        order = await place_order(user, product_id)
+        for status in ('processing', 'delivering', 'completed'):
+            assert await db.update_order_status(order['id'], status)
+        return await stock_of(product_id)
+
+    assert run(scenario()) == 2
@@ -0,0 +1,215 @@
+# tests/test_throttling.py
+"""
+Token bucket throttling: burst cheklanadi, tokenlar vaqt o'tishi bilan to'ladi, har bir
+(foydalanuvchi, amal) alohida bucket, @rate_limit siz handlerlar cheklanmaydi
+"""
+
+import os
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from middlewares import throttling
+from middlewares.throttling import MemoryTokenBucket, RedisTokenBucket, ThrottlingMiddleware
+from utils.decorators import rate_limit
+
+
+class FakeClock:
+    """
+    time moduli o'rniga: monotonic() va time() qo'lda suriladi
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(throttling, 'time', fake)
+    return fake
+
+
+async def consume_many(bucket, key, count, rate=3, per=1.0):
+    return [await bucket.consume(key, rate, per) for _ in range(count)]
+
+
+def test_burst_is_rejected(run, clock):
+    bucket = MemoryTokenBucket()
+    assert run(consume_many(bucket, (1, 'add'), 5)) == [True, True, True, False, False]
+
+
+def test_tokens_refill_over_time(run, clock):
+    bucket = MemoryTokenBucket()
+
+    async def scenario():
+        results = await consume_many(bucket, (1, 'add'), 4)
+
+        # 1 soniyada 3 token: 0.4 s dan keyin bitta token to'lgan
+        clock.now += 0.4
+        results += await consume_many(bucket, (1, 'add'), 2)
+
+        # Uzoq kutish ham sig'imdan (rate) ortiq token bermaydi
+        clock.now += 60
+        results += await consume_many(bucket, (1, 'add'), 4)
+        return results
+
+    assert run(scenario()) == [True, True, True, False, True, False, True, True, True, False]
+
+
+def test_separate_buckets_per_key(run, clock):
+    bucket = MemoryTokenBucket()
+
+    async def scenario():
+        exhausted = await consume_many(bucket, (1, 'add'), 4)
+        other_action = await consume_many(bucket, (1, 'checkout'), 1)
+        other_user = await consume_many(bucket, (2, 'add'), 1)
+        return exhausted, other_action, other_user
+
+    exhausted, other_action, other_user = run(scenario())
+    assert exhausted[-1] is False
+    assert other_action == [True]
+    assert other_user == [True]
+
+
+def test_idle_buckets_are_evicted(run, clock):
+    bucket = MemoryTokenBucket(idle_ttl=60)
+
+    async def scenario():
+        for user_id in range(10):
+            await bucket.consume((user_id, 'add'), 3, 1.0)
+        clock.now += 61
+        await bucket.consume((99, 'add'), 3, 1.0)
+
+    run(scenario())
+    assert len(bucket) == 1
+
+
+class FakeScript:
+    """
+    Redis Lua skripti o'rniga: chaqiruvlarni yozadi, natija navbatdan olinadi
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.results = []
+
+    async def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        return self.results.pop(0)
+
+
+def fake_redis_module(script):
+    class Redis:
+        @classmethod
+        def from_url(cls, url):
+            return SimpleNamespace(register_script=lambda source: script)
+
+    module = types.ModuleType('redis.asyncio')
+    module.Redis = Redis
+    return module
+
+
+def test_redis_bucket_key_and_arguments(run, clock, monkeypatch):
+    script = FakeScript()
+    script.results = [1, 0]
+    monkeypatch.setitem(sys.modules, 'redis', types.ModuleType('redis'))
+    monkeypatch.setitem(sys.modules, 'redis.asyncio', fake_redis_module(script))
+
+    bucket = RedisTokenBucket(url="redis://test", idle_ttl=600)
+
+    async def scenario():
+        return [await bucket.consume((1001, 'add_to_cart'), 3, 1.0),
+                await bucket.consume((1001, 'add_to_cart'), 3, 1.0)]
+
+    assert run(scenario()) == [True, False]
+    assert script.calls[0] == (["throttle:1001:add_to_cart"], [3, 1.0, clock.now, 600])
+
+
+@pytest.mark.skipif(not os.getenv("TEST_REDIS_URL"), reason="TEST_REDIS_URL berilmagan")
+def test_redis_bucket_against_server(run):
+    pytest.importorskip("redis")
+    bucket = RedisTokenBucket(url=os.environ["TEST_REDIS_URL"])
+    key = (os.getpid(), 'test_throttling')
+
+    async def scenario():
+        await bucket._redis.delete("throttle:" + ":".join(str(part) for part in key))
+        burst = await consume_many(bucket, key, 4, rate=3, per=60)
+        other = await bucket.consume((os.getpid(), 'other'), 3, 60)
+        return burst, other
+
+    burst, other = run(scenario())
+    assert burst == [True, True, True, False]
+    assert other is True
+
+
+def make_data(callback, user_id=1001):
+    return {
+        'handler': HandlerObject(callback=callback),
+        'event_from_user': SimpleNamespace(id=user_id)
+    }
+
+
+async def call_middleware(middleware, data, times):
+    calls = []
+
+    async def handler(event, handler_data):
+        calls.append(1)
+
+    for _ in range(times):
+        await middleware(handler, SimpleNamespace(), data)
+    return len(calls)
+
+
+def test_middleware_limits_flagged_handlers(run, clock):
+    @rate_limit(limit=2, per=10)
+    async def add_to_cart(message):
+        pass
+
+    middleware = ThrottlingMiddleware(bucket=MemoryTokenBucket())
+    handled = run(call_middleware(middleware, make_data(add_to_cart), 5))
+
+    assert handled == 2
+    assert middleware.stats()['allowed'] == 2
+    assert middleware.stats()['throttled'] == {'add_to_cart': 3}
+
+
+def test_middleware_skips_handlers_without_flag(run, clock):
+    async def show_menu(message):
+        pass
+
+    middleware = ThrottlingMiddleware(bucket=MemoryTokenBucket())
+    handled = run(call_middleware(middleware, make_data(show_menu), 20))
+
+    assert handled == 20
+    assert middleware.stats()['allowed'] == 0
+    assert middleware.stats()['throttled_total'] == 0
+    assert middleware.stats()['active_buckets'] == 0
+
+
+def test_middleware_shared_limit_key(run, clock):
+    @rate_limit(limit=1, per=10, key='cart')
+    async def increase(message):
+        pass
+
+    @rate_limit(limit=1, per=10, key='cart')
+    async def decrease(message):
+        pass
+
+    middleware = ThrottlingMiddleware(bucket=MemoryTokenBucket())
+
+    async def scenario():
+        return (await call_middleware(middleware, make_data(increase), 1),
+                await call_middleware(middleware, make_data(decrease), 1))
+
+    assert run(scenario()) == (1, 0)
+    assert middleware.stats()['throttled'] == {'cart': 1}
@@ -0,0 +1,48 @@
+# tests/test_webhook.py
+"""
+Webhook server: secret token siz update qabul qilinmaydi
+"""
+
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.webhook import SECRET_HEADER, WebhookServer
+
+UPDATE = {"update_id": 1, "message": {
+    "message_id": 1, "date": 0, "chat": {"id": 1001, "type": "private"},
+    "from": {"id": 1001, "is_bot": False, "first_name": "Test"}, "text": "/start"
+}}
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.updates = []
+
+    async def feed_update(self, bot, update):
+        self.updates.append(update.update_id)
+
+
+def test_empty_secret_is_rejected():
+    with pytest.raises(ValueError):
+        WebhookServer(FakeDispatcher(), bot=None, secret="")
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({}, 401),
+    ({SECRET_HEADER: "wrong"}, 401),
+    ({SECRET_HEADER: "s3cret"}, 200),
+])
+def test_secret_token_is_checked(headers, status):
+    dp = FakeDispatcher()
+
+    async def scenario():
+        server = WebhookServer(dp, bot=None, secret="s3cret")
+        async with TestClient(TestServer(server.create_app())) as client:
+            response = await client.post("/webhook", json=UPDATE, headers=headers)
+            await server.drain()
+            return response.status
+
+    assert asyncio.run(scenario()) == status
+    assert dp.updates == ([1] if status == 200 else [])
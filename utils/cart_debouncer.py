@@ -0,0 +1,145 @@
+# utils/cart_debouncer.py
+"""
+Savat tugmalari (-/+) uchun debouncer
+
+Bitta xabardagi ketma-ket bosishlar CART_DEBOUNCE_WINDOW oynasida jamlanadi:
+oyna oxirida har bir savat qatori uchun yig'indi o'zgarish bitta UPDATE bilan
+yoziladi va xabar bir marta tahrirlanadi. Bir xabarning partiyalari navbat bilan
+(lock ostida) ishlanadi, shuning uchun oxirgi tahrir database dagi oxirgi holatni ko'rsatadi.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+
+from config import logger, CART_DEBOUNCE_WINDOW
+from database.db import change_cart_quantity
+
+# (chat_id, message_id)
+MessageKey = Tuple[int, int]
+
+# render(message, {cart_item_id: yangilangan qator yoki None}, lang)
+RenderCallback = Callable[[Message, Dict[int, Optional[Dict]], str], Awaitable[None]]
+
+
+class PendingCartChanges:
+    """
+    Bitta xabar uchun hali yozilmagan o'zgarishlar
+    """
+
+    def __init__(self, message: Message, user_id: int):
+        self.message = message
+        self.user_id = user_id
+        self.deltas: Dict[int, int] = {}
+        self.lang = 'uz'
+        self.render: Optional[RenderCallback] = None
+
+
+class CartDebouncer:
+    """
+    Xabar bo'yicha debounce: birinchi bosish oynani ochadi, keyingilari unga qo'shiladi
+    """
+
+    def __init__(self, window: float = CART_DEBOUNCE_WINDOW):
+        self.window = window
+
+        self._pending: Dict[MessageKey, PendingCartChanges] = {}
+        self._timers: Dict[MessageKey, asyncio.Task] = {}
+        self._locks: Dict[MessageKey, asyncio.Lock] = {}
+        self._lock_users: Dict[MessageKey, int] = {}
+
+        self.taps = 0
+        self.flushes = 0
+
+    def add(self, message: Message, user_id: int, cart_item_id: int, change: int,
+            lang: str, render: RenderCallback) -> None:
+        """
+        O'zgarishni navbatga qo'yish (darhol qaytadi)
+        """
+        key = (message.chat.id, message.message_id)
+        pending = self._pending.get(key)
+
+        if pending is None:
+            pending = self._pending[key] = PendingCartChanges(message, user_id)
+            self._timers[key] = asyncio.create_task(self._flush_later(key), name="cart-debouncer")
+
+        pending.deltas[cart_item_id] = pending.deltas.get(cart_item_id, 0) + change
+        pending.lang = lang
+        pending.render = render
+        self.taps += 1
+
+    async def stop(self) -> None:
+        """
+        Rejalashtirilgan partiyalarni kutmasdan darhol yozish
+        """
+        for timer in list(self._timers.values()):
+            timer.cancel()
+        self._timers.clear()
+
+        for key in list(self._pending):
+            await self.flush(key)
+
+    async def _flush_later(self, key: MessageKey) -> None:
+        try:
+            await asyncio.sleep(self.window)
+        except asyncio.CancelledError:
+            return
+
+        self._timers.pop(key, None)
+        try:
+            await self.flush(key)
+        except Exception as e:
+            logger.error(f"❌ Cart debouncer xatolik: {e}")
+
+    async def flush(self, key: MessageKey) -> None:
+        """
+        Xabarning jamlangan o'zgarishlarini yozish va xabarni bir marta yangilash
+        """
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                await self._apply(pending)
+        finally:
+            self._lock_users[key] -= 1
+            if not self._lock_users[key]:
+                del self._lock_users[key]
+                del self._locks[key]
+
+    async def _apply(self, pending: PendingCartChanges) -> None:
+        # Yig'indisi 0 bo'lgan qatorlar (+1, -1) database ga yozilmaydi
+        changes = {cart_item_id: delta for cart_item_id, delta in pending.deltas.items() if delta}
+        if not changes:
+            return
+
+        items = {
+            cart_item_id: await change_cart_quantity(cart_item_id, pending.user_id, delta, pending.lang)
+            for cart_item_id, delta in changes.items()
+        }
+        self.flushes += 1
+
+        try:
+            await pending.render(pending.message, items, pending.lang)
+        except TelegramBadRequest as e:
+            # Masalan "message is not modified" - xabar allaqachon shu holatda
+            logger.debug(f"Cart xabarini yangilab bo'lmadi: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Debouncer statistikasi (monitoring uchun)
+        """
+        return {
+            'taps': self.taps,
+            'flushes': self.flushes,
+            'pending': len(self._pending)
+        }
+
+
+# Global debouncer (bot.py to'xtaganda qolgan o'zgarishlar yoziladi)
+cart_debouncer = CartDebouncer()
@@ -93,18 +93,19 @@ def check_subscription(func):
     return wrapper
 
 
-def rate_limit(limit: int = 3):
+def rate_limit(limit: float = 3, per: float = 1.0, key: str = None):
     """
     Rate limiting decorator (spam oldini olish)
+    Foydalanuvchi `per` soniyada `limit` martagacha chaqira oladi (token bucket).
+    Cheklashni ThrottlingMiddleware bajaradi (middlewares/throttling.py);
+    key - bir nechta handler uchun umumiy limit nomi (standart: handler nomi)
     """
 
     def decorator(func):
-        @wraps(func)
-        async def wrapper(event, *args, **kwargs):
-            # Bu yerda rate limiting logikasi bo'lishi mumkin
-            # Redis yoki in-memory storage ishlatish mumkin
-            return await func(event, *args, **kwargs)
+        func.aiogram_flag = {
+            **getattr(func, 'aiogram_flag', {}),
+            'rate_limit': {'rate': limit, 'per': per, 'key': key}
+        }
+        return func
 
-        return wrapper
-
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,154 @@
+# utils/fsm_storage.py
+"""
+FSM storage - holatlarni database da saqlash
+
+SQLStorage yozuvlarni darhol emas, FSM_FLUSH_INTERVAL oralig'ida bitta tranzaksiyada
+saqlaydi (write-behind). Saqlanmagan yozuvlar shu jarayonda xotiradan o'qiladi,
+boshqa jarayonlar esa ularni flush dan keyin ko'radi. Har bir yozuv FSM_STATE_TTL
+soniya yashaydi - tashlab ketilgan checkout lar avtomatik tozalanadi.
+
+aiogram har bir update uchun get_state chaqiradi, shuning uchun o'qilgan va yozilgan
+yozuvlar (bo'sh holat ham) TTLCache da saqlanadi - database ga faqat keshda yo'q
+foydalanuvchi uchun murojaat qilinadi. Bir nechta jarayonda boshqa jarayon yozgan holat
+FSM_CACHE_TTL soniyadan keyin ko'rinadi.
+
+data set_data da JSON ga o'giriladi: saqlab bo'lmaydigan qiymat faqat uni bergan
+handler da xatolik beradi, boshqa foydalanuvchilarning navbatdagi yozuvlariga ta'sir qilmaydi.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import (
+    logger,
+    FSM_STORAGE,
+    FSM_STATE_TTL,
+    FSM_FLUSH_INTERVAL,
+    FSM_CACHE_SIZE,
+    FSM_CACHE_TTL,
+    REDIS_URL
+)
+from database.cache import TTLCache
+from database.db import get_fsm_record, save_fsm_records, delete_expired_fsm_records
+
+# Muddati o'tgan yozuvlarni tozalash oralig'i (soniya)
+CLEANUP_INTERVAL = 600
+
+
+def _storage_key(key: StorageKey) -> str:
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+
+class SQLStorage(BaseStorage):
+    """
+    Database dagi fsm_states jadvaliga asoslangan FSM storage
+    """
+
+    def __init__(self, ttl: float = FSM_STATE_TTL, flush_interval: float = FSM_FLUSH_INTERVAL,
+                 cache_size: int = FSM_CACHE_SIZE, cache_ttl: float = FSM_CACHE_TTL):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._last_cleanup = time.monotonic()
+
+    async def _load(self, key: str) -> Dict[str, Any]:
+        """
+        Yozuvni olish: avval saqlanmagan o'zgarishlardan, keyin keshdan, oxirida database dan
+        Qaytaradi: {'state': ..., 'data': JSON matn}
+        """
+        record = self._pending.get(key) or self.cache.get(key)
+        if record is None:
+            record = await get_fsm_record(key) or {'state': None, 'data': '{}'}
+            self.cache.set(key, record)
+        return dict(record)
+
+    def _schedule(self, key: str, record: Dict[str, Any]) -> None:
+        self._pending[key] = record
+        self.cache.set(key, record)
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop(), name="fsm-storage-flush")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = _storage_key(key)
+        record = await self._load(storage_key)
+        record['state'] = state.state if isinstance(state, State) else state
+        self._schedule(storage_key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(_storage_key(key)))['state']
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        # JSON ga o'girib bo'lmasa TypeError shu yerda (chaqiruvchining o'zida) chiqadi
+        encoded = json.dumps(data, ensure_ascii=False)
+        storage_key = _storage_key(key)
+        record = await self._load(storage_key)
+        record['data'] = encoded
+        self._schedule(storage_key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return json.loads((await self._load(_storage_key(key)))['data'])
+
+    async def flush(self) -> None:
+        """
+        Saqlanmagan yozuvlarni bitta tranzaksiyada yozish
+        """
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        saved = False
+        try:
+            saved = await save_fsm_records(batch, self.ttl)
+        finally:
+            if not saved:
+                # Keyingi urinishda qayta saqlash (oradagi yangiroq yozuvlar ustun)
+                for key, record in batch.items():
+                    self._pending.setdefault(key, record)
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+
+                if time.monotonic() - self._last_cleanup > CLEANUP_INTERVAL:
+                    self._last_cleanup = time.monotonic()
+                    await delete_expired_fsm_records()
+            except Exception as e:
+                logger.error(f"❌ FSM storage flush xatolik: {e}")
+
+    async def close(self) -> None:
+        if self._flusher and not self._flusher.done():
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+        await self.flush()
+
+
+def create_fsm_storage() -> BaseStorage:
+    """
+    FSM_STORAGE sozlamasiga ko'ra storage yaratish
+    """
+    if FSM_STORAGE == "memory":
+        return MemoryStorage()
+
+    if FSM_STORAGE == "redis":
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError:
+            logger.error("❌ FSM_STORAGE=redis uchun 'redis' kutubxonasini o'rnating (pip install redis)")
+            raise
+
+        return RedisStorage.from_url(REDIS_URL, state_ttl=FSM_STATE_TTL, data_ttl=FSM_STATE_TTL)
+
+    return SQLStorage()
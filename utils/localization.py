@@ -157,6 +157,14 @@ TEXTS = {
         'uz': "❌ Buyurtma yaratishda xatolik",
         'ru': "❌ Ошибка при создании заказа"
     },
+    'too_many_requests': {
+        'uz': "⏳ Juda tez! Biroz kuting.",
+        'ru': "⏳ Слишком быстро! Подождите немного."
+    },
+    'order_out_of_stock': {
+        'uz': "❌ Omborda yetarli mahsulot yo'q: {products}\nSavatdagi miqdorni kamaytiring.",
+        'ru': "❌ Недостаточно товара на складе: {products}\nУменьшите количество в корзине."
+    },
 
     # Tugmalar
     'add_to_cart': {
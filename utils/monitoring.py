@@ -0,0 +1,88 @@
+# utils/monitoring.py
+"""
+Bot metrikalarini bitta joyga yig'ish
+
+Database chaqiruvlari (@timed), connection pool, event loop kechikishi, keshlar,
+throttling va savat debounceri statistikasi admin /metrics komandasida ko'rsatiladi.
+"""
+
+from typing import Any, Dict
+
+from database.db import engine, user_cache, catalog_cache
+from database.metrics import db_metrics, loop_lag_monitor
+from middlewares.throttling import throttling_middleware
+from utils.cart_debouncer import cart_debouncer
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """
+    Barcha metrikalarning joriy holati
+    """
+    return {
+        'db': db_metrics.snapshot(engine.pool),
+        'loop_lag': loop_lag_monitor.snapshot(),
+        'user_cache': user_cache.stats(),
+        'catalog_cache': catalog_cache.stats(),
+        'throttling': throttling_middleware.stats(),
+        'cart_debouncer': cart_debouncer.stats()
+    }
+
+
+def _ms(value) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def format_metrics(metrics: Dict[str, Any], top: int = 10) -> str:
+    """
+    Metrikalar matni (admin uchun)
+    top - eng ko'p vaqt olgan nechta db funksiyasi ko'rsatiladi
+    """
+    db = metrics['db']
+    text = "📊 Metrikalar\n\n"
+
+    text += f"🗄 DB chaqiruvlar: hozir {db['in_flight']}, eng ko'p {db['max_in_flight']}\n"
+    pool = db.get('pool')
+    if pool:
+        text += (
+            f"🔌 Pool: hajmi {pool['size']}, band {pool['checked_out']}, "
+            f"overflow {pool['overflow']}, kutayotgan ~{pool['waiting']}\n"
+        )
+
+    calls = sorted(
+        db['calls'].items(),
+        key=lambda item: item[1]['avg_ms'] * item[1]['count'],
+        reverse=True
+    )[:top]
+    if calls:
+        text += "\n⏱ Funksiyalar (soni / p50 / p99 / max, ms):\n"
+        for name, call in calls:
+            text += (
+                f"• {name}: {call['count']} / {_ms(call['p50_ms'])} / "
+                f"{_ms(call['p99_ms'])} / {_ms(call['max_ms'])}\n"
+            )
+
+    if db['errors']:
+        text += "\n❌ Xatoliklar:\n"
+        for name, count in sorted(db['errors'].items(), key=lambda item: item[1], reverse=True):
+            text += f"• {name}: {count}\n"
+
+    loop_lag = metrics['loop_lag']
+    text += (
+        f"\n🔁 Event loop kechikishi: p50 {_ms(loop_lag['p50_ms'])}, "
+        f"p99 {_ms(loop_lag['p99_ms'])}, max {_ms(loop_lag['max_ms'])} ms\n"
+    )
+
+    for title, key in (("👤 Foydalanuvchi keshi", 'user_cache'), ("📦 Katalog keshi", 'catalog_cache')):
+        cache = metrics[key]
+        text += f"{title}: {cache['size']} ta, hit {cache['hit_rate']:.0%} ({cache['hits']}/{cache['hits'] + cache['misses']})\n"
+
+    throttling = metrics['throttling']
+    text += f"🚦 Throttling: o'tkazildi {throttling['allowed']}, cheklandi {throttling['throttled_total']}\n"
+
+    debouncer = metrics['cart_debouncer']
+    text += (
+        f"🛒 Savat debounceri: bosishlar {debouncer['taps']}, "
+        f"yozishlar {debouncer['flushes']}, kutmoqda {debouncer['pending']}\n"
+    )
+
+    return text
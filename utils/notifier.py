@@ -0,0 +1,191 @@
+# utils/notifier.py
+"""
+Xabarlarni fon rejimida yuborish (adminlar, operatorlar guruhi)
+
+Handler xabarni navbatga qo'yadi va darhol davom etadi. Worker lar xabarlarni
+cheklangan parallellik bilan yuboradi, Telegram limitlariga rioya qiladi
+(umumiy soniyasiga N ta xabar, bitta chatga / guruhga oraliq) va RetryAfter
+bo'lsa kutib, qayta urinadi.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from aiogram.exceptions import (
+    TelegramRetryAfter,
+    TelegramNetworkError,
+    TelegramServerError,
+    TelegramAPIError
+)
+
+from config import (
+    logger,
+    NOTIFY_CONCURRENCY,
+    NOTIFY_GLOBAL_RATE,
+    NOTIFY_CHAT_INTERVAL,
+    NOTIFY_GROUP_INTERVAL,
+    NOTIFY_MAX_RETRIES
+)
+
+
+class Notifier:
+    """
+    Navbat + worker lar asosidagi xabar yuboruvchi
+    send() / broadcast() darhol Future qaytaradi, natijani kutish shart emas
+    """
+
+    def __init__(self, concurrency: int = NOTIFY_CONCURRENCY,
+                 global_rate: float = NOTIFY_GLOBAL_RATE,
+                 chat_interval: float = NOTIFY_CHAT_INTERVAL,
+                 group_interval: float = NOTIFY_GROUP_INTERVAL,
+                 max_retries: int = NOTIFY_MAX_RETRIES):
+        self.concurrency = concurrency
+        self.global_interval = 1 / global_rate
+        self.chat_interval = chat_interval
+        self.group_interval = group_interval
+        self.max_retries = max_retries
+
+        self.bot = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._lock = asyncio.Lock()
+        self._global_next = 0.0
+        self._chat_next: Dict[int, float] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self, bot) -> None:
+        """
+        Worker larni ishga tushirish (event loop ichida chaqiriladi)
+        """
+        if self.running:
+            return
+
+        self.bot = bot
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"notifier-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self, drain: bool = True, timeout: float = 10) -> None:
+        """
+        Worker larni to'xtatish
+        drain=True bo'lsa, navbatdagi xabarlar yuborilishi kutiladi (timeout gacha)
+        """
+        if not self.running:
+            return
+
+        if drain:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ Notifier: {self._queue.qsize()} ta xabar yuborilmay qoldi")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def send(self, chat_id: int, text: str, **kwargs: Any) -> asyncio.Future:
+        """
+        Bitta xabarni navbatga qo'yish
+        Future natijasi: yuborildi (True) yoki yo'q (False)
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        if not self.running:
+            logger.error(f"❌ Notifier ishga tushirilmagan, xabar yuborilmadi: {chat_id}")
+            future.set_result(False)
+            return future
+
+        self._queue.put_nowait((chat_id, text, kwargs, future))
+        return future
+
+    def broadcast(self, chat_ids: Iterable[int], text: str, **kwargs: Any) -> asyncio.Future:
+        """
+        Bir nechta chatga bir xil xabarni navbatga qo'yish
+        Future natijasi: {chat_id: yuborildimi}
+        """
+        chat_ids = list(dict.fromkeys(chat_ids))
+        futures = [self.send(chat_id, text, **kwargs) for chat_id in chat_ids]
+
+        async def collect() -> Dict[int, bool]:
+            results = await asyncio.gather(*futures)
+            return dict(zip(chat_ids, results))
+
+        return asyncio.ensure_future(collect())
+
+    async def _reserve_slot(self, chat_id: int) -> float:
+        """
+        Umumiy va chat limitlari bo'yicha yuborish vaqtini band qilish
+        Qaytaradi: necha soniya kutish kerak
+        """
+        interval = self.group_interval if chat_id < 0 else self.chat_interval
+
+        async with self._lock:
+            now = time.monotonic()
+            send_at = max(now, self._global_next, self._chat_next.get(chat_id, 0.0))
+
+            self._global_next = send_at + self.global_interval
+            self._chat_next[chat_id] = send_at + interval
+
+            # Eskirgan chat yozuvlarini tozalash (xotira cheksiz o'smasligi uchun)
+            if len(self._chat_next) > 10000:
+                self._chat_next = {cid: t for cid, t in self._chat_next.items() if t > now}
+
+            return send_at - now
+
+    async def _deliver(self, chat_id: int, text: str, kwargs: Dict) -> bool:
+        """
+        Xabarni yuborish, RetryAfter va tarmoq xatolarida qayta urinish
+        """
+        for attempt in range(self.max_retries + 1):
+            delay = await self._reserve_slot(chat_id)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                await self.bot.send_message(chat_id, text, **kwargs)
+                return True
+            except TelegramRetryAfter as e:
+                # Telegram aytgan vaqtgacha shu chatga yubormaslik
+                retry_at = time.monotonic() + e.retry_after
+                self._chat_next[chat_id] = max(self._chat_next.get(chat_id, 0.0), retry_at)
+                logger.warning(f"⚠️ Notifier: {chat_id} uchun RetryAfter {e.retry_after}s")
+            except (TelegramNetworkError, TelegramServerError) as e:
+                # Eksponensial kutish: 1, 2, 4, ... soniya
+                logger.warning(f"⚠️ Notifier: {chat_id} ga yuborishda xatolik: {e}")
+                await asyncio.sleep(2 ** attempt)
+            except TelegramAPIError as e:
+                # Bloklangan, chat topilmadi va h.k. - qayta urinishdan foyda yo'q
+                logger.error(f"❌ Notifier: {chat_id} ga yuborilmadi: {e}")
+                return False
+
+        logger.error(f"❌ Notifier: {chat_id} ga {self.max_retries + 1} urinishda yuborilmadi")
+        return False
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id, text, kwargs, future = await self._queue.get()
+            try:
+                result = await self._deliver(chat_id, text, kwargs)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_result(False)
+                raise
+            except Exception as e:
+                logger.error(f"❌ Notifier: kutilmagan xatolik ({chat_id}): {e}")
+                result = False
+            finally:
+                self._queue.task_done()
+
+            if not future.done():
+                future.set_result(result)
+
+
+# Global notifier (bot.py da ishga tushiriladi)
+notifier = Notifier()
@@ -0,0 +1,182 @@
+# utils/outbox.py
+"""
+Outbox worker - database dagi outbox hodisalarini o'qib, xabar sifatida yuborish
+
+Hodisa buyurtma bilan bitta tranzaksiyada yoziladi (database/db.py: create_order),
+shuning uchun checkout tez tugaydi va bot qayta ishga tushsa ham xabar yo'qolmaydi.
+Worker hodisalarni yuborishdan oldin band qiladi - bir nechta jarayon ishlasa ham
+har bir xabar bir marta yuboriladi. Yetkazish har bir qabul qiluvchi (chat_id) bo'yicha
+hisobga olinadi: qayta urinishda faqat xabar yetmagan chatlarga yuboriladi.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from config import (
+    logger,
+    OPERATORS_GROUP_ID,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_CLAIM_TIMEOUT
+)
+from database.db import get_admins, claim_outbox_events, delete_outbox_event, retry_outbox_event
+from utils.notifier import notifier
+
+
+def render_new_order(payload: Dict) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Yangi buyurtma xabari va operator uchun "Qabul qilish" tugmasi
+    """
+    admin_text = f"🆕 Yangi buyurtma #{payload['order_id']}\n\n"
+    admin_text += f"👤 {payload.get('customer_name') or ''}\n"
+    admin_text += f"📞 {payload['phone']}\n"
+    admin_text += f"📍 {payload['address']}\n"
+    admin_text += f"💳 {payload['payment_type'].upper()}\n\n"
+    admin_text += "📦 Mahsulotlar:\n"
+
+    for idx, item in enumerate(payload['items'], 1):
+        admin_text += f"{idx}. {item['name']} x {item['quantity']} = {item['price'] * item['quantity']:,.0f} so'm\n"
+
+    admin_text += f"\n💵 Jami: {payload['total']:,.0f} so'm"
+
+    # Inline keyboard - operator qabul qilishi uchun
+    operator_keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                text="✅ Qabul qilish",
+                callback_data=f"operator_accept_{payload['order_id']}"
+            )
+        ]
+    ])
+
+    return admin_text, operator_keyboard
+
+
+class OutboxWorker:
+    """
+    Outbox ni davriy (yoki wake() chaqirilganda darhol) o'qib, notifier orqali yuboradi
+    Barcha qabul qiluvchilarga yetkazilgan hodisa o'chiriladi, aks holda yetkazilganlar
+    ro'yxati saqlanib, qolganlariga keyinroq qayta uriniladi.
+    """
+
+    def __init__(self, poll_interval: float = OUTBOX_POLL_INTERVAL,
+                 batch_size: int = OUTBOX_BATCH_SIZE,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 claim_timeout: float = OUTBOX_CLAIM_TIMEOUT):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """
+        Worker ni fon vazifasi sifatida ishga tushirish
+        """
+        if self._task:
+            return
+
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="outbox-worker")
+
+    def wake(self) -> None:
+        """
+        Yangi hodisa yozildi - keyingi so'rovni kutmasdan ishlash
+        """
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """
+        Joriy partiyani tugatib, worker ni to'xtatish
+        """
+        if not self._task:
+            return
+
+        self._stopping = True
+        self.wake()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logger.error(f"❌ Outbox worker xatolik: {e}")
+                processed = 0
+
+            # Partiya to'la bo'lsa, darhol davom etish
+            if processed >= self.batch_size:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def process_batch(self) -> int:
+        """
+        Bitta partiya hodisalarni yuborish
+        Qaytaradi: ko'rib chiqilgan hodisalar soni
+        """
+        events = await claim_outbox_events(self.batch_size, self.claim_timeout)
+
+        # Hodisalar parallel navbatga qo'yiladi, tezlikni notifier cheklaydi
+        results = await asyncio.gather(*[self._dispatch(event) for event in events])
+
+        for event, (delivered_to, complete) in zip(events, results):
+            if complete:
+                await delete_outbox_event(event['id'])
+            else:
+                # 30, 60, 120, ... soniyadan keyin qayta urinish
+                delay = 30 * 2 ** event['attempts']
+                await retry_outbox_event(event['id'], delay, self.max_attempts, delivered_to)
+
+        return len(events)
+
+    async def _dispatch(self, event: Dict) -> Tuple[List[int], bool]:
+        """
+        Hodisani hali xabar yetmagan qabul qiluvchilarga yuborish
+        Qaytaradi: (yetkazilgan chat_id lar - avvalgi urinishlar bilan birga,
+        hammasiga yetkazildimi - qabul qiluvchi bo'lmasa ham True)
+        """
+        if event['event_type'] != 'new_order':
+            logger.error(f"❌ Outbox: noma'lum hodisa turi {event['event_type']}")
+            return [], True
+
+        admin_text, operator_keyboard = render_new_order(event['payload'])
+        delivered = set(event.get('delivered_to') or [])
+
+        sends: List[asyncio.Future] = []
+
+        # Adminlarga yuborish
+        admins = [chat_id for chat_id in await get_admins() if chat_id not in delivered]
+        if admins:
+            sends.append(notifier.broadcast(admins, admin_text))
+
+        # Operatorlar guruhiga yuborish
+        if OPERATORS_GROUP_ID and OPERATORS_GROUP_ID not in delivered:
+            sends.append(notifier.broadcast([OPERATORS_GROUP_ID], admin_text, reply_markup=operator_keyboard))
+
+        complete = True
+        for result in await asyncio.gather(*sends):
+            for chat_id, sent in result.items():
+                if sent:
+                    delivered.add(chat_id)
+                else:
+                    complete = False
+
+        return sorted(delivered), complete
+
+
+# Global outbox worker (bot.py da ishga tushiriladi)
+outbox_worker = OutboxWorker()
@@ -0,0 +1,130 @@
+# utils/stock_monitor.py
+"""
+Kam qolgan mahsulotlar monitori
+
+Ombor o'zgargan mahsulotlar belgilab boriladi, oyna (LOW_STOCK_ALERT_WINDOW) oxirida
+faqat shu mahsulotlar bitta so'rovda tekshiriladi. Mahsulot chegarani kesib o'tganda
+(yetarli -> kam qolgan -> tugagan) adminlarga bitta jamlangan xabar yuboriladi.
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set
+
+from config import logger, LOW_STOCK_ALERT_WINDOW
+from database.db import get_admins, get_stock_levels
+from utils.notifier import notifier
+
+# Ombor holatlari (kattaroq - yomonroq)
+LEVEL_OK = 0
+LEVEL_LOW = 1
+LEVEL_OUT = 2
+
+
+def stock_level(product: Dict) -> int:
+    """
+    Mahsulotning ombor holati
+    """
+    if product['stock_quantity'] <= 0:
+        return LEVEL_OUT
+    if product['stock_quantity'] <= product['low_stock_threshold']:
+        return LEVEL_LOW
+    return LEVEL_OK
+
+
+class LowStockMonitor:
+    """
+    Debounce qilingan ogohlantirish: har bir mahsulotning oxirgi holati xotirada saqlanadi
+    """
+
+    def __init__(self, window: float = LOW_STOCK_ALERT_WINDOW, lang: str = 'uz'):
+        self.window = window
+        self.lang = lang
+
+        self._levels: Dict[int, int] = {}
+        self._dirty: Set[int] = set()
+        self._timer: Optional[asyncio.Task] = None
+
+    def mark_changed(self, product_ids: Iterable[int]) -> None:
+        """
+        Ombori o'zgargan mahsulotlarni belgilash (darhol qaytadi)
+        Oynaning birinchi o'zgarishi tekshiruvni rejalashtiradi
+        """
+        self._dirty.update(product_ids)
+
+        if self._dirty and self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later(), name="low-stock-monitor")
+
+    async def stop(self) -> None:
+        """
+        Rejalashtirilgan tekshiruvni bekor qilib, qolganlarini darhol tekshirish
+        """
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.window)
+        except asyncio.CancelledError:
+            return
+
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"❌ Low stock monitor xatolik: {e}")
+
+    async def flush(self) -> None:
+        """
+        Belgilangan mahsulotlarni tekshirish va chegarani kesib o'tganlar haqida xabar berish
+        """
+        if not self._dirty:
+            return
+
+        product_ids, self._dirty = list(self._dirty), set()
+        products = await get_stock_levels(product_ids, self.lang)
+
+        low_stock: List[Dict] = []
+        out_of_stock: List[Dict] = []
+
+        for product in products:
+            level = stock_level(product) if product['is_active'] else LEVEL_OK
+            previous = self._levels.get(product['id'], LEVEL_OK)
+            self._levels[product['id']] = level
+
+            # Faqat yomonlashganda ogohlantirish (to'ldirilganda holat qayta tiklanadi)
+            if level > previous:
+                if level == LEVEL_OUT:
+                    out_of_stock.append(product)
+                else:
+                    low_stock.append(product)
+
+        if not low_stock and not out_of_stock:
+            return
+
+        admins = await get_admins()
+        notifier.broadcast(admins, self._render(low_stock, out_of_stock), parse_mode="HTML")
+
+    def _render(self, low_stock: List[Dict], out_of_stock: List[Dict]) -> str:
+        products_text = ""
+
+        if out_of_stock:
+            products_text += "❌ <b>Tugagan:</b>\n"
+            for product in out_of_stock:
+                products_text += f"  • {product['name']}\n"
+            products_text += "\n"
+
+        if low_stock:
+            products_text += "⚠️ <b>Kam qolgan:</b>\n"
+            for product in low_stock:
+                products_text += f"  • {product['name']} - {product['stock_quantity']} dona\n"
+
+        text = "⚠️ <b>OMBOR OGOHLANTIRISHI!</b>\n\n"
+        text += "Quyidagi mahsulotlar tugab qolmoqda:\n\n" if self.lang == 'uz' else "Следующие товары заканчиваются:\n\n"
+        text += products_text
+        return text
+
+
+# Global monitor (bot.py to'xtaganda qolgan o'zgarishlar tekshiriladi)
+low_stock_monitor = LowStockMonitor()
@@ -0,0 +1,157 @@
+# utils/webhook.py
+"""
+Webhook rejimi - aiohttp server (long polling o'rniga)
+
+Telegram update larni POST qiladi, server secret token ni tekshiradi va update ni
+fon vazifasida qayta ishlaydi (bir vaqtda WEBHOOK_MAX_CONCURRENCY tadan ko'p emas).
+To'xtatilganda yangi so'rovlar qabul qilinmaydi va ishlanayotgan update lar tugashi kutiladi.
+
+Lokal tekshirish (yozib olingan update JSON ni yuborish):
+    curl -X POST http://localhost:8080/webhook \\
+         -H "Content-Type: application/json" \\
+         -H "X-Telegram-Bot-Api-Secret-Token: $WEBHOOK_SECRET" \\
+         -d @update.json
+"""
+
+import asyncio
+import hmac
+import signal
+from typing import Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from config import (
+    logger,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_MAX_CONCURRENCY,
+    WEBHOOK_DRAIN_TIMEOUT
+)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """
+    Update larni qabul qiluvchi aiohttp server
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot,
+                 path: str = WEBHOOK_PATH,
+                 secret: str = WEBHOOK_SECRET,
+                 max_concurrency: int = WEBHOOK_MAX_CONCURRENCY,
+                 drain_timeout: float = WEBHOOK_DRAIN_TIMEOUT):
+        if not secret:
+            # Secret siz update manbasini tekshirib bo'lmaydi
+            raise ValueError("WEBHOOK_SECRET bo'sh - webhook rejimi ishga tushirilmaydi")
+
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret = secret
+        self.drain_timeout = drain_timeout
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._accepting = True
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Telegram dan kelgan update ni qabul qilish
+        """
+        if not self._accepting:
+            # Telegram keyinroq qayta yuboradi (yoki load balancer boshqa jarayonga)
+            return web.Response(status=503)
+
+        if not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, "").encode(), self.secret.encode()
+        ):
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            logger.warning(f"⚠️ Noto'g'ri update: {e}")
+            return web.Response(status=400)
+
+        # Javob darhol qaytariladi, update fon vazifasida ishlanadi
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return web.Response(status=200)
+
+    async def _process(self, update: Update) -> None:
+        async with self._semaphore:
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                logger.error(f"❌ Update #{update.update_id} ni ishlashda xatolik: {e}")
+
+    async def drain(self) -> None:
+        """
+        Yangi update larni qabul qilishni to'xtatish va ishlanayotganlarini kutish
+        """
+        self._accepting = False
+
+        if not self._tasks:
+            return
+
+        logger.info(f"⏳ {len(self._tasks)} ta update tugashi kutilmoqda...")
+        done, pending = await asyncio.wait(set(self._tasks), timeout=self.drain_timeout)
+
+        if pending:
+            logger.warning(f"⚠️ {len(pending)} ta update {self.drain_timeout}s ichida tugamadi, bekor qilinmoqda")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """
+    Webhook ni o'rnatish va SIGINT/SIGTERM kelguncha serverni ishlatish
+    """
+    server = WebhookServer(dp, bot)
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows da signal handler yo'q - KeyboardInterrupt ishlaydi
+            pass
+
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+
+    try:
+        site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+        await site.start()
+
+        if WEBHOOK_URL:
+            await bot.set_webhook(
+                url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=dp.resolve_used_update_types(),
+                max_connections=WEBHOOK_MAX_CONCURRENCY
+            )
+
+        logger.info(f"🌐 Webhook server: http://{WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        await stop_event.wait()
+    finally:
+        # Avval ishlanayotgan update lar tugaydi, keyin server yopiladi
+        await server.drain()
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)